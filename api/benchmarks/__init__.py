@@ -0,0 +1 @@
+# Offline benchmarks for the API hot paths; run from the api directory, e.g. `python -m benchmarks.bench_query_batching`
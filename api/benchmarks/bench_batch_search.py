@@ -0,0 +1,110 @@
+"""
+N single searches vs. one batch search against a running API.
+
+Sends the same N queries once as N requests carrying one query each and once
+as a single /search/*_batch request, and reports wall time and queries/sec
+for both. Product queries go through /search/product_search_batch in both
+modes (without LLM generation), so only the batching differs.
+
+    python -m benchmarks.bench_batch_search --url http://localhost:8000 --n 100 --endpoint product
+"""
+import argparse
+import json
+import random
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+CATEGORIES = ["Electronics", "Clothing", "Groceries", "Home & Kitchen", "Sports"]
+WORDS = ["best", "cheap", "popular", "new", "discounted", "premium", "seasonal", "top", "wireless", "organic"]
+
+
+def post(url, body):
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode('utf-8'), headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def make_queries(n, seed=42):
+    rng = random.Random(seed)
+    return [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(CATEGORIES).lower()} products" for _ in range(n)]
+
+
+def make_financial_vectors(n, seed=42):
+    rng = random.Random(seed)
+    vectors = []
+    for _ in range(n):
+        quantity, unit_price, discount = rng.randint(1, 10), round(rng.uniform(5, 500), 2), round(rng.uniform(0, 0.3), 2)
+        vectors.append([quantity, unit_price, unit_price * quantity * (1 - discount), discount * 100])
+    return vectors
+
+
+def make_time_vectors(n, seed=42):
+    rng = random.Random(seed)
+    now = time.time()
+    return [[now - rng.randint(0, 365) * 86400] for _ in range(n)]
+
+
+def single_calls(base_url, endpoint, items, k, concurrency):
+    if endpoint == "product":
+        def one(query):
+            return post(f"{base_url}/search/product_search_batch", {"queries": [query], "k": k})
+    else:
+        def one(vector):
+            return post(f"{base_url}/search/{endpoint}_search?k={k}", vector)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, items))
+
+
+def batch_call(base_url, endpoint, items, k):
+    if endpoint == "product":
+        return post(f"{base_url}/search/product_search_batch", {"queries": items, "k": k})
+    return post(f"{base_url}/search/{endpoint}_search_batch", {"query_vectors": items, "k": k})
+
+
+def timed(func, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", choices=["product", "financial", "time"], default="product")
+    parser.add_argument("--n", type=int, default=100, help="queries per run")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1, help="parallel single requests")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per mode; the fastest is reported")
+    args = parser.parse_args()
+
+    items = {
+        "product": make_queries,
+        "financial": make_financial_vectors,
+        "time": make_time_vectors,
+    }[args.endpoint](args.n)
+
+    # Warm up connections, caches and the encoder before timing
+    batch_call(args.url, args.endpoint, items[:1], args.k)
+
+    results = {
+        f"{args.n} single calls": timed(lambda: single_calls(args.url, args.endpoint, items, args.k, args.concurrency), args.repeats),
+        "1 batch call": timed(lambda: batch_call(args.url, args.endpoint, items, args.k), args.repeats),
+    }
+
+    print(f"{args.endpoint} search, n={args.n}, k={args.k}, single-call concurrency {args.concurrency}")
+    print(f"{'mode':<20}{'seconds':>10}{'queries/s':>12}")
+    for mode, seconds in results.items():
+        print(f"{mode:<20}{seconds:>10.3f}{args.n / seconds:>12.1f}")
+    print(f"speed-up: {results[f'{args.n} single calls'] / results['1 batch call']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+End-to-end latency of /search/product_search per pipeline stage, across dataset sizes.
+
+For each size the suite:
+
+1. generates that many synthetic transactions (drawn from a fixed product
+   catalog) into their own PostgreSQL schema, bench_<size>, created from
+   data/sql/init.sql;
+2. builds a vector store from them with the real ingestion pipeline
+   (data/embeddings/generate_embeddings.py);
+3. starts the API on that store with the stub LLM (LLM_BACKEND=stub), no
+   network and no API key, and fires concurrent product queries, each with a
+   unique suffix so the response cache does not answer it.
+
+The schema is selected for both processes through libpq's PGOPTIONS
+(search_path), so no configuration changes are needed. Per-stage times come
+from each response's Server-Timing header; the report gives throughput and
+p50/p95/p99 per stage (encode, search, db, context, llm), server total and
+client round trip.
+
+Needs a PostgreSQL reachable through DB_USER/DB_PASS/DB_HOST/DB_PORT/DB_NAME
+(e.g. the docker-compose postgres service) and the API and ingestion dependencies:
+
+    python -m benchmarks.bench_e2e --sizes 10000,100000 --requests 500 --concurrency 16
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import psycopg2
+
+from benchmarks.bench_batch_search import make_queries
+from config.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(API_DIR)
+INIT_SQL = os.path.join(REPO_DIR, "data", "sql", "init.sql")
+EMBEDDINGS_DIR = os.path.join(REPO_DIR, "data", "embeddings")
+
+STAGES = ["encode", "search", "db", "context", "llm", "total"]
+CATEGORIES = ["Electronics", "Clothing", "Groceries", "Home & Kitchen", "Sports"]
+ADJECTIVES = ["wireless", "organic", "premium", "compact", "durable", "lightweight", "classic", "smart", "eco", "portable"]
+NOUNS = {
+    "Electronics": ["headphones", "speaker", "charger", "smartwatch", "tablet", "camera"],
+    "Clothing": ["jacket", "t-shirt", "sneakers", "jeans", "scarf", "hoodie"],
+    "Groceries": ["coffee beans", "olive oil", "granola", "green tea", "pasta", "honey"],
+    "Home & Kitchen": ["blender", "frying pan", "kettle", "cutting board", "lamp", "towel set"],
+    "Sports": ["yoga mat", "dumbbells", "tennis racket", "running shoes", "water bottle", "bike helmet"],
+}
+
+TRANSACTION_COLUMNS = [
+    'invoice_id', 'customer_id', 'product_id', 'quantity', 'unit_price', 'price', 'discount_applied',
+    'transaction_date', 'payment_method', 'product_category', 'product_description',
+]
+
+
+def connect(schema):
+    return psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT,
+        options=f"-c search_path={schema}"
+    )
+
+
+def make_catalog(num_products, seed):
+    rng = random.Random(seed)
+    catalog = []
+    for product_id in range(1, num_products + 1):
+        category = rng.choice(CATEGORIES)
+        description = f"{rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS[category])}"
+        catalog.append((product_id, category, description, round(rng.uniform(5, 500), 2)))
+    return catalog
+
+
+def copy_rows(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def generate_dataset(schema, num_rows, num_products, seed):
+    """
+    (Re)create the schema from init.sql and fill product_details and retail_transactions.
+    """
+    catalog = make_catalog(num_products, seed)
+    rng = np.random.default_rng(seed)
+    product_rows = rng.integers(0, len(catalog), size=num_rows)
+    customers = rng.integers(1, 10000, size=num_rows)
+    quantities = rng.integers(1, 10, size=num_rows)
+    discounts = np.round(rng.uniform(0, 0.3, size=num_rows), 2)
+    dates = np.datetime_as_string(
+        rng.uniform(1.6e9, 1.73e9, size=num_rows).astype('datetime64[s]'), unit='s'
+    )
+
+    transactions = []
+    for i in range(num_rows):
+        product_id, category, description, unit_price = catalog[product_rows[i]]
+        quantity, discount = int(quantities[i]), float(discounts[i])
+        transactions.append((
+            i // 3 + 1, int(customers[i]), product_id, quantity, unit_price,
+            round(unit_price * quantity * (1 - discount), 2), discount * 100, dates[i], "credit card",
+            category, description,
+        ))
+
+    with connect(schema) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {schema}")
+            cursor.execute(f"SET search_path TO {schema}")
+            with open(INIT_SQL) as f:
+                cursor.execute(f.read())
+            copy_rows(
+                cursor, "product_details", ['product_id', 'product_category', 'product_description', 'unit_price'],
+                [(product_id, category, description, price) for product_id, category, description, price in catalog]
+            )
+            copy_rows(cursor, "retail_transactions", TRANSACTION_COLUMNS, transactions)
+            cursor.execute("ANALYZE")
+    conn.close()
+
+
+def drop_schema(schema):
+    conn = connect("public")
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    conn.close()
+
+
+def build_vector_store(env, vector_store_dir):
+    env = {**env, "VECTOR_STORE_DIR": vector_store_dir, "INGESTION_MODE": "full"}
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "generate_embeddings.py"], cwd=EMBEDDINGS_DIR, env=env, check=True,
+        stdout=subprocess.DEVNULL
+    )
+    return time.perf_counter() - start
+
+
+def start_api(env, port, timeout=300):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, env=env
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API exited with code {server.returncode} during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/"):
+                return server
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"API did not start within {timeout}s")
+
+
+def parse_server_timing(header):
+    timings = {}
+    for entry in (header or "").split(","):
+        name, _, duration = entry.strip().partition(";dur=")
+        if duration:
+            timings[name] = float(duration)
+    return timings
+
+
+def timed_query(base_url, query):
+    request = urllib.request.Request(
+        f"{base_url}/search/product_search", data=json.dumps({"query": query}).encode('utf-8'),
+        headers={"Content-Type": "application/json"}, method="POST"
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            timings = parse_server_timing(response.headers.get("Server-Timing"))
+    except urllib.error.HTTPError:
+        return None
+    timings["client"] = (time.perf_counter() - start) * 1000.0
+    return timings
+
+
+def run_load(base_url, num_requests, concurrency, seed):
+    run_id = random.randrange(1 << 30)
+    queries = [f"{query} #{run_id}-{i}" for i, query in enumerate(make_queries(num_requests, seed))]
+    # Warm up connections, executors and the encoder before timing
+    for i in range(min(concurrency, 8)):
+        timed_query(base_url, f"warm-up #{run_id}-{i}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda query: timed_query(base_url, query), queries))
+    wall = time.perf_counter() - start
+    return [result for result in results if result is not None], wall
+
+
+def summarise(results, wall):
+    summary = {"requests": len(results), "throughput_rps": len(results) / wall, "stages": {}}
+    for stage in STAGES + ["client"]:
+        values = [result[stage] for result in results if stage in result]
+        if values:
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary["stages"][stage] = {"calls": len(values), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+    return summary
+
+
+def print_summary(size, summary, errors, build_seconds, args):
+    print(f"\n{size} rows (store built in {build_seconds:.1f}s): {summary['requests']} requests, "
+          f"concurrency {args.concurrency}, {summary['throughput_rps']:.1f} req/s, {errors} errors")
+    print(f"{'stage':<10}{'calls':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, row in summary["stages"].items():
+        print(f"{stage:<10}{row['calls']:>8}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated transaction counts")
+    parser.add_argument("--products", type=int, default=1000, help="catalog size the transactions draw from")
+    parser.add_argument("--requests", type=int, default=500, help="timed queries per size")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-first-token-ms", type=float, default=50.0, help="stub LLM delay before the first token")
+    parser.add_argument("--llm-token-ms", type=float, default=0.0, help="stub LLM delay per further token")
+    parser.add_argument("--work-dir", help="where vector stores are built (default: a temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="keep the bench_<size> schemas and vector stores")
+    parser.add_argument("--output", help="also write the summaries to this JSON file")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="retail-rag-bench-")
+    base_url = f"http://127.0.0.1:{args.port}"
+    report = {}
+    try:
+        for size in [int(size) for size in args.sizes.split(",")]:
+            schema = f"bench_{size}"
+            env = {**os.environ, "PGOPTIONS": f"-c search_path={schema}"}
+            vector_store_dir = os.path.join(work_dir, schema)
+            shutil.rmtree(vector_store_dir, ignore_errors=True)
+            os.makedirs(vector_store_dir)
+
+            generate_dataset(schema, size, args.products, args.seed)
+            build_seconds = build_vector_store(env, vector_store_dir)
+
+            server = start_api({
+                **env,
+                "VECTOR_STORE_DIR": vector_store_dir,
+                "LLM_BACKEND": "stub",
+                "LLM_STUB_FIRST_TOKEN_MS": str(args.llm_first_token_ms),
+                "LLM_STUB_TOKEN_MS": str(args.llm_token_ms),
+                "INDEX_WATCH_INTERVAL_SECONDS": "0",
+                "LOG_LEVEL": "WARNING",
+            }, args.port)
+            try:
+                results, wall = run_load(base_url, args.requests, args.concurrency, args.seed)
+            finally:
+                server.terminate()
+                server.wait()
+
+            summary = summarise(results, wall)
+            summary["build_seconds"] = build_seconds
+            report[size] = summary
+            print_summary(size, summary, args.requests - len(results), build_seconds, args)
+            if not args.keep:
+                drop_schema(schema)
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
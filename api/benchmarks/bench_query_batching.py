@@ -0,0 +1,97 @@
+"""
+Load benchmark for product query micro-batching.
+
+Fires concurrent product queries at a synthetic flat FAISS index through the
+shared query encoder, once with the QueryBatcher and once with one encode and
+one search per query, and reports QPS and latency percentiles for both.
+
+    python -m benchmarks.bench_query_batching --requests 1000 --concurrency 64
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import faiss
+import numpy as np
+
+from services.batching import QueryBatcher
+from services.encoder import query_encoder
+from services.executors import stage_executor
+
+CATEGORIES = ["Electronics", "Clothing", "Groceries", "Home & Kitchen", "Sports"]
+WORDS = ["best", "cheap", "popular", "new", "discounted", "premium", "seasonal", "top", "wireless", "organic"]
+
+
+def make_queries(n, seed=42):
+    rng = random.Random(seed)
+    return [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(CATEGORIES).lower()} products" for _ in range(n)]
+
+
+def make_index(num_vectors, dimension, seed=42):
+    rng = np.random.default_rng(seed)
+    index = faiss.IndexFlatL2(dimension)
+    index.add(rng.standard_normal((num_vectors, dimension), dtype='float32'))
+    return index
+
+
+def percentiles(latencies):
+    values = np.array(latencies) * 1000.0
+    return {f"p{p}": float(np.percentile(values, p)) for p in (50, 95, 99)}
+
+
+async def run_load(queries, concurrency, handler):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(query):
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in queries))
+    elapsed = time.perf_counter() - start
+    return {"qps": len(queries) / elapsed, "seconds": elapsed, **percentiles(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--vectors", type=int, default=100000, help="size of the synthetic product index")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    query_encoder.load()
+    index = make_index(args.vectors, query_encoder.dimension)
+    queries = make_queries(args.requests)
+
+    async def unbatched(query):
+        embedding = await stage_executor.run("encode", query_encoder.encode, [query])
+        return await stage_executor.run("search", index.search, embedding, args.k)
+
+    async def bench():
+        stage_executor.start()
+        batcher = QueryBatcher(query_encoder, index.search, args.window_ms, args.max_batch_size)
+        results = {
+            "batching off": await run_load(queries, args.concurrency, unbatched),
+            "batching on": await run_load(queries, args.concurrency, lambda query: batcher.submit(query, args.k)),
+        }
+        stage_executor.shutdown()
+        return results, batcher.stats()
+
+    results, batcher_stats = asyncio.run(bench())
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, index {args.vectors} x {query_encoder.dimension}")
+    print(f"{'mode':<14}{'qps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<14}{result['qps']:>10.1f}{result['p50']:>10.2f}{result['p95']:>10.2f}{result['p99']:>10.2f}")
+    print(f"avg batch size: {batcher_stats['avg_batch_size']:.1f}, largest batch: {batcher_stats['largest_batch']}")
+
+
+if __name__ == "__main__":
+    main()
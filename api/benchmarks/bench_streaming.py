@@ -0,0 +1,91 @@
+"""
+Time to first byte / first token of /search/product_search vs. its SSE variant.
+
+Sends the same queries to the buffered endpoint, which answers only after the
+whole completion, and to /search/product_search_stream, and reports p50/p95 of
+time to related_data, time to first token and total latency. Start the API
+with LLM_BACKEND=stub to measure offline with a paced local model:
+
+    LLM_BACKEND=stub uvicorn main:app --port 8000
+    python -m benchmarks.bench_streaming --url http://localhost:8000 --n 50
+
+Each query gets a unique suffix so the response cache does not answer it.
+"""
+import argparse
+import json
+import random
+import time
+import urllib.request
+
+from benchmarks.bench_batch_search import make_queries
+
+
+def post(url, body):
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode('utf-8'), headers={"Content-Type": "application/json"}, method="POST"
+    )
+    return urllib.request.urlopen(request)
+
+
+def time_buffered(base_url, query):
+    start = time.perf_counter()
+    with post(f"{base_url}/search/product_search", {"query": query}) as response:
+        response.read()
+    total = time.perf_counter() - start
+    # Nothing reaches the client before the full answer
+    return {"related_data": total, "first_token": total, "total": total}
+
+
+def time_streamed(base_url, query):
+    start = time.perf_counter()
+    timings = {}
+    with post(f"{base_url}/search/product_search_stream", {"query": query}) as response:
+        for line in response:
+            if not line.startswith(b"event: "):
+                continue
+            event = line[len(b"event: "):].strip().decode()
+            if event == "related_data":
+                timings.setdefault("related_data", time.perf_counter() - start)
+            elif event == "token":
+                timings.setdefault("first_token", time.perf_counter() - start)
+            elif event == "error":
+                raise RuntimeError(next(response).decode())
+    timings["total"] = time.perf_counter() - start
+    timings.setdefault("first_token", timings["total"])
+    return timings
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--n", type=int, default=50, help="queries per endpoint")
+    args = parser.parse_args()
+
+    run_id = random.randrange(1 << 30)
+    queries = [f"{query} #{run_id}-{i}" for i, query in enumerate(make_queries(args.n))]
+
+    # Warm up connections and the encoder before timing
+    time_streamed(args.url, f"warm-up #{run_id}")
+
+    results = {
+        "product_search": [time_buffered(args.url, f"{query} buffered") for query in queries],
+        "product_search_stream": [time_streamed(args.url, f"{query} streamed") for query in queries],
+    }
+
+    print(f"n={args.n} queries per endpoint, latencies in ms (p50 / p95)")
+    print(f"{'endpoint':<24}{'related_data':>18}{'first token':>18}{'total':>18}")
+    for endpoint, runs in results.items():
+        cells = [
+            f"{percentile([r[key] for r in runs], 50) * 1000:.0f} / {percentile([r[key] for r in runs], 95) * 1000:.0f}"
+            for key in ("related_data", "first_token", "total")
+        ]
+        print(f"{endpoint:<24}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,4 +15,84 @@ VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR')
 
 # Get the OpenAI API key from the environment
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4-mini")  # Default model name
\ No newline at end of file
+MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4-mini")  # Default model name
+
+# Sentence-transformer used to embed search queries (must match the model used to build the product index)
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+ENCODER_WARMUP = os.getenv("ENCODER_WARMUP", "true").lower() == "true"
+
+# Micro-batching of concurrent product_search queries into one encode + FAISS search call
+QUERY_BATCHING_ENABLED = os.getenv("QUERY_BATCHING_ENABLED", "true").lower() == "true"
+QUERY_BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", "5"))
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+
+# Bounded executors for blocking stages: CPU-bound (encode, search) and I/O-bound (db, llm)
+CPU_POOL_SIZE = int(os.getenv("CPU_POOL_SIZE", str(os.cpu_count() or 4)))
+IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "32"))
+ENCODE_CONCURRENCY = int(os.getenv("ENCODE_CONCURRENCY", str(CPU_POOL_SIZE)))
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", str(CPU_POOL_SIZE)))
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY", "16"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+
+# Shared PostgreSQL connection pool used by all routers
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "16"))
+DB_POOL_CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT", "5"))
+DB_POOL_HEALTHCHECK_IDLE_SECONDS = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE_SECONDS", "30"))
+
+# Read-through cache for customer/product lookups
+LOOKUP_CACHE_MAX_SIZE = int(os.getenv("LOOKUP_CACHE_MAX_SIZE", "20000"))
+LOOKUP_CACHE_TTL_SECONDS = float(os.getenv("LOOKUP_CACHE_TTL_SECONDS", "300"))
+LOOKUP_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("LOOKUP_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+PRODUCT_CACHE_PRELOAD = os.getenv("PRODUCT_CACHE_PRELOAD", "false").lower() == "true"
+
+# Default search-time knobs for approximate product indices (overridable per request)
+SEARCH_NPROBE = int(os.getenv("SEARCH_NPROBE", "16"))
+SEARCH_EF_SEARCH = int(os.getenv("SEARCH_EF_SEARCH", "64"))
+
+# Filtered searches matching at most this many rows are answered exactly over those rows'
+# vectors instead of through an approximate (IVF/HNSW) index
+FILTER_EXACT_SEARCH_MAX_ROWS = int(os.getenv("FILTER_EXACT_SEARCH_MAX_ROWS", "10000"))
+
+# Quantised (sq8/fp16) and approximate product indices return RERANK_CANDIDATES_FACTOR * k
+# candidates, re-ranked by exact distance against the memory-mapped float32 side-store
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+RERANK_CANDIDATES_FACTOR = int(os.getenv("RERANK_CANDIDATES_FACTOR", "4"))
+
+# Memory-map FAISS index files read-only so worker processes share them through the page cache
+INDEX_MMAP = os.getenv("INDEX_MMAP", "true").lower() == "true"
+
+# Shared secret for the /search/admin/* routes, sent as the X-Admin-Token header (unset disables them)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Poll VECTOR_STORE_DIR for builds the ingestion job marks complete and hot-swap them in (0 disables the watcher)
+INDEX_WATCH_INTERVAL_SECONDS = float(os.getenv("INDEX_WATCH_INTERVAL_SECONDS", "30"))
+
+# Upper bound on queries accepted by one /search/*_batch request
+BATCH_SEARCH_MAX_QUERIES = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "256"))
+
+# Layered product_search cache: full responses by normalised query, query embeddings,
+# and (optionally) responses reused for near-duplicate queries within a cosine distance
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "10000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+EMBEDDING_CACHE_MAX_SIZE = int(os.getenv("EMBEDDING_CACHE_MAX_SIZE", "50000"))
+EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+SIMILARITY_CACHE_ENABLED = os.getenv("SIMILARITY_CACHE_ENABLED", "false").lower() == "true"
+SIMILARITY_CACHE_MAX_SIZE = int(os.getenv("SIMILARITY_CACHE_MAX_SIZE", "2048"))
+SIMILARITY_CACHE_MAX_DISTANCE = float(os.getenv("SIMILARITY_CACHE_MAX_DISTANCE", "0.05"))
+
+# LLM used to generate answers: "openai" (model/load_model.py) or "stub" (local, no network)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
+# Pacing of the stub model's streamed tokens
+LLM_STUB_FIRST_TOKEN_MS = float(os.getenv("LLM_STUB_FIRST_TOKEN_MS", "300"))
+LLM_STUB_TOKEN_MS = float(os.getenv("LLM_STUB_TOKEN_MS", "20"))
+LLM_STUB_MAX_TOKENS = int(os.getenv("LLM_STUB_MAX_TOKENS", "100"))
+
+# Upper bound on the per-index candidate list of /search/hybrid_search before fusion
+HYBRID_SEARCH_MAX_CANDIDATES = int(os.getenv("HYBRID_SEARCH_MAX_CANDIDATES", "1000"))
+
+# Level of the API's loggers (DEBUG also logs query vectors, search hits and LLM context)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Send per-stage timings (encode, search, db, context, llm) as a Server-Timing response header
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
@@ -1,29 +1,62 @@
-from fastapi import APIRouter, HTTPException
+import logging
+
 import psycopg2
+from fastapi import APIRouter, HTTPException
+
+from config.config import LOOKUP_CACHE_MAX_SIZE, LOOKUP_CACHE_TTL_SECONDS, LOOKUP_CACHE_NEGATIVE_TTL_SECONDS
+from services.cache import TTLCache
+from services.db_pool import db_pool, PoolTimeoutError
 
-from config.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# customer_details and product_details are small, mostly static dimension tables
+customer_cache = TTLCache(LOOKUP_CACHE_MAX_SIZE, LOOKUP_CACHE_TTL_SECONDS, LOOKUP_CACHE_NEGATIVE_TTL_SECONDS, name="customers")
+product_cache = TTLCache(LOOKUP_CACHE_MAX_SIZE, LOOKUP_CACHE_TTL_SECONDS, LOOKUP_CACHE_NEGATIVE_TTL_SECONDS, name="products")
+
+
+def fetch_customer(customer_id):
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM customer_details WHERE customer_id = %s", (customer_id,))
+            return cursor.fetchone()
+
+def fetch_product(product_id):
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM product_details WHERE product_id = %s", (product_id,))
+            return cursor.fetchone()
+
+def preload_products():
+    """
+    Load the whole product table into the product cache; preloaded rows do not
+    expire until invalidated. Like the pool, a database that is not reachable
+    yet is not fatal: the cache starts cold and fills on demand.
+    """
+    try:
+        with db_pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT * FROM product_details")
+                rows = cursor.fetchall()
+    except (psycopg2.Error, PoolTimeoutError) as e:
+        logger.warning("Could not preload the product cache, starting cold: %s", e)
+        return
+    for row in rows:
+        product_cache.set(row[0], row, ttl=None)
+    logger.info("Preloaded %d products into the product cache", len(rows))
+
+# Invalidation hooks for writers of customer_details / product_details
+def invalidate_customer(customer_id):
+    customer_cache.invalidate(customer_id)
+
+def invalidate_product(product_id):
+    product_cache.invalidate(product_id)
 
-# Connect to PostgreSQL database
-def get_db_connection():
-    conn = psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASS,
-        host=DB_HOST,
-        port=DB_PORT
-    )
-    return conn
 
 @router.get("/customers/{customer_id}")
 def get_customer_details(customer_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM customer_details WHERE customer_id = %s", (customer_id,))
-    customer = cursor.fetchone()
-    conn.close()
+    customer = customer_cache.get_or_load(customer_id, fetch_customer)
 
     if customer:
         return {"customer": customer}
@@ -32,13 +65,39 @@ def get_customer_details(customer_id: int):
 
 @router.get("/products/{product_id}")
 def get_product_details(product_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM product_details WHERE product_id = %s", (product_id,))
-    product = cursor.fetchone()
-    conn.close()
+    product = product_cache.get_or_load(product_id, fetch_product)
 
     if product:
         return {"product": product}
     else:
         raise HTTPException(status_code=404, detail="Product not found")
+
+@router.delete("/cache/customers/{customer_id}")
+def delete_cached_customer(customer_id: int):
+    invalidate_customer(customer_id)
+    return {"invalidated": {"customer_id": customer_id}}
+
+@router.delete("/cache/products/{product_id}")
+def delete_cached_product(product_id: int):
+    invalidate_product(product_id)
+    return {"invalidated": {"product_id": product_id}}
+
+@router.delete("/cache")
+def clear_caches():
+    customer_cache.clear()
+    product_cache.clear()
+    return {"invalidated": "all"}
+
+@router.get("/cache_stats")
+def get_cache_stats():
+    """
+    Hit/miss/eviction counters of the customer and product lookup caches.
+    """
+    return {"customers": customer_cache.stats(), "products": product_cache.stats()}
+
+@router.get("/pool_stats")
+def get_pool_stats():
+    """
+    Utilisation and checkout metrics of the shared database connection pool.
+    """
+    return db_pool.stats()
@@ -1,157 +1,747 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+import asyncio
+import functools
+import hmac
+import json
+import logging
+import threading
+import time
+from datetime import datetime
 import faiss
 import numpy as np
-import os
-from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
-from config.config import VECTOR_STORE_DIR
-from model.load_model import ModelLoader
-import psycopg2
+from typing import Dict, List, Optional
+from pydantic import BaseModel, validator
+from config.config import (
+    QUERY_BATCHING_ENABLED, BATCH_SEARCH_MAX_QUERIES, FILTER_EXACT_SEARCH_MAX_ROWS, HYBRID_SEARCH_MAX_CANDIDATES,
+    RERANK_ENABLED, RERANK_CANDIDATES_FACTOR, ADMIN_TOKEN
+)
+from model import get_model_loader
+from services.batching import QueryBatcher
+from services.encoder import query_encoder
+from services.db_pool import db_pool, PoolTimeoutError
+from services.executors import stage_executor
+from services.fusion import fuse_results, FUSION_METHODS
+from services.index_store import index_registry, current_rss_bytes
+from services.metrics import span, request_timings_ms
+from services.search_params import make_search_params, widened_search_params, is_exact
+from services.semantic_cache import semantic_cache, normalize_query
 
-from config.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+
+class SearchFilters(BaseModel):
+    """
+    Metadata constraints applied inside the FAISS search: the top k are taken
+    among the matching rows only. Dates are [date_from, date_to); prices are
+    unit prices, inclusive.
+    """
+    category: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    def is_empty(self):
+        return not any(value is not None for value in self.dict().values())
 
 
 class InferenceRequest(BaseModel):
     query: str
+    # Recall/latency knobs for approximate product indices (IVF: nprobe, HNSW: ef_search)
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+    filters: Optional[SearchFilters] = None
 
 
+class BatchInferenceRequest(BaseModel):
+    queries: List[str]
+    k: int = 5
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+    # Also generate an LLM answer per query (one model call each)
+    generate_responses: bool = False
+    filters: Optional[SearchFilters] = None
 
-router = APIRouter()
 
-# Initialize the model loader
-model_loader = ModelLoader()
+class BatchVectorRequest(BaseModel):
+    query_vectors: List[list]
+    k: int = 5
+    normalized: bool = False
+    filters: Optional[SearchFilters] = None
+
 
-product_index_file = os.path.join(VECTOR_STORE_DIR, 'faiss_product_index.bin')
-financial_index_file = os.path.join(VECTOR_STORE_DIR, 'faiss_financial_index.bin')
-time_index_file = os.path.join(VECTOR_STORE_DIR, 'faiss_time_index.bin')
+class HybridSearchRequest(BaseModel):
+    # Any combination of a text query and financial/time targets (raw values unless normalized)
+    query: Optional[str] = None
+    financial: Optional[list] = None
+    time: Optional[list] = None
+    normalized: bool = False
+    k: int = 5
+    # Candidates taken from each index before fusion
+    candidates: int = 50
+    fusion: str = "rrf"
+    # Per-source weights (product, financial, time); missing sources weigh 1
+    weights: Optional[Dict[str, float]] = None
+    rrf_k: int = 60
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+    filters: Optional[SearchFilters] = None
 
-product_index = None
-financial_index = None
-time_index = None
+    @validator("fusion")
+    def check_fusion(cls, value):
+        if value not in FUSION_METHODS:
+            raise ValueError(f"must be one of {', '.join(FUSION_METHODS)}")
+        return value
+
+
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
 
-def load_indices():
-    global product_index, financial_index, time_index
-    if os.path.exists(product_index_file):
-        product_index = faiss.read_index(product_index_file)
-    if os.path.exists(financial_index_file):
-        financial_index = faiss.read_index(financial_index_file)
-    if os.path.exists(time_index_file):
-        time_index = faiss.read_index(time_index_file)
+# Initialize the model loader for the configured LLM_BACKEND
+model_loader = get_model_loader()
 
 
-def retrieve_similar_data_from_product_index(query_vector: list, k: int = 5):
+def retrieve_similar_data_from_product_index(query_vector: list, k: int = 5, nprobe: int = None, ef_search: int = None,
+                                             filters: SearchFilters = None):
     """
     Retrieve data similar to the query vector from the vector store.
     """
-    if product_index is None:
-        raise HTTPException(status_code=500, detail="FAISS product index not loaded")
-
-    print(f"query_vector={query_vector}")
+    logger.debug("query_vector=%s", query_vector)
 
     # Perform a search in the vector store
     # distances, indices = product_index.search(np.array([query_vector], dtype='float32'), k)
-    distances, indices = product_index.search(np.array(query_vector, dtype='float32'), k)
-    print(f"distances={distances}")
-    print(f"indices={indices}")
+    distances, indices = search_product_index(query_vector, k, nprobe, ef_search, filters)
+    logger.debug("distances=%s indices=%s", distances, indices)
     
-    # Retrieve and return the matched items (e.g., product descriptions)
-    # In practice, one would map these indices back to actual product data from a database
+    # The returned indices are transaction IDs from the index ID map
     return {"indices": indices[0].tolist(), "distances": distances[0].tolist()}
 
 
-load_indices()
+def search_product_index(query_vectors, k=5, nprobe=None, ef_search=None, filters=None):
+    """
+    One FAISS search over an (n, d) matrix of query embeddings; rows come back in query order.
+    """
+    with index_registry.acquire() as indices:
+        product_index = indices.product if indices is not None else None
+        if product_index is None:
+            raise HTTPException(status_code=500, detail="FAISS product index not loaded")
 
-# Connect to PostgreSQL database
-def get_db_connection():
-    conn = psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASS,
-        host=DB_HOST,
-        port=DB_PORT
-    )
-    return conn
-
-# Function to retrieve product details from PostgreSQL using the indices
-def get_product_details(indices):
-    # Convert indices to a tuple for SQL IN clause
-    index_tuple = tuple(indices)
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT product_category, product_description, quantity, unit_price, price, discount_applied
-        FROM retail_transactions
-        WHERE invoice_id IN %s
-        """,
-        (index_tuple,)
-    )
-    return cursor.fetchall()
+        return search_index(
+            indices, product_index, query_vectors, k, nprobe, ef_search, filters, store=indices.product_vectors
+        )
 
-@router.post("/product_search")
-async def search_product(request: InferenceRequest):
-    try:
-        query = request.query
-        print(f"{query}")
 
-        # Encode the query to a vector using the OpenAI API (or use a simple tokenizer if available)
-        # query_embedding = model_loader.generate_response(query, max_tokens=100).encode('utf-8')[:384]
-        # query_embedding = model_loader.generate_response(query, max_tokens=100).encode([query], convert_to_numpy=True)
-        # Initialize the model for text embeddings
-        model_name = 'all-MiniLM-L6-v2'  # Lightweight model for embedding generation
-        model = SentenceTransformer(model_name)
-        query_embedding = model.encode([query], convert_to_numpy=True)  # Convert to NumPy array
-        print(f"query_embedding={query_embedding}")
+def search_index(indices, index, query_vectors, k, nprobe=None, ef_search=None, filters=None, store=None):
+    """
+    Search one index of a pinned IndexSet, restricted to the rows matching filters.
+    Selective filters on inexact indices are answered exactly over the matching
+    rows; otherwise a filtered search that returns fewer than k hits while more
+    rows match is repeated with wider parameters, so constrained queries get a
+    full k. Given the float32 side-store, quantised and approximate indices
+    fetch RERANK_CANDIDATES_FACTOR * k candidates and re-rank them exactly.
+    """
+    query_vectors = np.ascontiguousarray(query_vectors, dtype='float32')
+    rerank = store is not None and RERANK_ENABLED and not is_exact(index)
+    candidates = k * RERANK_CANDIDATES_FACTOR if rerank else k
+
+    if filters is None or filters.is_empty():
+        distances, ids = index.search(query_vectors, candidates, params=make_search_params(index, nprobe, ef_search))
+    else:
+        if indices.metadata is None:
+            raise HTTPException(
+                status_code=500, detail="No metadata column store stored with the index; rebuild it to use filters"
+            )
+        id_filter = indices.metadata.id_filter(**filters.dict())
+        if not is_exact(index) and id_filter.count <= FILTER_EXACT_SEARCH_MAX_ROWS:
+            exact = exact_search_subset(index, query_vectors, k, id_filter.ids, store)
+            if exact is not None:
+                return exact
+
+        distances, ids = index.search(
+            query_vectors, candidates, params=make_search_params(index, nprobe, ef_search, id_filter.selector)
+        )
+        short = (ids != -1).sum(axis=1) < min(candidates, id_filter.count)
+        wider = widened_search_params(index, candidates, nprobe, ef_search, id_filter.selector) if short.any() else None
+        if wider is not None:
+            distances[short], ids[short] = index.search(query_vectors[short], candidates, params=wider)
+
+    if rerank:
+        return rerank_exact(store, query_vectors, distances, ids, k)
+    return distances, ids
+
+
+def rerank_exact(store, query_vectors, distances, ids, k):
+    """
+    Re-order each query's candidates by exact squared L2 distance to their
+    float32 vectors in the memory-mapped side-store and keep the best k.
+    Candidates missing from the side-store keep their index distance.
+    """
+    n, candidates = ids.shape
+    vectors, found = store.vectors_for_ids(ids.reshape(-1))
+    found = found.reshape(n, candidates) & (ids != -1)
+    diffs = vectors.reshape(n, candidates, -1) - query_vectors[:, None, :]
+    exact = np.einsum('ncd,ncd->nc', diffs, diffs)
+    distances = np.where(found, exact, distances)
+
+    order = np.argsort(distances, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(distances, order, axis=1).astype('float32'), np.take_along_axis(ids, order, axis=1)
+
+
+def exact_search_subset(index, query_vectors, k, ids, store=None):
+    """
+    Brute-force k-NN over the vectors of the given row IDs, padded like a FAISS
+    result. Vectors come from the float32 side-store when given, otherwise from
+    the index; None when the index cannot reconstruct them (e.g. IVF-PQ).
+    """
+    if store is not None:
+        vectors, found = store.vectors_for_ids(ids)
+        ids, vectors = ids[found], vectors[found]
+    else:
+        try:
+            vectors = index.reconstruct_batch(ids) if len(ids) else np.zeros((0, index.d), dtype='float32')
+        except RuntimeError:
+            return None
+    distances = np.full((len(query_vectors), k), np.finfo('float32').max, dtype='float32')
+    result_ids = np.full((len(query_vectors), k), -1, dtype='int64')
+    found = min(k, len(ids))
+    if found:
+        subset_distances, positions = faiss.knn(query_vectors, vectors, found)
+        distances[:, :found] = subset_distances
+        result_ids[:, :found] = ids[positions]
+    return distances, result_ids
+
+
+# Coalesces concurrent product queries into one encode + search call
+query_batcher = QueryBatcher(query_encoder, search_product_index)
+
+# Function to retrieve transaction rows from PostgreSQL for the FAISS result IDs
+def get_product_details(ids):
+    """
+    Hydrate FAISS result IDs (retail_transactions.transaction_id) with one
+    primary-key lookup, returning rows in the same rank order as the IDs.
+    """
+    # FAISS pads missing neighbours with -1
+    ids = [int(i) for i in ids if i != -1]
+    rows_by_id = fetch_transactions_by_id(ids)
+    return [rows_by_id[i] for i in ids if i in rows_by_id]
+
+def fetch_transactions_by_id(ids):
+    """
+    Transaction rows for a set of IDs, keyed by transaction_id, in one round trip.
+    """
+    if not ids:
+        return {}
+
+    with db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT transaction_id, product_category, product_description, quantity, unit_price, price, discount_applied
+                FROM retail_transactions
+                WHERE transaction_id = ANY(%s)
+                """,
+                (ids,)
+            )
+            return {row[0]: row for row in cursor.fetchall()}
+
+def format_product_row(row, distance):
+    return {
+        "transaction_id": row[0],
+        "product_category": row[1],
+        "product_description": row[2],
+        "quantity_sold": row[3],
+        "unit_price": row[4],
+        "total_price": row[5],
+        "discount_applied": row[6],
+        "distance": distance  # Include the distance for context
+    }
+
+def check_batch_size(n):
+    if n == 0:
+        raise HTTPException(status_code=422, detail="At least one query is required")
+    if n > BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_SEARCH_MAX_QUERIES} queries per batch")
+
+async def find_similar_products(request: InferenceRequest, query_embedding=None):
+    """
+    Encode the query (unless its embedding is already known) and search the
+    product index; returns (query_embedding, {"indices", "distances"}).
+    """
+    # Encode the query to a vector using the OpenAI API (or use a simple tokenizer if available)
+    # query_embedding = model_loader.generate_response(query, max_tokens=100).encode('utf-8')[:384]
+    # query_embedding = model_loader.generate_response(query, max_tokens=100).encode([query], convert_to_numpy=True)
+    # Requests with their own search parameters cannot share a batched search call
+    custom_params = request.nprobe is not None or request.ef_search is not None or request.filters is not None
+    if query_embedding is not None:
+        # Known query text: skip the encoder and search with the cached embedding
+        similar_data = await stage_executor.run(
+            "search", retrieve_similar_data_from_product_index, query_embedding, 5, request.nprobe, request.ef_search,
+            request.filters
+        )
+    elif QUERY_BATCHING_ENABLED and not custom_params:
+        # Encode and search together with other queries arriving in the same window
+        query_embedding, distances, indices = await query_batcher.submit(request.query, k=5)
+        similar_data = {"indices": indices.tolist(), "distances": distances.tolist()}
+    else:
+        # Encode with the process-wide model loaded at startup
+        query_embedding = await stage_executor.run("encode", query_encoder.encode, [request.query])
+        logger.debug("query_embedding=%s", query_embedding)
 
         # Retrieve similar data from the vector store
-        similar_data = retrieve_similar_data_from_product_index(query_embedding, k=5)
-        print(f"similar_data={similar_data}")
+        similar_data = await stage_executor.run(
+            "search", retrieve_similar_data_from_product_index, query_embedding, 5, request.nprobe, request.ef_search,
+            request.filters
+        )
+    logger.debug("similar_data=%s", similar_data)
+    return query_embedding, similar_data
 
-        # Retrieve product details based on the indices
-        product_details = get_product_details(similar_data['indices'])
+
+async def build_product_context(similar_data):
+    """
+    Hydrate the search hits from PostgreSQL and render them as LLM context.
+    """
+    # Retrieve product details based on the indices (transaction IDs)
+    product_details = await stage_executor.run("db", get_product_details, similar_data['indices'])
+    with span("context"):
+        distances_by_id = dict(zip(similar_data['indices'], similar_data['distances']))
 
         # Format the results for better readability
-        results = [
-            {
-                "product_category": row[0],
-                "product_description": row[1],
-                "quantity_sold": row[2],
-                "unit_price": row[3],
-                "total_price": row[4],
-                "discount_applied": row[5],
-                "distance": similar_data['distances'][i]  # Include the distance for context
-            }
-            for i, row in enumerate(product_details)
-        ]
-        
+        results = [format_product_row(row, distances_by_id[row[0]]) for row in product_details]
 
         # Create a context from the similar data (for simplicity, use placeholder text)
         context = " ".join([f"Related data point {result}" for result in results])
-        print(f"context={context}")
+    logger.debug("context=%s", context)
+    return context
+
+
+def search_scope(request):
+    # Answers are only shared between requests with the same search parameters and filters
+    filters = request.filters.json() if request.filters is not None else None
+    return request.nprobe, request.ef_search, filters
+
+
+@router.post("/product_search")
+async def search_product(request: InferenceRequest):
+    try:
+        query = request.query
+        logger.debug("query=%s", query)
+
+        # Exact repeat of a normalised query with the same search parameters
+        cache_key = normalize_query(query)
+        cache_scope = search_scope(request)
+        cached = semantic_cache.get_response(cache_key, cache_scope)
+        if cached is not None:
+            return cached
+
+        query_embedding, similar_data = await find_similar_products(request, semantic_cache.get_embedding(cache_key))
+
+        # A near-duplicate query answered earlier against the same index
+        cached = semantic_cache.get_similar_response(query_embedding, cache_scope)
+        if cached is not None:
+            semantic_cache.store(cache_key, cache_scope, query_embedding, cached)
+            return cached
+
+        context = await build_product_context(similar_data)
 
         # Generate a response using the OpenAI API with the retrieved context
-        response = model_loader.generate_response(query, context=context)
-        print(f"response={response}")
+        response = await stage_executor.run("llm", model_loader.generate_response, query, context=context)
+        logger.debug("response=%s", response)
 
-        return {"response": response, "related_data": similar_data}
+        result = {"response": response, "related_data": similar_data}
+        semantic_cache.store(cache_key, cache_scope, query_embedding, result)
+        return result
+    except (PoolTimeoutError, HTTPException):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/financial_search")
-def search_financial(query_vector: list, k: int = 5):
-    if not financial_index:
-        raise HTTPException(status_code=500, detail="Financial FAISS index not loaded")
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def pump_tokens(query, context, put, stop):
+    """
+    Run the model's token stream on an llm-stage thread, handing each token to
+    put(); loaders without stream_response send the whole answer as one chunk.
+    """
+    stream_response = getattr(model_loader, "stream_response", None)
+    if stream_response is None:
+        put(model_loader.generate_response(query, context=context))
+        return
+    for token in stream_response(query, context=context):
+        if stop.is_set():
+            break
+        put(token)
+
+
+async def retrieve_for_stream(request: InferenceRequest):
+    """
+    Cache lookup and FAISS retrieval of a streamed answer. Run before the
+    response starts, so their errors keep their HTTP status.
+    """
+    cache_key = normalize_query(request.query)
+    cache_scope = search_scope(request)
+    query_embedding = similar_data = None
+    cached = semantic_cache.get_response(cache_key, cache_scope)
+    if cached is None:
+        query_embedding, similar_data = await find_similar_products(request, semantic_cache.get_embedding(cache_key))
+        cached = semantic_cache.get_similar_response(query_embedding, cache_scope)
+        if cached is not None:
+            semantic_cache.store(cache_key, cache_scope, query_embedding, cached)
+    return cache_key, cache_scope, cached, query_embedding, similar_data
+
+
+async def stream_product_answer(request: InferenceRequest, start, retrieved):
+    query = request.query
+    cache_key, cache_scope, cached, query_embedding, similar_data = retrieved
+    if cached is not None:
+        yield sse_event("related_data", cached["related_data"])
+        yield sse_event("token", {"token": cached["response"]})
+        yield sse_event("done", {"cached": True, "total_ms": (time.perf_counter() - start) * 1000.0})
+        return
+
+    # Hits go out before hydration and generation start
+    retrieval_ms = (time.perf_counter() - start) * 1000.0
+    yield sse_event("related_data", similar_data)
+    context = await build_product_context(similar_data)
+
+    loop = asyncio.get_running_loop()
+    tokens = asyncio.Queue()
+    stop = threading.Event()
+    end_of_stream = object()
+
+    def put(token):
+        loop.call_soon_threadsafe(tokens.put_nowait, token)
+
+    producer = asyncio.ensure_future(stage_executor.run("llm", pump_tokens, query, context, put, stop))
+    producer.add_done_callback(lambda _: tokens.put_nowait(end_of_stream))
+
+    chunks = []
+    first_token_ms = None
+    try:
+        while True:
+            token = await tokens.get()
+            if token is end_of_stream:
+                break
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000.0
+            chunks.append(token)
+            yield sse_event("token", {"token": token})
+        # Re-raises a model error
+        await producer
+    finally:
+        # Client went away (or the model failed): stop generating
+        stop.set()
+
+    response = "".join(chunks)
+    semantic_cache.store(cache_key, cache_scope, query_embedding, {"response": response, "related_data": similar_data})
+    yield sse_event("done", {
+        "cached": False,
+        "retrieval_ms": retrieval_ms,
+        "first_token_ms": first_token_ms,
+        "total_ms": (time.perf_counter() - start) * 1000.0,
+        "tokens": len(chunks),
+        # Per-stage breakdown; the Server-Timing header went out before hydration and generation ran
+        "timings_ms": request_timings_ms(),
+    })
+
+
+async def with_error_event(events):
+    try:
+        async for event in events:
+            yield event
+    except Exception as e:
+        # Headers are already sent, so hydration and generation errors are reported in-band
+        yield sse_event("error", {"detail": str(e)})
+
+
+@router.post("/product_search_stream")
+async def search_product_stream(request: InferenceRequest):
+    """
+    Server-sent events variant of /product_search: a related_data event as soon
+    as the FAISS hits are known, then one token event per generated chunk, then
+    a done event with retrieval, time-to-first-token, total and per-stage latency in ms.
+    Retrieval errors are returned with their status code before the stream starts.
+    """
+    start = time.perf_counter()
+    try:
+        retrieved = await retrieve_for_stream(request)
+    except (PoolTimeoutError, HTTPException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        with_error_event(stream_product_answer(request, start, retrieved)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
-    query_embedding = np.array([query_vector], dtype='float32')
-    distances, indices = financial_index.search(query_embedding, k)
-    return {"distances": distances[0].tolist(), "indices": indices[0].tolist()}
+@router.post("/product_search_batch")
+async def search_product_batch(request: BatchInferenceRequest):
+    """
+    Retrieve similar transactions for N queries with one encode call, one (N, d)
+    FAISS search and one SQL round trip; results are returned in request order.
+    """
+    check_batch_size(len(request.queries))
+    try:
+        embeddings = await stage_executor.run("encode", query_encoder.encode, request.queries)
+        distances, indices = await stage_executor.run(
+            "search", search_product_index, embeddings, request.k, request.nprobe, request.ef_search, request.filters
+        )
+        # Neighbours shared between queries are fetched once
+        unique_ids = [int(i) for i in np.unique(indices) if i != -1]
+        rows_by_id = await stage_executor.run("db", fetch_transactions_by_id, unique_ids)
+
+        results = []
+        for query, row_ids, row_distances in zip(request.queries, indices.tolist(), distances.tolist()):
+            results.append({
+                "query": query,
+                "results": [
+                    format_product_row(rows_by_id[i], distance)
+                    for i, distance in zip(row_ids, row_distances) if i in rows_by_id
+                ],
+            })
+
+        if request.generate_responses:
+            responses = await asyncio.gather(*(
+                stage_executor.run(
+                    "llm", model_loader.generate_response, result["query"],
+                    context=" ".join(f"Related data point {row}" for row in result["results"])
+                )
+                for result in results
+            ))
+            for result, response in zip(results, responses):
+                result["response"] = response
+
+        return {"results": results}
+    except (PoolTimeoutError, HTTPException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def search_numeric_index(name, query_vectors, k, normalized, filters=None):
+    """
+    Search the financial or time index with an (n, d) batch of queries. Raw business
+    values are standardised with the scaler stored alongside the index, unless the
+    caller sends normalized vectors.
+    """
+    with index_registry.acquire() as indices:
+        index = getattr(indices, name) if indices is not None else None
+        if index is None:
+            raise HTTPException(status_code=500, detail=f"{name.capitalize()} FAISS index not loaded")
+
+        scaler = indices.scalers.get(name)
+        if not normalized and scaler is None:
+            raise HTTPException(
+                status_code=500, detail=f"No {name} feature scaler stored with the index; send a normalized vector"
+            )
+        try:
+            if normalized:
+                query_embeddings = np.array(query_vectors, dtype='float32')
+            else:
+                query_embeddings = np.vstack([scaler.transform(query_vector) for query_vector in query_vectors])
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if query_embeddings.ndim != 2 or query_embeddings.shape[1] != index.d:
+            raise HTTPException(status_code=422, detail=f"Expected {index.d}-dimensional {name} query vectors")
+        return search_index(indices, index, query_embeddings, k, filters=filters)
+
+@router.post("/financial_search")
+def search_financial(query_vector: list, k: int = 5, normalized: bool = False, filters: SearchFilters = Depends()):
+    """
+    query_vector: raw [quantity, unit_price, price, discount_applied].
+    """
+    with span("search"):
+        distances, ids = search_numeric_index("financial", [query_vector], k, normalized, filters)
+    return {"distances": distances[0].tolist(), "indices": ids[0].tolist()}
 
 @router.post("/time_search")
-def search_time(query_vector: list, k: int = 5):
-    if not time_index:
-        raise HTTPException(status_code=500, detail="Time FAISS index not loaded")
+def search_time(query_vector: list, k: int = 5, normalized: bool = False, filters: SearchFilters = Depends()):
+    """
+    query_vector: [transaction_date] as epoch seconds or an ISO-8601 timestamp.
+    """
+    with span("search"):
+        distances, ids = search_numeric_index("time", [query_vector], k, normalized, filters)
+    return {"distances": distances[0].tolist(), "indices": ids[0].tolist()}
+
+def batch_numeric_search(name, request):
+    check_batch_size(len(request.query_vectors))
+    with span("search"):
+        distances, ids = search_numeric_index(name, request.query_vectors, request.k, request.normalized, request.filters)
+    return {
+        "results": [
+            {"distances": row_distances, "indices": row_ids}
+            for row_distances, row_ids in zip(distances.tolist(), ids.tolist())
+        ]
+    }
+
+@router.post("/financial_search_batch")
+def search_financial_batch(request: BatchVectorRequest):
+    """
+    N financial queries in one (N, 4) search; results in request order.
+    """
+    return batch_numeric_search("financial", request)
+
+@router.post("/time_search_batch")
+def search_time_batch(request: BatchVectorRequest):
+    """
+    N time queries in one (N, 1) search; results in request order.
+    """
+    return batch_numeric_search("time", request)
+
+
+def timed(func, *args):
+    """
+    Run func and return (its result, milliseconds spent in it on the worker thread).
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000.0
+
 
-    query_embedding = np.array([query_vector], dtype='float32')
-    distances, indices = time_index.search(query_embedding, k)
-    return {"distances": distances[0].tolist(), "indices": indices[0].tolist()}
+@router.post("/hybrid_search")
+async def search_hybrid(request: HybridSearchRequest):
+    """
+    Search the product index with the text query and the financial and time
+    indices with their targets in parallel, then fuse the candidate lists over
+    their shared transaction IDs (reciprocal-rank fusion or weighted similarity).
+    Each result carries its fused score and the rank/distance it had in every
+    sub-search; timings_ms reports each sub-search and the fusion step.
+    """
+    targets = {"financial": request.financial, "time": request.time}
+    sources = (["product"] if request.query is not None else []) + [name for name, target in targets.items() if target is not None]
+    if not sources:
+        raise HTTPException(status_code=422, detail="Give a query, a financial target, a time target or any combination")
+    if not 1 <= request.k <= request.candidates <= HYBRID_SEARCH_MAX_CANDIDATES:
+        raise HTTPException(status_code=422, detail=f"Need 1 <= k <= candidates <= {HYBRID_SEARCH_MAX_CANDIDATES}")
+    unknown = set(request.weights or {}) - {"product", "financial", "time"}
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown weight sources: {', '.join(sorted(unknown))}")
+
+    try:
+        start = time.perf_counter()
+        timings = {}
+
+        async def product_search():
+            cache_key = normalize_query(request.query)
+            query_embedding = semantic_cache.get_embedding(cache_key)
+            if query_embedding is None:
+                query_embedding, timings["encode"] = await stage_executor.run(
+                    "encode", timed, query_encoder.encode, [request.query]
+                )
+                semantic_cache.store_embedding(cache_key, query_embedding)
+            return await stage_executor.run(
+                "search", timed, search_product_index, query_embedding, request.candidates,
+                request.nprobe, request.ef_search, request.filters
+            )
+
+        async def numeric_search(name):
+            return await stage_executor.run(
+                "search", timed, search_numeric_index, name, [targets[name]], request.candidates,
+                request.normalized, request.filters
+            )
+
+        searches = [product_search() if name == "product" else numeric_search(name) for name in sources]
+        results = {}
+        for name, ((distances, ids), elapsed_ms) in zip(sources, await asyncio.gather(*searches)):
+            results[name] = (distances[0], ids[0])
+            timings[name] = elapsed_ms
+        timings["search_wall"] = (time.perf_counter() - start) * 1000.0
+
+        fusion_start = time.perf_counter()
+        ids, scores, ranks, distances = fuse_results(
+            results, request.k, method=request.fusion, weights=request.weights, rrf_k=request.rrf_k
+        )
+        timings["fusion"] = (time.perf_counter() - fusion_start) * 1000.0
+
+        db_start = time.perf_counter()
+        rows_by_id = await stage_executor.run("db", fetch_transactions_by_id, ids.tolist())
+        timings["db"] = (time.perf_counter() - db_start) * 1000.0
+
+        fused = []
+        for row_id, score, row_ranks, row_distances in zip(ids.tolist(), scores.tolist(), ranks.tolist(), distances.tolist()):
+            if row_id not in rows_by_id:
+                continue
+            result = format_product_row(rows_by_id[row_id], None)
+            del result["distance"]
+            result["score"] = score
+            result["sources"] = {
+                name: {"rank": rank, "distance": distance} if rank != -1 else None
+                for name, rank, distance in zip(sources, row_ranks, row_distances)
+            }
+            fused.append(result)
+        timings["total"] = (time.perf_counter() - start) * 1000.0
+
+        return {"fusion": request.fusion, "sources": sources, "results": fused, "timings_ms": timings}
+    except (PoolTimeoutError, HTTPException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/encoder_stats")
+def get_encoder_stats():
+    """
+    Cold (load/warm-up) and warm (per-encode) timings of the shared query encoder.
+    """
+    return query_encoder.stats()
+
+
+@router.get("/batching_stats")
+def get_batching_stats():
+    """
+    Batch sizes and timings of the product query micro-batcher.
+    """
+    return {"enabled": QUERY_BATCHING_ENABLED, **query_batcher.stats()}
+
+
+@router.get("/cache_stats")
+def get_cache_stats():
+    """
+    Size, hit ratio and evictions of each product_search cache layer.
+    """
+    return semantic_cache.stats()
+
+
+@router.get("/executor_stats")
+def get_executor_stats():
+    """
+    Pool sizes and per-stage concurrency of the blocking-stage executors.
+    """
+    return stage_executor.stats()
+
+
+@router.get("/index_stats")
+def get_index_stats():
+    """
+    Live index version, its load time and mmap status, and the RSS of this worker process.
+    """
+    return {**index_registry.stats(), "rss_now_mb": current_rss_bytes() / 2 ** 20}
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # Admin routes do not exist unless ADMIN_TOKEN is configured
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.post("/admin/reload_indices", dependencies=[Depends(require_admin)])
+async def reload_indices():
+    """
+    Reload the indices of the live vector store directory in the background and
+    swap them in; searches already running finish on the previous version. Only
+    a build the ingestion job has marked complete is loaded.
+    """
+    try:
+        version = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(index_registry.reload, require_complete=True)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Index reload failed: {e}")
+    return {"version": version.version, "directory": version.indices.directory, "load": version.indices.load_stats}
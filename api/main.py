@@ -1,13 +1,56 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 # from endpoints.data_queries import router as data_queries_router
 # from endpoints.semantic_search import router as semantic_search_router
+from config.config import PRODUCT_CACHE_PRELOAD, INDEX_WATCH_INTERVAL_SECONDS, LOG_LEVEL
 from endpoints import data_queries_router, semantic_search_router
+from endpoints.data_queries import preload_products
+from services.db_pool import db_pool, PoolTimeoutError
+from services.encoder import query_encoder
+from services.executors import stage_executor
+from services.index_store import index_registry, watch_index_directory
+from services.metrics import TimingMiddleware, render_metrics
+from services.semantic_cache import semantic_cache
+
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the query encoder once per worker process before serving traffic
+    query_encoder.load()
+    # Cached answers are only valid for the index version that produced them
+    index_registry.add_swap_listener(semantic_cache.on_index_swap)
+    index_registry.reload()
+    stage_executor.start()
+    db_pool.open()
+    if PRODUCT_CACHE_PRELOAD:
+        preload_products()
+    watcher = asyncio.create_task(watch_index_directory(index_registry)) if INDEX_WATCH_INTERVAL_SECONDS > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    stage_executor.shutdown()
+    db_pool.close()
+
 
 app = FastAPI(
     title="Retail RAG API",
     description="API for handling structured data queries and vector-based searches for the Retail RAG application.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+# Per-stage Server-Timing header and request latency histograms
+app.add_middleware(TimingMiddleware)
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # Pool exhausted: ask the client to retry rather than reporting a server fault
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 # Include routers
 app.include_router(data_queries_router, prefix="/data")
@@ -16,3 +59,10 @@ app.include_router(semantic_search_router, prefix="/search")
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Retail RAG API"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Stage and request latency histograms in the Prometheus text format.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
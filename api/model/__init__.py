@@ -1 +1,16 @@
-# from .load_model import ModelLoader
\ No newline at end of file
+# from .load_model import ModelLoader
+from config.config import LLM_BACKEND
+
+
+def get_model_loader(backend=LLM_BACKEND):
+    """
+    ModelLoader for the configured LLM backend: "openai" (model/load_model.py)
+    or "stub" (local, deterministic, for offline testing and benchmarks).
+    """
+    if backend == "stub":
+        from .stub_model import StubModelLoader
+        return StubModelLoader()
+    if backend == "openai":
+        from .load_model import ModelLoader
+        return ModelLoader()
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
@@ -0,0 +1,43 @@
+import re
+import time
+
+from config.config import LLM_STUB_FIRST_TOKEN_MS, LLM_STUB_TOKEN_MS, LLM_STUB_MAX_TOKENS
+
+
+class StubModelLoader:
+    """
+    Local stand-in for ModelLoader: builds a deterministic answer from the query
+    and the retrieved context, and paces its tokens like a remote model (a delay
+    before the first token, then a fixed delay per token). No network, no API key,
+    so time-to-first-token and total latency can be measured offline.
+    """
+
+    def __init__(self, first_token_ms=LLM_STUB_FIRST_TOKEN_MS, token_ms=LLM_STUB_TOKEN_MS, max_tokens=LLM_STUB_MAX_TOKENS):
+        self.first_token_seconds = first_token_ms / 1000.0
+        self.token_seconds = token_ms / 1000.0
+        self.max_tokens = max_tokens
+
+    def _tokens(self, query, context, max_tokens):
+        data_points = (context or "").count("Related data point")
+        categories = sorted(set(re.findall(r"'product_category': '([^']*)'", context or "")))
+        text = (
+            f"Based on {data_points} related transactions"
+            + (f" in {', '.join(categories)}" if categories else "")
+            + f", here is what the data says about \"{query}\": "
+            + " ".join(re.findall(r"'product_description': '([^']*)'", context or ""))
+        )
+        tokens = re.findall(r"\S+\s*", text)
+        return tokens[:max_tokens or self.max_tokens]
+
+    def stream_response(self, query, context=None, max_tokens=None):
+        """
+        Yield the answer token by token.
+        """
+        time.sleep(self.first_token_seconds)
+        for i, token in enumerate(self._tokens(query, context, max_tokens)):
+            if i:
+                time.sleep(self.token_seconds)
+            yield token
+
+    def generate_response(self, query, context=None, max_tokens=None):
+        return "".join(self.stream_response(query, context=context, max_tokens=max_tokens))
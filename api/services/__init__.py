@@ -0,0 +1 @@
+# Process-wide components shared by the endpoint routers (created in the app lifespan)
@@ -0,0 +1,97 @@
+import asyncio
+import contextvars
+import time
+
+from config.config import QUERY_BATCH_WINDOW_MS, QUERY_BATCH_MAX_SIZE
+from services.executors import stage_executor
+from services.metrics import add_request_timing
+
+
+class QueryBatcher:
+    """
+    Coalesces product queries that arrive within a short window into a single
+    encode call and a single (n, d) FAISS search, then fans the rows back out
+    to the waiting requests. Encoding and searching run on the CPU stage pool;
+    each request is charged the encode and search time of the batch it rode in.
+    """
+
+    def __init__(self, encoder, search, window_ms=QUERY_BATCH_WINDOW_MS, max_batch_size=QUERY_BATCH_MAX_SIZE):
+        self.encoder = encoder
+        # search(embeddings, k) -> (distances, ids) over the live product index (pinning, re-ranking, ...)
+        self.search = search
+        self.window_seconds = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.batched_queries = 0
+        self.largest_batch = 0
+        self.batch_seconds_total = 0.0
+
+    async def submit(self, query, k=5):
+        """
+        Queue a query and wait for its (embedding, distances, indices) result.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, k, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        embedding, distances, indices, timings = await future
+        for stage, seconds in timings.items():
+            add_request_timing(stage, seconds)
+        return embedding, distances, indices
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            # A fresh context, so the batch's stage calls are not charged to whichever request opened it
+            task = asyncio.get_running_loop().create_task(self._run(batch), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        queries = [query for query, _, _ in batch]
+        k = max(request_k for _, request_k, _ in batch)
+
+        start = time.perf_counter()
+        try:
+            embeddings = await stage_executor.run("encode", self.encoder.encode, queries)
+            encoded = time.perf_counter()
+            distances, indices = await stage_executor.run("search", self.search, embeddings, k)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.batched_queries += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        finished = time.perf_counter()
+        self.batch_seconds_total += finished - start
+
+        timings = {"encode": encoded - start, "search": finished - encoded}
+        for i, (_, request_k, future) in enumerate(batch):
+            if not future.done():
+                future.set_result((embeddings[i:i + 1], distances[i, :request_k], indices[i, :request_k], timings))
+
+    def stats(self):
+        return {
+            "window_ms": self.window_seconds * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "batched_queries": self.batched_queries,
+            "avg_batch_size": self.batched_queries / self.batches if self.batches else None,
+            "largest_batch": self.largest_batch,
+            "avg_batch_seconds": self.batch_seconds_total / self.batches if self.batches else None,
+        }
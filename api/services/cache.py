@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Cached marker for keys known not to exist (negative caching)
+NOT_FOUND = object()
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    Entries expire after ttl seconds (None keeps them until evicted); NOT_FOUND
+    entries use negative_ttl instead. When max_size is reached the least
+    recently used entry is evicted.
+    """
+
+    def __init__(self, max_size, ttl=None, negative_ttl=None, name="cache"):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl if negative_ttl is not None else ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        """
+        Return the cached value (possibly NOT_FOUND), or default on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if value is NOT_FOUND:
+                self.negative_hits += 1
+            return value
+
+    def set(self, key, value, ttl=_MISSING):
+        if ttl is _MISSING:
+            ttl = self.negative_ttl if value is NOT_FOUND else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """
+        Read-through lookup: on a miss call loader(key) and cache its result,
+        storing None results as NOT_FOUND. Returns None for cached misses.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader(key)
+            self.set(key, NOT_FOUND if value is None else value)
+            return value
+        return None if value is NOT_FOUND else value
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+
+from config.config import (
+    DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME,
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_CHECKOUT_TIMEOUT, DB_POOL_HEALTHCHECK_IDLE_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no connection becomes available within the checkout timeout.
+    """
+
+
+class DatabasePool:
+    """
+    Bounded pool of autocommit psycopg2 connections shared by all routers.
+
+    At most max_size connections exist at once; callers wait up to
+    checkout_timeout seconds for one. Connections that sat idle longer than
+    healthcheck_idle_seconds are pinged before reuse and replaced if stale.
+    """
+
+    def __init__(self, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT, healthcheck_idle_seconds=DB_POOL_HEALTHCHECK_IDLE_SECONDS):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.healthcheck_idle_seconds = healthcheck_idle_seconds
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = True
+        self.in_use = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.connections_discarded = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    def open(self):
+        """
+        Mark the pool usable and pre-open min_size connections. A database that
+        is not reachable yet is not fatal: connections are opened on demand.
+        """
+        self._closed = False
+        try:
+            for _ in range(self.min_size - len(self._idle)):
+                self._idle.append((self._connect(), time.monotonic()))
+        except psycopg2.OperationalError as e:
+            logger.warning("Could not pre-open database connections: %s", e)
+        logger.info("Database pool opened (%d idle, max %d)", len(self._idle), self.max_size)
+
+    def close(self):
+        """
+        Close every idle connection; connections still checked out are closed when returned.
+        """
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn, _ in idle:
+            self._discard(conn)
+        logger.info("Database pool closed")
+
+    @contextmanager
+    def connection(self):
+        """
+        Check a connection out for the duration of the with-block.
+        """
+        if self._closed:
+            raise RuntimeError("Database pool not open")
+
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            self.timeouts += 1
+            raise PoolTimeoutError(f"No database connection available within {self.checkout_timeout}s")
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._checkin(conn, broken)
+            self._slots.release()
+
+    def _connect(self):
+        conn = psycopg2.connect(
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASS,
+            host=DB_HOST,
+            port=DB_PORT
+        )
+        # Read-only lookups: avoid leaving an open transaction on pooled connections
+        conn.autocommit = True
+        self.connections_opened += 1
+        return conn
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                item = self._idle.pop() if self._idle else None
+            if item is None:
+                return self._connect()
+
+            conn, last_used = item
+            if conn.closed:
+                self._discard(conn)
+                continue
+            if time.monotonic() - last_used > self.healthcheck_idle_seconds and not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+            return conn
+
+    def _checkin(self, conn, broken):
+        if broken or conn.closed or self._closed:
+            self._discard(conn)
+            return
+        if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    def _is_healthy(self, conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        self.connections_discarded += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def stats(self):
+        idle = len(self._idle)
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "in_use": self.in_use,
+            "idle": idle,
+            "open_connections": self.in_use + idle,
+            "utilisation": self.in_use / self.max_size,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connections_opened": self.connections_opened,
+            "connections_discarded": self.connections_discarded,
+            "avg_wait_ms": self.wait_seconds_total / self.checkouts * 1000.0 if self.checkouts else None,
+            "max_wait_ms": self.max_wait_seconds * 1000.0,
+        }
+
+
+# Shared instance, opened and closed by the app lifespan in main.py
+db_pool = DatabasePool()
@@ -0,0 +1,97 @@
+import json
+import os
+
+import numpy as np
+
+# Binary side-stores written by the ingestion job next to the indices
+# (data/embeddings/embedding_store.py); this is the read-only side:
+#   {name}_embeddings.f32     float32 matrix, row-major, count x dimension
+#   {name}_ids.i64            int64 row ID (transaction_id) per vector
+#   {name}_texts.bin          utf-8 texts, concatenated (optional)
+#   {name}_text_offsets.i64   int64 end offset of each text in _texts.bin (optional)
+#   {name}_embeddings.json    metadata: dimension, committed row count, whether texts are stored
+
+
+def _paths(directory, name):
+    prefix = os.path.join(directory, name)
+    return {
+        "vectors": f"{prefix}_embeddings.f32",
+        "ids": f"{prefix}_ids.i64",
+        "texts": f"{prefix}_texts.bin",
+        "offsets": f"{prefix}_text_offsets.i64",
+        "meta": f"{prefix}_embeddings.json",
+    }
+
+
+def _read_meta(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class EmbeddingStoreReader:
+    """
+    Zero-copy view over a committed embedding store: vectors and ids are
+    np.memmap arrays backed by the page cache, texts are decoded on demand.
+    """
+
+    def __init__(self, directory, name):
+        self.paths = _paths(directory, name)
+        self.name = name
+        meta = _read_meta(self.paths["meta"])
+        if meta is None:
+            raise FileNotFoundError(f"No {name} embedding store in {directory}")
+
+        self.dimension = meta["dimension"]
+        self.count = meta["count"]
+        self.vectors = self._memmap(self.paths["vectors"], 'float32', (self.count, self.dimension))
+        self.ids = self._memmap(self.paths["ids"], 'int64', (self.count,))
+        self.with_texts = meta["with_texts"]
+        if self.with_texts:
+            self._offsets = self._memmap(self.paths["offsets"], 'int64', (self.count,))
+            self._texts = self._memmap(self.paths["texts"], 'uint8', (meta["text_bytes"],))
+        self._sorted = None
+
+    @staticmethod
+    def _memmap(path, dtype, shape):
+        # np.memmap cannot map zero bytes
+        if int(np.prod(shape)) == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self):
+        return self.count
+
+    def text(self, position):
+        if not self.with_texts:
+            raise ValueError(f"{self.name} embedding store has no texts")
+        start = int(self._offsets[position - 1]) if position > 0 else 0
+        end = int(self._offsets[position])
+        return bytes(self._texts[start:end]).decode('utf-8')
+
+    def positions_for_ids(self, ids):
+        """
+        Map row IDs to row positions (-1 where absent). If an ID was appended
+        more than once, the most recent row wins.
+        """
+        if self._sorted is None:
+            order = np.argsort(self.ids, kind='stable')
+            self._sorted = (order, np.asarray(self.ids)[order])
+        order, sorted_ids = self._sorted
+
+        ids = np.asarray(ids, dtype='int64')
+        positions = np.searchsorted(sorted_ids, ids, side='right') - 1
+        found = positions >= 0
+        found[found] = sorted_ids[positions[found]] == ids[found]
+        return np.where(found, order[np.clip(positions, 0, None)], -1) if len(sorted_ids) else np.full(len(ids), -1)
+
+    def vectors_for_ids(self, ids):
+        """
+        Gather the stored vectors for the given row IDs (zeros where absent), plus a found mask.
+        """
+        positions = self.positions_for_ids(ids)
+        found = positions >= 0
+        vectors = np.zeros((len(positions), self.dimension), dtype='float32')
+        vectors[found] = self.vectors[positions[found]]
+        return vectors, found
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+
+from sentence_transformers import SentenceTransformer
+
+from config.config import EMBEDDING_MODEL_NAME, ENCODER_WARMUP
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEncoder:
+    """
+    Holds a single SentenceTransformer for the whole process so request handlers
+    only pay for encoding, never for loading the model weights.
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME):
+        self.model_name = model_name
+        self.model = None
+        self._lock = threading.Lock()
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.encode_calls = 0
+        self.encoded_texts = 0
+        self.encode_seconds_total = 0.0
+        self.last_encode_seconds = None
+
+    @property
+    def is_loaded(self):
+        return self.model is not None
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension() if self.model is not None else None
+
+    def load(self, warmup=ENCODER_WARMUP):
+        """
+        Load the model weights once and optionally run a warm-up encode so the
+        first real request does not pay for lazy initialisation.
+        """
+        if self.model is not None:
+            return
+
+        start = time.perf_counter()
+        self.model = SentenceTransformer(self.model_name)
+        self.load_seconds = time.perf_counter() - start
+        logger.info("Query encoder '%s' loaded in %.3fs", self.model_name, self.load_seconds)
+
+        if warmup:
+            start = time.perf_counter()
+            self.model.encode(["warm-up"], convert_to_numpy=True)
+            self.warmup_seconds = time.perf_counter() - start
+            logger.info("Query encoder warm-up finished in %.3fs", self.warmup_seconds)
+
+    def encode(self, texts):
+        """
+        Encode a list of texts into a float32 (n, d) matrix.
+        """
+        if self.model is None:
+            raise RuntimeError("Query encoder not loaded")
+
+        with self._lock:
+            start = time.perf_counter()
+            embeddings = self.model.encode(texts, convert_to_numpy=True)
+            elapsed = time.perf_counter() - start
+            self.encode_calls += 1
+            self.encoded_texts += len(texts)
+            self.encode_seconds_total += elapsed
+            self.last_encode_seconds = elapsed
+
+        return embeddings.astype('float32', copy=False)
+
+    def stats(self):
+        return {
+            "model_name": self.model_name,
+            "loaded": self.is_loaded,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "encode_calls": self.encode_calls,
+            "encoded_texts": self.encoded_texts,
+            "encode_seconds_total": self.encode_seconds_total,
+            "avg_encode_seconds": self.encode_seconds_total / self.encode_calls if self.encode_calls else None,
+            "last_encode_seconds": self.last_encode_seconds,
+        }
+
+
+# Shared instance, loaded by the app lifespan in main.py
+query_encoder = QueryEncoder()
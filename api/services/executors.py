@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.config import (
+    CPU_POOL_SIZE, IO_POOL_SIZE, ENCODE_CONCURRENCY, SEARCH_CONCURRENCY, DB_CONCURRENCY, LLM_CONCURRENCY
+)
+from services.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+# Which pool each pipeline stage runs on, and how many calls of it may be in flight at once
+CPU_STAGES = {"encode": ENCODE_CONCURRENCY, "search": SEARCH_CONCURRENCY}
+IO_STAGES = {"db": DB_CONCURRENCY, "llm": LLM_CONCURRENCY}
+
+
+class StageExecutor:
+    """
+    Runs blocking pipeline stages off the event loop: CPU-bound stages on one
+    bounded thread pool, I/O-bound stages on another, each stage capped by its
+    own semaphore so a slow stage cannot starve the others of threads.
+    """
+
+    def __init__(self, cpu_pool_size=CPU_POOL_SIZE, io_pool_size=IO_POOL_SIZE):
+        self.cpu_pool_size = cpu_pool_size
+        self.io_pool_size = io_pool_size
+        self.cpu_pool = None
+        self.io_pool = None
+        self._semaphores = {}
+        self._stats = {}
+
+    @property
+    def is_running(self):
+        return self.cpu_pool is not None
+
+    def start(self):
+        if self.is_running:
+            return
+        self.cpu_pool = ThreadPoolExecutor(max_workers=self.cpu_pool_size, thread_name_prefix="cpu-stage")
+        self.io_pool = ThreadPoolExecutor(max_workers=self.io_pool_size, thread_name_prefix="io-stage")
+        self._semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in {**CPU_STAGES, **IO_STAGES}.items()}
+        self._stats = {stage: {"in_flight": 0, "waiting": 0, "completed": 0, "seconds_total": 0.0} for stage in self._semaphores}
+        logger.info("Stage executors started (cpu=%d, io=%d)", self.cpu_pool_size, self.io_pool_size)
+
+    def shutdown(self):
+        if not self.is_running:
+            return
+        self.cpu_pool.shutdown(wait=True)
+        self.io_pool.shutdown(wait=True)
+        self.cpu_pool = None
+        self.io_pool = None
+        logger.info("Stage executors shut down")
+
+    async def run(self, stage, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on the pool that owns the given stage.
+        """
+        if not self.is_running:
+            raise RuntimeError("Stage executors not started")
+        if stage in CPU_STAGES:
+            pool = self.cpu_pool
+        elif stage in IO_STAGES:
+            pool = self.io_pool
+        else:
+            raise ValueError(f"Invalid stage: {stage}")
+
+        stats = self._stats[stage]
+        stats["waiting"] += 1
+        async with self._semaphores[stage]:
+            stats["waiting"] -= 1
+            stats["in_flight"] += 1
+            start = time.perf_counter()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+            finally:
+                elapsed = time.perf_counter() - start
+                stats["in_flight"] -= 1
+                stats["completed"] += 1
+                stats["seconds_total"] += elapsed
+                record_stage(stage, elapsed)
+
+    def stats(self):
+        limits = {**CPU_STAGES, **IO_STAGES}
+        return {
+            "cpu_pool_size": self.cpu_pool_size,
+            "io_pool_size": self.io_pool_size,
+            "stages": {stage: {"limit": limits[stage], **stats} for stage, stats in self._stats.items()},
+        }
+
+
+# Shared instance, started and shut down by the app lifespan in main.py
+stage_executor = StageExecutor()
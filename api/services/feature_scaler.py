@@ -0,0 +1,47 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+# Written by the ingestion job next to the indices (data/embeddings/feature_scaler.py)
+FEATURE_SCALERS_FILE = 'feature_scalers.json'
+
+
+class FeatureScaler:
+    """
+    Standardisation the financial/time vectors were stored with; applies the
+    same mean and scale to raw query values.
+    """
+
+    def __init__(self, features, mean, scale):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype='float64')
+        self.scale = np.asarray(scale, dtype='float64')
+
+    def transform(self, values):
+        values = np.asarray([_to_number(v) for v in values], dtype='float64')
+        if values.size != len(self.features):
+            raise ValueError(f"Expected {len(self.features)} values ({', '.join(self.features)}), got {values.size}")
+        return ((values - self.mean) / self.scale).astype('float32').reshape(1, -1)
+
+
+def _to_number(value):
+    # Timestamps may be sent as ISO-8601 strings instead of epoch seconds
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+def load_feature_scalers(directory):
+    """
+    Scalers keyed by index name, or an empty dict for stores built before scalers were persisted.
+    """
+    path = os.path.join(directory, FEATURE_SCALERS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return {
+            index_type: FeatureScaler(data["features"], data["mean"], data["scale"])
+            for index_type, data in json.load(f).items()
+        }
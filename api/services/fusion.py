@@ -0,0 +1,57 @@
+import numpy as np
+
+FUSION_METHODS = ("rrf", "weighted")
+
+
+def fuse_results(results, k, method="rrf", weights=None, rrf_k=60):
+    """
+    Merge per-index candidate lists over their shared row IDs.
+
+    results maps a source name to its (distances, ids) for one query, best first,
+    with -1 padding. "rrf" scores each row by sum(weight / (rrf_k + rank));
+    "weighted" by sum(weight * similarity), where a source's distances are
+    min-max scaled to a [0, 1] similarity within its own candidate list.
+    Rows missing from a list contribute nothing for that source.
+
+    Returns (ids, scores, ranks, distances) for the top k rows: ranks and
+    distances are (k, n_sources) arrays in the order of results, with -1 / NaN
+    where a source did not return the row.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {method} (expected one of {', '.join(FUSION_METHODS)})")
+    weights = weights or {}
+
+    ids, sources, ranks, distances, contributions = [], [], [], [], []
+    for source, (source_distances, source_ids) in enumerate(results.values()):
+        source_ids = np.asarray(source_ids, dtype='int64').reshape(-1)
+        source_distances = np.asarray(source_distances, dtype='float64').reshape(-1)
+        valid = source_ids != -1
+        source_ids, source_distances = source_ids[valid], source_distances[valid]
+        source_ranks = np.flatnonzero(valid)
+        weight = weights.get(list(results)[source], 1.0)
+
+        if method == "rrf":
+            contribution = weight / (rrf_k + source_ranks + 1.0)
+        else:
+            spread = source_distances.max() - source_distances.min() if len(source_distances) else 0.0
+            similarity = 1.0 - (source_distances - source_distances.min()) / spread if spread > 0 else np.ones(len(source_distances))
+            contribution = weight * similarity
+
+        ids.append(source_ids)
+        sources.append(np.full(len(source_ids), source))
+        ranks.append(source_ranks)
+        distances.append(source_distances)
+        contributions.append(contribution)
+
+    ids = np.concatenate(ids)
+    sources = np.concatenate(sources)
+    unique_ids, row = np.unique(ids, return_inverse=True)
+    scores = np.bincount(row, weights=np.concatenate(contributions), minlength=len(unique_ids))
+
+    fused_ranks = np.full((len(unique_ids), len(results)), -1, dtype='int64')
+    fused_ranks[row, sources] = np.concatenate(ranks)
+    fused_distances = np.full((len(unique_ids), len(results)), np.nan)
+    fused_distances[row, sources] = np.concatenate(distances)
+
+    top = np.argsort(-scores, kind='stable')[:k]
+    return unique_ids[top], scores[top], fused_ranks[top], fused_distances[top]
@@ -0,0 +1,289 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+import faiss
+
+from config.config import VECTOR_STORE_DIR, INDEX_MMAP, INDEX_WATCH_INTERVAL_SECONDS
+from services.embedding_store import EmbeddingStoreReader
+from services.feature_scaler import load_feature_scalers
+from services.metadata_store import MetadataStore
+
+logger = logging.getLogger(__name__)
+
+# IO_FLAG_MMAP_IFC maps flat/SQ code arrays straight from the file (newer FAISS);
+# plain IO_FLAG_MMAP only covers on-disk inverted lists
+MMAP_FLAGS = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+INDEX_FILES = {
+    "product": 'faiss_product_index.bin',
+    "financial": 'faiss_financial_index.bin',
+    "time": 'faiss_time_index.bin',
+}
+# Written by the ingestion job: incomplete from its first write to a store until every
+# index, side-store and metadata file of the build is saved (data/embeddings/generate_embeddings.py)
+BUILD_MARKER_FILE = 'index_build.json'
+
+
+def current_rss_bytes():
+    """
+    Resident set size of this worker process (falls back to peak RSS off Linux).
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def directory_signature(directory):
+    """
+    (generation, complete) of the directory's build marker, or None for a
+    store written without one. Index files are rewritten and checkpointed in
+    place during a build, so only the marker says when they belong together.
+    """
+    try:
+        with open(os.path.join(directory, BUILD_MARKER_FILE), 'r') as f:
+            marker = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return marker.get("generation"), bool(marker.get("complete"))
+
+
+def read_index(index_file, mmap=INDEX_MMAP):
+    """
+    Read a FAISS index, memory-mapping it read-only where the index type allows;
+    returns the index and whether it is mmapped.
+    """
+    if mmap:
+        try:
+            return faiss.read_index(index_file, MMAP_FLAGS), True
+        except RuntimeError as e:
+            logger.warning("Cannot mmap %s, reading it into memory instead: %s", index_file, e)
+    return faiss.read_index(index_file), False
+
+
+class IndexSet:
+    """
+    The product, financial and time indices of one vector store directory,
+    plus the feature scalers the financial and time vectors were normalised with
+    and the metadata columns search filters are evaluated against. The float32
+    product side-store is memory-mapped for exact re-ranking of quantised or
+    approximate product indices.
+    """
+
+    def __init__(self, directory=VECTOR_STORE_DIR):
+        self.directory = directory
+        self.product = None
+        self.financial = None
+        self.time = None
+        self.scalers = {}
+        self.metadata = None
+        self.product_vectors = None
+        self.load_stats = {}
+        self.signature = None
+
+    def load(self, require_complete=False):
+        """
+        Read every file of the store. With require_complete, refuse a store
+        whose build marker is missing or incomplete, or changes while loading.
+        """
+        # Taken before reading so a build started mid-load still looks changed afterwards
+        self.signature = directory_signature(self.directory)
+        if require_complete and not (self.signature and self.signature[1]):
+            raise RuntimeError(f"No completed build in {self.directory}")
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        per_index = {}
+        for name, file_name in INDEX_FILES.items():
+            index_file = os.path.join(self.directory, file_name)
+            if not os.path.exists(index_file):
+                continue
+            index_start = time.perf_counter()
+            index, mmapped = read_index(index_file)
+            setattr(self, name, index)
+            per_index[name] = {
+                "ntotal": index.ntotal,
+                "file_mb": os.path.getsize(index_file) / 2 ** 20,
+                "mmapped": mmapped,
+                "seconds": time.perf_counter() - index_start,
+            }
+
+        self.scalers = load_feature_scalers(self.directory)
+        self.metadata = MetadataStore.load(self.directory)
+        if self.metadata is not None and self.product is not None:
+            self.metadata.retain(faiss.vector_to_array(self.product.id_map))
+        self.product_vectors = self._open_side_store("product")
+        if require_complete and directory_signature(self.directory) != self.signature:
+            raise RuntimeError(f"A new build started in {self.directory} while it was being loaded")
+
+        rss_after = current_rss_bytes()
+        self.load_stats = {
+            "directory": self.directory,
+            "pid": os.getpid(),
+            "seconds": time.perf_counter() - start,
+            "rss_before_mb": rss_before / 2 ** 20,
+            "rss_after_mb": rss_after / 2 ** 20,
+            "rss_delta_mb": (rss_after - rss_before) / 2 ** 20,
+            "indices": per_index,
+            "metadata": self.metadata.stats() if self.metadata is not None else None,
+            "product_side_store_mb": (
+                os.path.getsize(self.product_vectors.paths["vectors"]) / 2 ** 20 if self.product_vectors is not None else None
+            ),
+        }
+        logger.info(
+            "Loaded %s indices from %s in %.3fs (pid %d, RSS +%.1f MB)", ', '.join(per_index) or 'no', self.directory,
+            self.load_stats['seconds'], self.load_stats['pid'], self.load_stats['rss_delta_mb']
+        )
+        return self
+
+    def _open_side_store(self, name):
+        try:
+            store = EmbeddingStoreReader(self.directory, name)
+        except FileNotFoundError:
+            return None
+        # Build the ID -> row lookup now rather than on the first re-ranked query
+        store.positions_for_ids([])
+        return store
+
+
+
+class IndexVersion:
+    def __init__(self, version, indices):
+        self.version = version
+        self.indices = indices
+        self.loaded_at = time.time()
+        self.refcount = 0
+        self.retired = False
+
+
+class IndexRegistry:
+    """
+    Versioned holder of the live IndexSet.
+
+    Searches take a reference with acquire(); reload() loads a new version
+    off to the side and swaps it in atomically. The previous version is
+    released once its last in-flight search finishes.
+    """
+
+    def __init__(self, directory=VECTOR_STORE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._current = None
+        self._retired = []
+        self._next_version = 1
+        self._swap_listeners = []
+
+    @property
+    def current(self):
+        return self._current
+
+    def add_swap_listener(self, listener):
+        """
+        Register listener(version) to be called after every swap (e.g. to drop caches).
+        """
+        self._swap_listeners.append(listener)
+
+    def reload(self, directory=None, require_complete=False):
+        """
+        Load the indices in directory (default: the current one) and swap them in.
+        Blocking; run it in a worker thread while requests keep being served.
+        """
+        with self._reload_lock:
+            directory = directory or self.directory
+            indices = IndexSet(directory).load(require_complete)
+            with self._lock:
+                new_version = IndexVersion(self._next_version, indices)
+                self._next_version += 1
+                old_version, self._current = self._current, new_version
+                self.directory = directory
+                if old_version is not None:
+                    old_version.retired = True
+                    if old_version.refcount == 0:
+                        self._release(old_version)
+                    else:
+                        self._retired.append(old_version)
+            logger.info("Index version %d is live (%s)", new_version.version, directory)
+
+        for listener in self._swap_listeners:
+            listener(new_version.version)
+        return new_version
+
+    @contextmanager
+    def acquire(self, name=None):
+        """
+        Pin the live version for the duration of the with-block and yield its
+        IndexSet, or a single index when name is given.
+        """
+        with self._lock:
+            version = self._current
+            if version is not None:
+                version.refcount += 1
+        try:
+            if version is None:
+                yield None
+            else:
+                yield getattr(version.indices, name) if name else version.indices
+        finally:
+            if version is not None:
+                with self._lock:
+                    version.refcount -= 1
+                    if version.retired and version.refcount == 0 and version in self._retired:
+                        self._retired.remove(version)
+                        self._release(version)
+
+    def _release(self, version):
+        # Dropping the last references frees (or unmaps) the old indices
+        version.indices = None
+        logger.info("Index version %d released", version.version)
+
+    def has_new_build(self):
+        """
+        Whether the directory holds a completed build other than the live one.
+        """
+        signature = directory_signature(self.directory)
+        if signature is None or not signature[1]:
+            return False
+        return self._current is None or signature != self._current.indices.signature
+
+    def stats(self):
+        current = self._current
+        return {
+            "version": current.version if current else None,
+            "directory": self.directory,
+            "loaded_at": current.loaded_at if current else None,
+            "load": current.indices.load_stats if current else None,
+            "retired_versions": [{"version": v.version, "in_flight": v.refcount} for v in self._retired],
+        }
+
+
+async def watch_index_directory(registry, interval=INDEX_WATCH_INTERVAL_SECONDS):
+    """
+    Poll the live directory's build marker and reload once ingestion marks a
+    new build complete; files rewritten or checkpointed while a build is
+    running are never picked up.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        if not registry.has_new_build():
+            continue
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(registry.reload, require_complete=True)
+            )
+        except Exception as e:
+            logger.error("Index reload failed, keeping the current version: %s", e)
+
+
+# Shared instance, loaded by the app lifespan in main.py
+index_registry = IndexRegistry()
@@ -0,0 +1,118 @@
+import json
+import os
+
+import faiss
+import numpy as np
+
+# Column files written by the ingestion job next to the indices (data/embeddings/metadata_store.py)
+COLUMNS = {
+    "ids": "int64",
+    "category": "int16",
+    "transaction_date": "int64",
+    "unit_price": "float32",
+    "price": "float32",
+}
+META_FILE = 'metadata.json'
+
+
+def column_path(directory, column):
+    suffix = {"int64": "i64", "int16": "i16", "float32": "f32"}[COLUMNS[column]]
+    return os.path.join(directory, f"metadata_{column}.{suffix}")
+
+
+class IDFilter:
+    """
+    The row IDs a filter admits, as a FAISS IDSelectorBitmap over [0, max_id].
+    Keeps the bitmap alive for as long as the selector is in use.
+    """
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.count = len(ids)
+        size = int(ids[-1]) + 1 if self.count else 1
+        bits = np.zeros(size, dtype=bool)
+        bits[ids] = True
+        # FAISS tests bit (id & 7) of byte (id >> 3)
+        self.bitmap = np.packbits(bits, bitorder='little')
+        # The length FAISS expects is in bytes, not bits
+        self.selector = faiss.IDSelectorBitmap(len(self.bitmap), faiss.swig_ptr(self.bitmap))
+
+
+class MetadataStore:
+    """
+    In-memory column store of the filterable row attributes (category code,
+    epoch-second transaction date, unit price, line price), sorted by row ID
+    with one entry per row.
+    """
+
+    def __init__(self, ids, columns, categories):
+        self.ids = ids
+        self.columns = columns
+        self.categories = categories
+        self._codes = {name.casefold(): code for code, name in enumerate(categories)}
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Read the committed columns, or return None for stores built before metadata was recorded.
+        """
+        meta_path = os.path.join(directory, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+
+        count = meta["count"]
+        raw = {
+            column: np.fromfile(column_path(directory, column), dtype=dtype, count=count)
+            for column, dtype in COLUMNS.items()
+        }
+        # Updated rows were appended again: keep the last entry of every ID
+        order = np.argsort(raw["ids"], kind='stable')
+        sorted_ids = raw["ids"][order]
+        last = np.append(sorted_ids[1:] != sorted_ids[:-1], True) if count else np.zeros(0, dtype=bool)
+        keep = order[last]
+        columns = {column: values[keep] for column, values in raw.items() if column != "ids"}
+        return cls(sorted_ids[last], columns, meta["categories"])
+
+    def retain(self, ids):
+        """
+        Drop rows whose vectors are no longer indexed (deleted since they were recorded).
+        """
+        keep = np.isin(self.ids, ids)
+        if not keep.all():
+            self.ids = self.ids[keep]
+            self.columns = {column: values[keep] for column, values in self.columns.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self):
+        return self.ids.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def matching_ids(self, category=None, date_from=None, date_to=None, min_price=None, max_price=None):
+        """
+        IDs of the rows matching every given condition: category (case-insensitive),
+        transaction date in [date_from, date_to) and unit price in [min_price, max_price].
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        if category is not None:
+            code = self._codes.get(category.casefold())
+            if code is None:
+                return self.ids[:0]
+            mask &= self.columns["category"] == code
+        if date_from is not None:
+            mask &= self.columns["transaction_date"] >= int(date_from.timestamp())
+        if date_to is not None:
+            mask &= self.columns["transaction_date"] < int(date_to.timestamp())
+        if min_price is not None:
+            mask &= self.columns["unit_price"] >= min_price
+        if max_price is not None:
+            mask &= self.columns["unit_price"] <= max_price
+        return self.ids[mask]
+
+    def id_filter(self, **conditions):
+        return IDFilter(self.matching_ids(**conditions))
+
+    def stats(self):
+        return {"rows": len(self), "categories": self.categories, "memory_mb": self.nbytes() / 2 ** 20}
@@ -0,0 +1,158 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from config.config import SERVER_TIMING_ENABLED
+
+# Upper bounds in seconds, as in the Prometheus client's default latency buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with one series per combination of label values:
+    per-bucket counts, a sum and a count, rendered in the text exposition format.
+    """
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts (last one is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count]) for labels, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total!r}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Every call of a pipeline stage (encode, search, db, context, llm), batched calls counted once per batch
+stage_latency = Histogram(
+    "retail_rag_stage_duration_seconds", "Time spent in one call of a request pipeline stage.", ("stage",)
+)
+request_latency = Histogram(
+    "retail_rag_request_duration_seconds", "HTTP request latency until the last body byte.", ("method", "route", "status")
+)
+
+# Stage name -> seconds for the HTTP request being handled (set by TimingMiddleware)
+_request_timings = ContextVar("request_timings", default=None)
+
+
+def add_request_timing(stage, seconds):
+    """
+    Charge seconds of a stage to the current request only, without a histogram
+    observation (e.g. its share of a batched encode already observed once).
+    """
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def record_stage(stage, seconds):
+    stage_latency.observe(seconds, stage)
+    add_request_timing(stage, seconds)
+
+
+@contextmanager
+def span(stage):
+    """
+    Time the with-block as one call of the given stage.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def request_timings_ms():
+    """
+    Milliseconds per stage spent so far by the current request.
+    """
+    return {stage: seconds * 1000.0 for stage, seconds in (_request_timings.get() or {}).items()}
+
+
+def render_metrics():
+    return stage_latency.render() + request_latency.render()
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that collects the stage timings of each HTTP request, sends
+    them as a Server-Timing header (stages called more than once are summed;
+    streamed responses only carry what ran before the first byte) and observes
+    the request latency by route template.
+    """
+
+    def __init__(self, app, server_timing=SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+        self._routes = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings = {}
+        token = _request_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(timings, time.perf_counter() - start)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            request_latency.observe(time.perf_counter() - start, scope["method"], self._route(scope), str(status))
+
+    def _route(self, scope):
+        # Route templates rather than raw paths keep the label set bounded
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        if self._routes is None and "app" in scope:
+            self._routes = {route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")}
+        return (self._routes or {}).get(scope.get("endpoint"), "unmatched")
+
+
+def server_timing_header(timings, total_seconds):
+    entries = [f"{stage};dur={seconds * 1000.0:.2f}" for stage, seconds in timings.items()]
+    entries.append(f"total;dur={total_seconds * 1000.0:.2f}")
+    return ", ".join(entries)
@@ -0,0 +1,42 @@
+import faiss
+
+from config.config import SEARCH_NPROBE, SEARCH_EF_SEARCH
+
+
+def make_search_params(index, nprobe=None, ef_search=None, selector=None):
+    """
+    Build per-query FAISS search parameters for the index behind an ID map:
+    nprobe for IVF indices, efSearch for HNSW, plus an optional IDSelector
+    restricting the search to filtered row IDs. Returns None for unfiltered
+    exact indices.
+    """
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(nprobe=nprobe or SEARCH_NPROBE, sel=selector)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=ef_search or SEARCH_EF_SEARCH, sel=selector)
+    if selector is not None:
+        return faiss.SearchParameters(sel=selector)
+    return None
+
+
+def widened_search_params(index, k, nprobe=None, ef_search=None, selector=None):
+    """
+    Parameters for a second, wider pass when a filtered approximate search came
+    back short: every inverted list for IVF, a much larger candidate list for
+    HNSW. None for exact indices, which already see every admitted vector.
+    """
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(nprobe=inner.nlist, sel=selector)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=max(8 * (ef_search or SEARCH_EF_SEARCH), k), sel=selector)
+    return None
+
+
+def is_exact(index):
+    """
+    True when the index holds the raw float32 vectors and scans all of them.
+    """
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    return isinstance(inner, faiss.IndexFlat)
@@ -0,0 +1,181 @@
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from config.config import (
+    SEMANTIC_CACHE_ENABLED, RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL_SECONDS,
+    EMBEDDING_CACHE_MAX_SIZE, EMBEDDING_CACHE_TTL_SECONDS,
+    SIMILARITY_CACHE_ENABLED, SIMILARITY_CACHE_MAX_SIZE, SIMILARITY_CACHE_MAX_DISTANCE,
+)
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query):
+    """
+    Canonical form used as the cache key: NFKC, case-folded, single-spaced.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", query)).strip().casefold()
+
+
+class SimilarityCache:
+    """
+    Reuses a previous answer when a new query embedding lies within max_distance
+    (cosine distance) of a cached one. Entries are LRU-evicted at max_size and
+    expire after ttl seconds; lookups are one (n, d) matrix product.
+    """
+
+    def __init__(self, max_size, max_distance, ttl=None, name="similarity"):
+        self.name = name
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Stacked unit embeddings of the entries, rebuilt lazily after changes
+        self._matrix = None
+        self._keys = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, embedding, scope=None):
+        """
+        Value of the nearest cached entry with the same scope (e.g. search
+        parameters), or None when none is close enough.
+        """
+        query = _unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if self._entries and self._matrix is None:
+                self._keys = list(self._entries)
+                self._matrix = np.vstack([self._entries[key][0] for key in self._keys])
+
+            if self._entries:
+                distances = 1.0 - self._matrix @ query
+                for i in np.argsort(distances):
+                    if distances[i] > self.max_distance:
+                        break
+                    key = self._keys[i]
+                    if self._entries[key][1] == scope:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return self._entries[key][2]
+            self.misses += 1
+            return None
+
+    def set(self, key, embedding, value, scope=None):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (_unit(embedding), scope, value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def _expire(self, now):
+        expired = [key for key, entry in self._entries.items() if entry[3] is not None and entry[3] <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self.expirations += len(expired)
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+def _unit(embedding):
+    vector = np.asarray(embedding, dtype='float32').reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class SemanticCache:
+    """
+    Layered cache in front of product_search:
+
+    - responses: full response keyed by normalised query text and search parameters
+    - embeddings: query embedding keyed by normalised text (independent of the index)
+    - similar: full response reused for near-duplicate query embeddings (optional)
+
+    Responses depend on the live index, so those layers are dropped on every index swap.
+    """
+
+    def __init__(self, enabled=SEMANTIC_CACHE_ENABLED, similarity_enabled=SIMILARITY_CACHE_ENABLED):
+        self.enabled = enabled
+        self.responses = TTLCache(RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL_SECONDS, name="responses")
+        self.embeddings = TTLCache(EMBEDDING_CACHE_MAX_SIZE, EMBEDDING_CACHE_TTL_SECONDS, name="embeddings")
+        self.similar = SimilarityCache(
+            SIMILARITY_CACHE_MAX_SIZE, SIMILARITY_CACHE_MAX_DISTANCE, RESPONSE_CACHE_TTL_SECONDS
+        ) if similarity_enabled else None
+
+    def get_response(self, key, scope):
+        return self.responses.get((key, scope)) if self.enabled else None
+
+    def get_embedding(self, key):
+        return self.embeddings.get(key) if self.enabled else None
+
+    def get_similar_response(self, embedding, scope):
+        if not self.enabled or self.similar is None:
+            return None
+        return self.similar.get(embedding, scope)
+
+    def store_embedding(self, key, embedding):
+        if self.enabled:
+            self.embeddings.set(key, embedding)
+
+    def store(self, key, scope, embedding, response):
+        if not self.enabled:
+            return
+        self.embeddings.set(key, embedding)
+        self.responses.set((key, scope), response)
+        if self.similar is not None:
+            self.similar.set((key, scope), embedding, response, scope)
+
+    def on_index_swap(self, version):
+        self.responses.clear()
+        if self.similar is not None:
+            self.similar.clear()
+        logger.info("Semantic cache: cleared cached responses for index version %d", version)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "responses": self.responses.stats(),
+            "embeddings": self.embeddings.stats(),
+            "similar": self.similar.stats() if self.similar is not None else None,
+        }
+
+
+# Shared instance for the product_search endpoint
+semantic_cache = SemanticCache()
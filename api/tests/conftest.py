@@ -0,0 +1,31 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The API imports its packages relative to the api directory (uvicorn main:app)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Endpoint modules build their model loader at import; the stub needs no network or API key
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+from services.embedding_store import EmbeddingStoreReader  # noqa: E402
+
+
+@pytest.fixture
+def embedding_store(tmp_path):
+    """
+    Write a committed float32 side-store as the ingestion job does and return a reader over it.
+    """
+    def write(ids, vectors, name="product"):
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        prefix = os.path.join(tmp_path, name)
+        vectors.tofile(f"{prefix}_embeddings.f32")
+        np.asarray(ids, dtype='int64').tofile(f"{prefix}_ids.i64")
+        with open(f"{prefix}_embeddings.json", 'w') as f:
+            json.dump({"dimension": vectors.shape[1], "count": len(vectors), "dtype": "float32",
+                       "with_texts": False, "text_bytes": 0}, f)
+        return EmbeddingStoreReader(tmp_path, name)
+
+    return write
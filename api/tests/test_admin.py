@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import endpoints.semantic_search as semantic_search
+import main
+
+
+@pytest.fixture
+def reloads(monkeypatch):
+    calls = []
+
+    def reload(directory=None, require_complete=False):
+        calls.append((directory, require_complete))
+        return SimpleNamespace(version=2, indices=SimpleNamespace(directory="/vector-store", load_stats={}))
+
+    monkeypatch.setattr(semantic_search.index_registry, "reload", reload)
+    return calls
+
+
+def test_admin_routes_are_disabled_without_a_token(monkeypatch, reloads):
+    monkeypatch.setattr(semantic_search, "ADMIN_TOKEN", None)
+
+    response = TestClient(main.app).post("/search/admin/reload_indices", headers={"X-Admin-Token": ""})
+
+    assert response.status_code == 404
+    assert reloads == []
+
+
+def test_reload_requires_the_admin_token(monkeypatch, reloads):
+    monkeypatch.setattr(semantic_search, "ADMIN_TOKEN", "secret")
+    client = TestClient(main.app)
+
+    assert client.post("/search/admin/reload_indices").status_code == 403
+    assert client.post("/search/admin/reload_indices", headers={"X-Admin-Token": "guess"}).status_code == 403
+    assert reloads == []
+
+
+def test_reload_loads_only_a_completed_build_of_the_live_directory(monkeypatch, reloads):
+    monkeypatch.setattr(semantic_search, "ADMIN_TOKEN", "secret")
+
+    # A directory parameter is no longer accepted; the live directory is reloaded
+    response = TestClient(main.app).post(
+        "/search/admin/reload_indices", params={"directory": "/tmp/elsewhere"}, headers={"X-Admin-Token": "secret"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert reloads == [(None, True)]
@@ -0,0 +1,77 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.batching import QueryBatcher
+from services.executors import stage_executor
+
+
+class RecordingEncoder:
+    """
+    One-dimensional "embedding" per query: its length.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, queries):
+        self.calls.append(list(queries))
+        return np.array([[float(len(query))] for query in queries], dtype='float32')
+
+
+def run(coroutine_function):
+    async def main():
+        stage_executor.start()
+        try:
+            return await coroutine_function()
+        finally:
+            stage_executor.shutdown()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_queries_share_one_encode_and_search():
+    encoder = RecordingEncoder()
+    searches = []
+
+    def search(embeddings, k):
+        searches.append((embeddings.shape, k))
+        ids = embeddings.astype('int64') * 100 + np.arange(k)
+        return ids.astype('float32'), ids
+
+    batcher = QueryBatcher(encoder, search, window_ms=50, max_batch_size=32)
+    results = run(lambda: asyncio.gather(batcher.submit("a", k=1), batcher.submit("bb", k=3), batcher.submit("ccc", k=2)))
+
+    assert encoder.calls == [["a", "bb", "ccc"]]
+    # One (3, d) search with the largest k; each request gets its own row cut to its k
+    assert searches == [((3, 1), 3)]
+    assert [indices.tolist() for _, _, indices in results] == [[100], [200, 201, 202], [300, 301]]
+    assert [embedding.tolist() for embedding, _, _ in results] == [[[1.0]], [[2.0]], [[3.0]]]
+    assert batcher.stats()["batches"] == 1
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    batcher = QueryBatcher(RecordingEncoder(), lambda embeddings, k: (np.zeros((len(embeddings), k)),) * 2,
+                           window_ms=60000, max_batch_size=2)
+
+    async def submit_two():
+        return await asyncio.wait_for(asyncio.gather(batcher.submit("a"), batcher.submit("b")), timeout=5)
+
+    assert len(run(submit_two)) == 2
+    assert batcher.stats()["largest_batch"] == 2
+
+
+def test_search_error_reaches_every_waiting_request():
+    def search(embeddings, k):
+        raise RuntimeError("index not loaded")
+
+    batcher = QueryBatcher(RecordingEncoder(), search, window_ms=10)
+
+    async def submit_two():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    errors = run(submit_two)
+    assert [str(error) for error in errors] == ["index not loaded", "index not loaded"]
+    with pytest.raises(RuntimeError):
+        run(lambda: batcher.submit("c"))
@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+
+import psycopg2
+import pytest
+
+import endpoints.data_queries as data_queries
+import services.cache as cache_module
+from services.cache import NOT_FOUND, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = TTLCache(10, ttl=30, negative_ttl=5)
+    cache.set("product", "row")
+    cache.set("missing", NOT_FOUND)
+    cache.set("preloaded", "row", ttl=None)
+
+    clock[0] += 10
+    assert cache.get("product") == "row"
+    # Negative entries use the shorter negative_ttl
+    assert cache.get("missing") is None
+
+    clock[0] += 30
+    assert cache.get("product") is None
+    assert cache.get("preloaded") == "row"
+    assert cache.stats()["expirations"] == 2
+
+
+def test_read_through_caches_misses_as_not_found(clock):
+    cache = TTLCache(10, ttl=30, negative_ttl=5)
+    loads = []
+
+    def loader(key):
+        loads.append(key)
+        return None if key == "unknown" else f"row {key}"
+
+    assert cache.get_or_load("known", loader) == "row known"
+    assert cache.get_or_load("known", loader) == "row known"
+    assert cache.get_or_load("unknown", loader) is None
+    assert cache.get_or_load("unknown", loader) is None
+    assert loads == ["known", "unknown"]
+    assert cache.stats()["negative_hits"] == 1
+
+    clock[0] += 6
+    assert cache.get_or_load("unknown", loader) is None
+    assert loads == ["known", "unknown", "unknown"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidation_forces_a_reload():
+    cache = TTLCache(10)
+    version = ["old"]
+    cache.get_or_load(1, lambda key: version[0])
+    version[0] = "new"
+
+    assert cache.get_or_load(1, lambda key: version[0]) == "old"
+    cache.invalidate(1)
+    assert cache.get_or_load(1, lambda key: version[0]) == "new"
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_preload_with_the_database_down_starts_cold(monkeypatch):
+    @contextmanager
+    def unreachable():
+        raise psycopg2.OperationalError("connection refused")
+        yield
+
+    monkeypatch.setattr(data_queries.db_pool, "connection", unreachable)
+    data_queries.product_cache.clear()
+
+    data_queries.preload_products()
+
+    assert len(data_queries.product_cache) == 0
@@ -0,0 +1,90 @@
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import psycopg2
+import pytest
+from fastapi.testclient import TestClient
+
+import endpoints.data_queries as data_queries
+import main
+from services.db_pool import DatabasePool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.info = SimpleNamespace(transaction_status=psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = DatabasePool(min_size=0, max_size=1, checkout_timeout=0.05)
+    monkeypatch.setattr(pool, "_connect", FakeConnection)
+    pool.open()
+    yield pool
+    pool.close()
+
+
+def test_checkout_times_out_when_every_connection_is_in_use(pool):
+    with pool.connection() as first:
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+
+    # The slot is free again and the idle connection is reused
+    with pool.connection() as second:
+        assert second is first
+    stats = pool.stats()
+    assert (stats["timeouts"], stats["checkouts"], stats["in_use"], stats["idle"]) == (1, 2, 0, 1)
+
+
+def test_waiting_checkout_gets_the_returned_connection(pool):
+    pool.checkout_timeout = 5
+    checked_out, release = threading.Event(), threading.Event()
+    held = []
+
+    def hold():
+        with pool.connection() as conn:
+            held.append(conn)
+            checked_out.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    checked_out.wait()
+    threading.Timer(0.05, release.set).start()
+    with pool.connection() as conn:
+        assert conn is held[0]
+    holder.join()
+    assert pool.stats()["timeouts"] == 0
+
+
+def test_broken_connection_is_discarded(pool):
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as conn:
+            raise psycopg2.OperationalError("server closed the connection")
+
+    assert conn.closed
+    with pool.connection() as replacement:
+        assert replacement is not conn
+    assert pool.stats()["connections_discarded"] == 1
+
+
+def test_pool_timeout_is_returned_as_503(monkeypatch):
+    @contextmanager
+    def exhausted():
+        raise PoolTimeoutError("No database connection available within 5.0s")
+        yield
+
+    monkeypatch.setattr(data_queries.db_pool, "connection", exhausted)
+    data_queries.customer_cache.clear()
+
+    # No lifespan: the route only needs the (patched) pool
+    response = TestClient(main.app).get("/data/customers/1")
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "No database connection available within 5.0s"}
@@ -0,0 +1,121 @@
+import json
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+
+import endpoints.semantic_search as semantic_search
+from endpoints.semantic_search import SearchFilters, search_index
+from services.metadata_store import COLUMNS, META_FILE, MetadataStore, column_path
+
+CATEGORIES = ["Electronics", "Clothing", "Groceries", "Sports"]
+
+
+def write_metadata(directory, ids, categories, dates, unit_prices, committed=None):
+    columns = {
+        "ids": ids,
+        "category": categories,
+        "transaction_date": dates,
+        "unit_price": unit_prices,
+        "price": unit_prices,
+    }
+    for column, values in columns.items():
+        np.asarray(values, dtype=COLUMNS[column]).tofile(column_path(directory, column))
+    with open(os.path.join(directory, META_FILE), 'w') as f:
+        json.dump({"count": len(ids) if committed is None else committed, "categories": CATEGORIES}, f)
+
+
+def epoch(*date):
+    return int(datetime(*date, tzinfo=timezone.utc).timestamp())
+
+
+def test_matching_ids_applies_every_condition(tmp_path):
+    write_metadata(
+        tmp_path, ids=[1, 2, 3, 4], categories=[0, 0, 1, 0],
+        dates=[epoch(2024, 1, 1), epoch(2024, 2, 1), epoch(2024, 1, 15), epoch(2024, 3, 1)],
+        unit_prices=[10.0, 20.0, 30.0, 40.0],
+    )
+    store = MetadataStore.load(tmp_path)
+
+    assert store.matching_ids(category="electronics").tolist() == [1, 2, 4]
+    assert store.matching_ids(category="Toys").tolist() == []
+    # Dates are [date_from, date_to), prices inclusive at both ends
+    january = dict(date_from=datetime(2024, 1, 1, tzinfo=timezone.utc), date_to=datetime(2024, 2, 1, tzinfo=timezone.utc))
+    assert store.matching_ids(**january).tolist() == [1, 3]
+    assert store.matching_ids(min_price=20, max_price=40).tolist() == [2, 3, 4]
+    assert store.matching_ids(category="Electronics", max_price=20, **january).tolist() == [1]
+
+
+def test_load_keeps_latest_entry_and_committed_rows(tmp_path):
+    # ID 2 was updated and appended again; the last row was never committed
+    write_metadata(
+        tmp_path, ids=[1, 2, 3, 2, 9], categories=[0, 0, 0, 3, 3], dates=[0] * 5,
+        unit_prices=[1.0, 2.0, 3.0, 5.0, 9.0], committed=4,
+    )
+    store = MetadataStore.load(tmp_path)
+
+    assert store.ids.tolist() == [1, 2, 3]
+    assert store.matching_ids(category="Sports").tolist() == [2]
+    assert store.matching_ids(min_price=4).tolist() == [2]
+
+
+def make_filtered_index(directory, n=400, d=8, nlist=8):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, d)).astype('float32')
+    ids = np.arange(1, n + 1, dtype='int64')
+    index = faiss.IndexIDMap2(faiss.IndexIVFFlat(faiss.IndexFlatL2(d), d, nlist))
+    index.train(vectors)
+    index.add_with_ids(vectors, ids)
+
+    categories = ids % len(CATEGORIES)
+    write_metadata(directory, ids, categories, dates=np.zeros(n), unit_prices=ids.astype('float32'))
+    indices = SimpleNamespace(metadata=MetadataStore.load(directory))
+    return indices, index, vectors, ids, categories
+
+
+def exact_matching(query_vectors, vectors, ids, mask, k):
+    distances, positions = faiss.knn(query_vectors, vectors[mask], k)
+    return distances, ids[mask][positions]
+
+
+def test_selective_filter_is_answered_exactly(tmp_path, embedding_store):
+    indices, index, vectors, ids, categories = make_filtered_index(tmp_path)
+    store = embedding_store(ids, vectors)
+    queries = np.random.default_rng(1).standard_normal((3, vectors.shape[1])).astype('float32')
+    filters = SearchFilters(category="clothing", max_price=300)
+
+    # nprobe=1 would miss most matching rows; the exact pass over their side-store vectors does not
+    distances, result_ids = search_index(indices, index, queries, 5, nprobe=1, filters=filters, store=store)
+
+    mask = (categories == 1) & (ids <= 300)
+    expected_distances, expected_ids = exact_matching(queries, vectors, ids, mask, 5)
+    np.testing.assert_array_equal(result_ids, expected_ids)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+
+
+def test_filtered_approximate_search_is_widened_to_a_full_k(tmp_path, monkeypatch):
+    # Force the in-index path: IDSelector inside the IVF search, then a wider pass when it comes back short
+    monkeypatch.setattr(semantic_search, "FILTER_EXACT_SEARCH_MAX_ROWS", 0)
+    indices, index, vectors, ids, categories = make_filtered_index(tmp_path)
+    queries = np.random.default_rng(2).standard_normal((4, vectors.shape[1])).astype('float32')
+
+    # 20 matching rows over 8 inverted lists: one probed list cannot hold 10 of them
+    filters = SearchFilters(category="Sports", max_price=80)
+
+    _, result_ids = search_index(indices, index, queries, 10, nprobe=1, filters=filters)
+
+    # The wider pass probes every list, which for IVF-Flat is exact over the matching rows
+    _, expected_ids = exact_matching(queries, vectors, ids, (categories == 3) & (ids <= 80), 10)
+    np.testing.assert_array_equal(result_ids, expected_ids)
+
+
+def test_filter_matching_fewer_than_k_rows_pads_with_minus_one(tmp_path):
+    indices, index, vectors, _, _ = make_filtered_index(tmp_path)
+    filters = SearchFilters(min_price=398)
+
+    _, result_ids = search_index(indices, index, vectors[:1], 5, filters=filters)
+
+    assert sorted(result_ids[0, :3].tolist()) == [398, 399, 400]
+    assert result_ids[0, 3:].tolist() == [-1, -1]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from services.fusion import fuse_results
+
+
+def test_rrf_rewards_rows_found_by_several_indices():
+    results = {
+        "product": (np.array([0.1, 0.2, 0.3]), np.array([1, 2, 3])),
+        "time": (np.array([5.0, 6.0, np.inf]), np.array([3, 4, -1])),
+    }
+
+    ids, scores, ranks, distances = fuse_results(results, k=4, method="rrf", rrf_k=60)
+
+    # 3 is ranked by both sources, the rest by one; -1 padding is ignored and ties go to the lower ID
+    assert ids.tolist() == [3, 1, 2, 4]
+    np.testing.assert_allclose(scores, [1 / 63 + 1 / 61, 1 / 61, 1 / 62, 1 / 62])
+    assert ranks.tolist() == [[2, 0], [0, -1], [1, -1], [-1, 1]]
+    np.testing.assert_array_equal(distances[0], [0.3, 5.0])
+    assert np.isnan(distances[1, 1])
+
+
+def test_weights_scale_each_source():
+    results = {
+        "product": (np.array([0.0, 1.0]), np.array([1, 2])),
+        "financial": (np.array([0.0, 1.0]), np.array([2, 1])),
+    }
+
+    ids, _, _, _ = fuse_results(results, k=1, method="rrf", weights={"financial": 3.0})
+    assert ids.tolist() == [2]
+    ids, _, _, _ = fuse_results(results, k=1, method="rrf", weights={"product": 3.0})
+    assert ids.tolist() == [1]
+
+
+def test_weighted_fusion_min_max_scales_distances_per_source():
+    results = {
+        # Very different distance scales; both become similarities in [0, 1]
+        "product": (np.array([1.0, 2.0, 3.0]), np.array([10, 20, 30])),
+        "financial": (np.array([100.0, 500.0]), np.array([30, 20])),
+    }
+
+    ids, scores, _, _ = fuse_results(results, k=3, method="weighted")
+
+    assert ids.tolist() == [10, 30, 20]
+    np.testing.assert_allclose(scores, [1.0, 1.0, 0.5])
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        fuse_results({"product": (np.array([0.0]), np.array([1]))}, k=1, method="borda")
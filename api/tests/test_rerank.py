@@ -0,0 +1,68 @@
+import faiss
+import numpy as np
+
+import endpoints.semantic_search as semantic_search
+from endpoints.semantic_search import rerank_exact, search_index
+
+MAX_DISTANCE = np.finfo('float32').max
+
+
+def test_rerank_orders_candidates_by_exact_distance(embedding_store):
+    store = embedding_store([10, 20, 30, 40], [[3.0, 0.0], [1.0, 0.0], [2.0, 0.0], [0.5, 0.0]])
+    query = np.zeros((1, 2), dtype='float32')
+    # Coarse distances in the wrong order, as a quantised index might return them
+    distances = np.array([[0.1, 0.2, 0.3, 0.4]], dtype='float32')
+    ids = np.array([[10, 20, 30, 40]], dtype='int64')
+
+    reranked_distances, reranked_ids = rerank_exact(store, query, distances, ids, 3)
+
+    assert reranked_ids.tolist() == [[40, 20, 30]]
+    np.testing.assert_allclose(reranked_distances, [[0.25, 1.0, 4.0]])
+
+
+def test_rerank_keeps_index_distance_of_rows_missing_from_the_store(embedding_store):
+    store = embedding_store([1, 2], [[1.0], [2.0]])
+    query = np.zeros((1, 1), dtype='float32')
+    distances = np.array([[0.5, 9.0, 3.0, MAX_DISTANCE]], dtype='float32')
+    ids = np.array([[1, 2, 7, -1]], dtype='int64')
+
+    reranked_distances, reranked_ids = rerank_exact(store, query, distances, ids, 4)
+
+    # 7 has no stored vector and keeps 3.0; the -1 padding stays last
+    assert reranked_ids.tolist() == [[1, 7, 2, -1]]
+    np.testing.assert_allclose(reranked_distances, [[1.0, 3.0, 4.0, MAX_DISTANCE]])
+
+
+def make_sq8_index(n=2000, d=16):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, d)).astype('float32')
+    ids = np.arange(100, 100 + n, dtype='int64')
+    index = faiss.IndexIDMap2(faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_8bit))
+    index.train(vectors)
+    index.add_with_ids(vectors, ids)
+    return index, vectors, ids
+
+
+def test_quantised_search_is_reranked_to_exact_results(embedding_store):
+    index, vectors, ids = make_sq8_index()
+    store = embedding_store(ids, vectors)
+    queries = np.random.default_rng(1).standard_normal((8, vectors.shape[1])).astype('float32')
+
+    distances, result_ids = search_index(None, index, queries, 5, store=store)
+
+    expected_distances, positions = faiss.knn(queries, vectors, 5)
+    np.testing.assert_array_equal(result_ids, ids[positions])
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+
+
+def test_rerank_disabled_returns_index_distances(embedding_store, monkeypatch):
+    monkeypatch.setattr(semantic_search, "RERANK_ENABLED", False)
+    index, vectors, ids = make_sq8_index()
+    store = embedding_store(ids, vectors)
+    queries = vectors[:2]
+
+    distances, result_ids = search_index(None, index, queries, 5, store=store)
+
+    index_distances, index_ids = index.search(queries, 5)
+    np.testing.assert_array_equal(result_ids, index_ids)
+    np.testing.assert_array_equal(distances, index_distances)
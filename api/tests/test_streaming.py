@@ -0,0 +1,65 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import endpoints.semantic_search as semantic_search
+import main
+from services.db_pool import PoolTimeoutError
+from services.executors import stage_executor
+
+
+def events(body):
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        parsed.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return parsed
+
+
+@pytest.mark.parametrize("error, status", [
+    (HTTPException(status_code=422, detail="Unknown filter"), 422),
+    (PoolTimeoutError("No database connection available within 5.0s"), 503),
+    (RuntimeError("search failed"), 500),
+])
+def test_retrieval_errors_keep_their_status(monkeypatch, error, status):
+    async def find_similar_products(request, cached_embedding=None):
+        raise error
+
+    monkeypatch.setattr(semantic_search, "find_similar_products", find_similar_products)
+
+    response = TestClient(main.app).post("/search/product_search_stream", json={"query": f"failing {status}"})
+
+    assert response.status_code == status
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_generation_is_streamed_after_the_hits(monkeypatch):
+    related = {"indices": [7, 3], "distances": [0.1, 0.2]}
+
+    async def find_similar_products(request, cached_embedding=None):
+        return np.zeros((1, 4), dtype='float32'), related
+
+    async def build_product_context(similar_data):
+        return "context"
+
+    monkeypatch.setattr(semantic_search, "find_similar_products", find_similar_products)
+    monkeypatch.setattr(semantic_search, "build_product_context", build_product_context)
+    monkeypatch.setattr(semantic_search, "model_loader", SimpleNamespace(
+        stream_response=lambda query, context=None: iter(["Top ", "sellers"])
+    ))
+
+    stage_executor.start()
+    try:
+        response = TestClient(main.app).post("/search/product_search_stream", json={"query": "streamed answer"})
+    finally:
+        stage_executor.shutdown()
+
+    assert response.status_code == 200
+    streamed = events(response.text)
+    assert streamed[:3] == [("related_data", related), ("token", {"token": "Top "}), ("token", {"token": "sellers"})]
+    assert streamed[3][0] == "done"
+    assert streamed[3][1]["tokens"] == 2
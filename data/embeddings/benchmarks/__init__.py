@@ -0,0 +1 @@
+# Offline benchmarks for the vector store; run from data/embeddings, e.g. `python -m benchmarks.bench_ann`
@@ -0,0 +1,120 @@
+"""
+Recall-vs-latency benchmark for the product index types supported by VectorStore.
+
+Reads the product vectors from the vector store's binary side-store, builds each index
+type on them (training IVF/PQ on a sample, as ingestion does), and reports
+build time, serialized size, batch QPS, single-query latency and recall@k
+against exact flat search for a sweep of nprobe / efSearch values.
+
+    python -m benchmarks.bench_ann --max-vectors 200000 --queries 1000 --k 10
+
+IVF_NLIST, PQ_M, PQ_NBITS, HNSW_M and HNSW_EF_CONSTRUCTION are read from the
+environment, exactly as for ingestion.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from config import VECTOR_STORE_DIR, INDEX_TRAIN_SAMPLE_SIZE
+from embedding_store import EmbeddingStoreReader
+from vector_store import create_index, search_parameters
+
+NPROBE_SWEEP = [1, 4, 16, 64]
+EF_SEARCH_SWEEP = [16, 32, 64, 128, 256]
+
+
+def load_vectors(vector_store_dir, max_vectors):
+    """
+    Copy up to max_vectors product vectors (and their IDs) out of the memory-mapped side-store.
+    """
+    store = EmbeddingStoreReader(vector_store_dir, "product")
+    count = min(len(store), max_vectors)
+    return np.ascontiguousarray(store.vectors[:count]), np.array(store.ids[:count])
+
+
+def make_queries(vectors, num_queries, seed=42):
+    # Perturbed copies of stored vectors stand in for real query embeddings
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), size=num_queries, replace=False)
+    noise = rng.normal(scale=0.05, size=(num_queries, vectors.shape[1])).astype('float32')
+    return np.ascontiguousarray(vectors[picks] + noise)
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def build(index_type, vectors, ids, train_size, seed=42):
+    index = create_index(index_type, vectors.shape[1])
+    start = time.perf_counter()
+    if not index.is_trained:
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), size=min(train_size, len(vectors)), replace=False)]
+        index.train(sample)
+    index.add_with_ids(vectors, ids)
+    return index, time.perf_counter() - start
+
+
+def measure(index, queries, k, truth, params, single_queries):
+    start = time.perf_counter()
+    _, found = index.search(queries, k, params=params)
+    batch_seconds = time.perf_counter() - start
+
+    latencies = []
+    for query in queries[:single_queries]:
+        start = time.perf_counter()
+        index.search(query[None, :], k, params=params)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "recall": recall_at_k(found, truth),
+        "qps": len(queries) / batch_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000.0,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-store-dir", default=VECTOR_STORE_DIR or ".",
+                        help="directory holding the product embedding side-store")
+    parser.add_argument("--max-vectors", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--single-queries", type=int, default=200, help="queries timed one at a time")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--train-size", type=int, default=INDEX_TRAIN_SAMPLE_SIZE)
+    parser.add_argument("--types", default="flat,ivf_flat,ivf_pq,hnsw")
+    args = parser.parse_args()
+
+    vectors, ids = load_vectors(args.vector_store_dir, args.max_vectors)
+    queries = make_queries(vectors, args.queries)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]}, {len(queries)} queries, k={args.k}")
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth_positions = exact.search(queries, args.k)
+    truth = ids[truth_positions]
+
+    print(f"{'index':<10}{'param':<14}{'build s':>9}{'size MB':>10}{'recall':>8}{'qps':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for index_type in args.types.split(","):
+        index, build_seconds = build(index_type, vectors, ids, args.train_size)
+        size_mb = faiss.serialize_index(index).nbytes / 2 ** 20
+
+        if index_type in ("ivf_flat", "ivf_pq"):
+            sweep = [(f"nprobe={n}", search_parameters(index, nprobe=n)) for n in NPROBE_SWEEP]
+        elif index_type == "hnsw":
+            sweep = [(f"efSearch={ef}", search_parameters(index, ef_search=ef)) for ef in EF_SEARCH_SWEEP]
+        else:
+            sweep = [("exact", None)]
+
+        for label, params in sweep:
+            result = measure(index, queries, args.k, truth, params, args.single_queries)
+            print(f"{index_type:<10}{label:<14}{build_seconds:>9.1f}{size_mb:>10.1f}{result['recall']:>8.3f}"
+                  f"{result['qps']:>10.0f}{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Memory, QPS and recall@k of scalar-quantised product indices, with and without exact re-ranking.
+
+Reads the product vectors from the vector store's binary side-store, builds the
+flat (float32), fp16 and sq8 index types VectorStore supports, and reports each
+index's size and bytes per vector, batch QPS and recall@k against exact flat
+search. Quantised indices are also measured with the API's re-rank: fetch
+factor * k candidates, then re-order them by exact distance to the float32
+vectors read from the memory-mapped side-store.
+
+    python -m benchmarks.bench_quantized --max-vectors 200000 --queries 1000 --k 10
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from config import VECTOR_STORE_DIR
+from embedding_store import EmbeddingStoreReader
+from vector_store import create_index
+from benchmarks.bench_ann import make_queries, recall_at_k
+
+RERANK_FACTORS = [1, 2, 4, 8]
+
+
+def build(index_type, vectors, ids):
+    index = create_index(index_type, vectors.shape[1])
+    start = time.perf_counter()
+    if not index.is_trained:
+        index.train(vectors)
+    index.add_with_ids(vectors, ids)
+    return index, time.perf_counter() - start
+
+
+def rerank(store, queries, ids, k):
+    # Same computation as the API's exact re-rank (api/endpoints/semantic_search.py)
+    n, candidates = ids.shape
+    vectors, found = store.vectors_for_ids(ids.reshape(-1))
+    diffs = vectors.reshape(n, candidates, -1) - queries[:, None, :]
+    distances = np.einsum('ncd,ncd->nc', diffs, diffs)
+    distances[~(found.reshape(n, candidates) & (ids != -1))] = np.inf
+    order = np.argsort(distances, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(ids, order, axis=1)
+
+
+def measure(index, queries, k, truth, store=None, factor=1):
+    start = time.perf_counter()
+    _, found = index.search(queries, k * factor)
+    if store is not None:
+        found = rerank(store, queries, found, k)
+    seconds = time.perf_counter() - start
+    return recall_at_k(found, truth), len(queries) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vector-store-dir", default=VECTOR_STORE_DIR or ".",
+                        help="directory holding the product embedding side-store")
+    parser.add_argument("--max-vectors", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", default="flat,fp16,sq8")
+    args = parser.parse_args()
+
+    store = EmbeddingStoreReader(args.vector_store_dir, "product")
+    count = min(len(store), args.max_vectors)
+    vectors, ids = np.ascontiguousarray(store.vectors[:count]), np.array(store.ids[:count])
+    queries = make_queries(vectors, args.queries)
+    print(f"{count} vectors x {vectors.shape[1]}, {len(queries)} queries, k={args.k}")
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth_positions = exact.search(queries, args.k)
+    truth = ids[truth_positions]
+
+    print(f"{'index':<8}{'re-rank':<10}{'build s':>9}{'size MB':>10}{'B/vector':>10}{'recall':>8}{'qps':>10}")
+    for index_type in args.types.split(","):
+        index, build_seconds = build(index_type, vectors, ids)
+        size = faiss.serialize_index(index).nbytes
+        runs = [("none", None, 1)]
+        if index_type != "flat":
+            runs += [(f"{factor}x k", store, factor) for factor in RERANK_FACTORS]
+        for label, rerank_store, factor in runs:
+            recall, qps = measure(index, queries, args.k, truth, rerank_store, factor)
+            print(f"{index_type:<8}{label:<10}{build_seconds:>9.1f}{size / 2 ** 20:>10.1f}{size / count:>10.0f}"
+                  f"{recall:>8.3f}{qps:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,4 +11,41 @@ DB_HOST = os.getenv('DB_HOST')
 DB_PORT = os.getenv('DB_PORT')
 DB_NAME = os.getenv('DB_NAME')
 
-VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR')
\ No newline at end of file
+VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR')
+
+# Product index type: flat (exact), sq8 / fp16 (scalar-quantised, exhaustive), ivf_flat, ivf_pq or hnsw (approximate)
+PRODUCT_INDEX_TYPE = os.getenv('PRODUCT_INDEX_TYPE', 'flat')
+IVF_NLIST = int(os.getenv('IVF_NLIST', '1024'))
+PQ_M = int(os.getenv('PQ_M', '48'))  # sub-quantizers; must divide the embedding dimension
+PQ_NBITS = int(os.getenv('PQ_NBITS', '8'))
+HNSW_M = int(os.getenv('HNSW_M', '32'))
+HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', '200'))
+# Number of sampled rows used to train IVF/PQ indices before ingestion
+INDEX_TRAIN_SAMPLE_SIZE = int(os.getenv('INDEX_TRAIN_SAMPLE_SIZE', '65536'))
+
+# Bulk index build: indices stay in memory and are written every N batches (0 = only at the end)
+INDEX_CHECKPOINT_INTERVAL = int(os.getenv('INDEX_CHECKPOINT_INTERVAL', '100'))
+
+# full: rebuild every index from scratch; incremental: only embed rows changed since the last run's watermark
+INGESTION_MODE = os.getenv('INGESTION_MODE', 'full')
+
+# Ingestion pipeline: rows per DB fetch, encoder worker processes (default: one per core),
+# sentences per model.encode call, and batches buffered between stages
+INGESTION_FETCH_SIZE = int(os.getenv('INGESTION_FETCH_SIZE', '1000'))
+EMBEDDING_WORKERS = int(os.getenv('EMBEDDING_WORKERS', str(os.cpu_count() or 1)))
+EMBEDDING_ENCODE_BATCH_SIZE = int(os.getenv('EMBEDDING_ENCODE_BATCH_SIZE', '32'))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '4'))
+
+# Rows pulled per round trip by the server-side ingestion cursor
+INGESTION_ITERSIZE = int(os.getenv('INGESTION_ITERSIZE', '10000'))
+
+# Cache of product text embeddings keyed by a hash of the normalised text: each distinct text is
+# encoded once and reused for every row carrying it; persisted in VECTOR_STORE_DIR across runs
+EMBEDDING_CACHE_ENABLED = os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '100000'))
+
+# Where each transaction's product text comes from: its own category and description ("transactions"),
+# or those of its product in product_details, joined on product_id ("product_details"). Either way the
+# product index holds one vector per transaction; "product_details" only makes rows of the same
+# product share one text, so it is encoded once. It is not a deduplicated per-product index
+PRODUCT_EMBEDDING_SOURCE = os.getenv('PRODUCT_EMBEDDING_SOURCE', 'transactions')
@@ -0,0 +1,191 @@
+import json
+import os
+
+import numpy as np
+
+# Files making up one named store inside the vector store directory:
+#   {name}_embeddings.f32     float32 matrix, row-major, count x dimension
+#   {name}_ids.i64            int64 row ID (transaction_id) per vector
+#   {name}_texts.bin          utf-8 texts, concatenated (optional)
+#   {name}_text_offsets.i64   int64 end offset of each text in _texts.bin (optional)
+#   {name}_embeddings.json    metadata: dimension, committed row count, whether texts are stored
+
+
+def _paths(directory, name):
+    prefix = os.path.join(directory, name)
+    return {
+        "vectors": f"{prefix}_embeddings.f32",
+        "ids": f"{prefix}_ids.i64",
+        "texts": f"{prefix}_texts.bin",
+        "offsets": f"{prefix}_text_offsets.i64",
+        "meta": f"{prefix}_embeddings.json",
+    }
+
+
+def _read_meta(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class EmbeddingStoreWriter:
+    """
+    Append-only binary side-store for the vectors added to a FAISS index.
+
+    Rows become visible to readers only when commit() rewrites the metadata
+    file; anything appended after the last commit (e.g. before a crash) is
+    truncated away when the store is reopened. A store started from scratch
+    (reset, or no committed metadata) writes new files that commit() swaps in
+    with os.replace: readers may have the live files memory-mapped, and
+    truncating a mapped file under them kills them with SIGBUS.
+    """
+
+    def __init__(self, directory, name, dimension, with_texts=False, reset=False):
+        self.paths = _paths(directory, name)
+        self.name = name
+        self.dimension = dimension
+        self.with_texts = with_texts
+
+        meta = None if reset else _read_meta(self.paths["meta"])
+        if meta is not None and meta["dimension"] != dimension:
+            raise ValueError(f"{name} embedding store has dimension {meta['dimension']}, expected {dimension}")
+        self.count = meta["count"] if meta else 0
+        self.text_bytes = meta.get("text_bytes", 0) if meta else 0
+
+        # Final path -> new file written in its place, swapped in by the next commit()
+        self._replacements = {}
+        self._vectors = self._open(self.paths["vectors"], self.count * dimension * 4, meta is None)
+        self._ids = self._open(self.paths["ids"], self.count * 8, meta is None)
+        if with_texts:
+            self._texts = self._open(self.paths["texts"], self.text_bytes, meta is None)
+            self._offsets = self._open(self.paths["offsets"], self.count * 8, meta is None)
+
+    def _open(self, path, committed_size, fresh):
+        if fresh:
+            new_path = f"{path}.new"
+            self._replacements[path] = new_path
+            return open(new_path, 'wb')
+        # Drop the uncommitted tail so the file lines up with the committed count; readers
+        # only map committed rows, so shrinking to that size never pulls pages from under them
+        f = open(path, 'ab')
+        f.truncate(committed_size)
+        return f
+
+    def append(self, ids, embeddings, texts=None):
+        embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+        ids = np.ascontiguousarray(ids, dtype='int64')
+        if embeddings.ndim != 2 or embeddings.shape[1] != self.dimension:
+            raise ValueError(f"Expected (n, {self.dimension}) embeddings for {self.name}, got {embeddings.shape}")
+        if len(ids) != len(embeddings):
+            raise ValueError(f"Got {len(ids)} ids for {len(embeddings)} {self.name} embeddings")
+
+        self._vectors.write(embeddings.tobytes())
+        self._ids.write(ids.tobytes())
+        if self.with_texts:
+            if texts is None or len(texts) != len(embeddings):
+                raise ValueError(f"{self.name} embedding store needs one text per embedding")
+            encoded = [text.encode('utf-8') for text in texts]
+            ends = self.text_bytes + np.cumsum([len(b) for b in encoded], dtype='int64')
+            self._texts.write(b"".join(encoded))
+            self._offsets.write(ends.tobytes())
+            if len(ends):
+                self.text_bytes = int(ends[-1])
+        self.count += len(embeddings)
+
+    def commit(self):
+        """
+        Flush appended rows and publish the new row count atomically.
+        """
+        handles = [self._vectors, self._ids] + ([self._texts, self._offsets] if self.with_texts else [])
+        for f in handles:
+            f.flush()
+            os.fsync(f.fileno())
+        # Open handles keep appending to the swapped-in files; readers of the old ones keep their inodes
+        for path, new_path in self._replacements.items():
+            os.replace(new_path, path)
+        self._replacements = {}
+
+        meta = {
+            "dimension": self.dimension,
+            "count": self.count,
+            "dtype": "float32",
+            "with_texts": self.with_texts,
+            "text_bytes": self.text_bytes,
+        }
+        tmp_file = f"{self.paths['meta']}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_file, self.paths["meta"])
+
+    def close(self):
+        self.commit()
+        for f in [self._vectors, self._ids] + ([self._texts, self._offsets] if self.with_texts else []):
+            f.close()
+
+
+class EmbeddingStoreReader:
+    """
+    Zero-copy view over a committed embedding store: vectors and ids are
+    np.memmap arrays backed by the page cache, texts are decoded on demand.
+    """
+
+    def __init__(self, directory, name):
+        self.paths = _paths(directory, name)
+        self.name = name
+        meta = _read_meta(self.paths["meta"])
+        if meta is None:
+            raise FileNotFoundError(f"No {name} embedding store in {directory}")
+
+        self.dimension = meta["dimension"]
+        self.count = meta["count"]
+        self.vectors = self._memmap(self.paths["vectors"], 'float32', (self.count, self.dimension))
+        self.ids = self._memmap(self.paths["ids"], 'int64', (self.count,))
+        self.with_texts = meta["with_texts"]
+        if self.with_texts:
+            self._offsets = self._memmap(self.paths["offsets"], 'int64', (self.count,))
+            self._texts = self._memmap(self.paths["texts"], 'uint8', (meta["text_bytes"],))
+        self._sorted = None
+
+    @staticmethod
+    def _memmap(path, dtype, shape):
+        # np.memmap cannot map zero bytes
+        if int(np.prod(shape)) == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self):
+        return self.count
+
+    def text(self, position):
+        if not self.with_texts:
+            raise ValueError(f"{self.name} embedding store has no texts")
+        start = int(self._offsets[position - 1]) if position > 0 else 0
+        end = int(self._offsets[position])
+        return bytes(self._texts[start:end]).decode('utf-8')
+
+    def positions_for_ids(self, ids):
+        """
+        Map row IDs to row positions (-1 where absent). If an ID was appended
+        more than once, the most recent row wins.
+        """
+        if self._sorted is None:
+            order = np.argsort(self.ids, kind='stable')
+            self._sorted = (order, np.asarray(self.ids)[order])
+        order, sorted_ids = self._sorted
+
+        ids = np.asarray(ids, dtype='int64')
+        positions = np.searchsorted(sorted_ids, ids, side='right') - 1
+        found = positions >= 0
+        found[found] = sorted_ids[positions[found]] == ids[found]
+        return np.where(found, order[np.clip(positions, 0, None)], -1) if len(sorted_ids) else np.full(len(ids), -1)
+
+    def vectors_for_ids(self, ids):
+        """
+        Gather the stored vectors for the given row IDs (zeros where absent), plus a found mask.
+        """
+        positions = self.positions_for_ids(ids)
+        found = positions >= 0
+        vectors = np.zeros((len(positions), self.dimension), dtype='float32')
+        vectors[found] = self.vectors[positions[found]]
+        return vectors, found
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Per-process model, loaded once by the pool initializer
+_model = None
+
+
+def _init_worker(model_name, torch_threads):
+    global _model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # Split the cores between the workers instead of every worker using all of them
+    torch.set_num_threads(torch_threads)
+    _model = SentenceTransformer(model_name)
+
+
+def _encode(texts, batch_size):
+    start = time.perf_counter()
+    embeddings = _model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    return np.asarray(embeddings, dtype='float32'), time.perf_counter() - start
+
+
+class EncoderPool:
+    """
+    Pool of worker processes, each holding its own SentenceTransformer, so
+    that encoding uses every core. submit() returns a future resolving to
+    (embeddings, seconds spent encoding in the worker).
+    """
+
+    def __init__(self, model_name, workers=None, batch_size=32):
+        self.workers = max(1, workers or os.cpu_count())
+        self.batch_size = batch_size
+        torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        # spawn: forking a parent that already ran torch/OpenMP code can deadlock the children
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, torch_threads),
+        )
+        # Start the workers and load their models now, so start-up is not billed to the first batches
+        start = time.perf_counter()
+        self.encode(["warm-up"] * self.workers)
+        print(f"Started {self.workers} encoder workers ({torch_threads} torch threads each, batch size {batch_size}) "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    def submit(self, texts):
+        return self._executor.submit(_encode, texts, self.batch_size)
+
+    def encode(self, texts):
+        """
+        Encode a list of texts synchronously, spread across all workers.
+        """
+        chunk = max(1, -(-len(texts) // self.workers))
+        futures = [self.submit(texts[i:i + chunk]) for i in range(0, len(texts), chunk)]
+        parts = [future.result()[0] for future in futures]
+        return np.concatenate(parts) if parts else np.empty((0, 0), dtype='float32')
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
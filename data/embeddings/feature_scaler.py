@@ -0,0 +1,84 @@
+import json
+import os
+
+import numpy as np
+
+# Stored next to the indices; the API loads it to normalise raw query values the same way
+FEATURE_SCALERS_FILE = 'feature_scalers.json'
+
+# Raw columns behind each numeric index, in vector order
+FEATURES = {
+    "financial": ["quantity", "unit_price", "price", "discount_applied"],
+    "time": ["transaction_date"],
+}
+# SQL expression per feature; timestamps are standardised as epoch seconds
+FEATURE_EXPRESSIONS = {
+    "quantity": "quantity",
+    "unit_price": "unit_price",
+    "price": "price",
+    "discount_applied": "discount_applied",
+    "transaction_date": "EXTRACT(EPOCH FROM transaction_date)",
+}
+
+
+class FeatureScaler:
+    """
+    Standardises one index's raw features with fixed statistics computed over
+    the whole table, so every batch (and every query) lands in the same space.
+    """
+
+    def __init__(self, features, mean, scale):
+        self.features = list(features)
+        self.mean = np.asarray(mean, dtype='float64')
+        # Constant columns are left unscaled, as StandardScaler does
+        self.scale = np.where(np.asarray(scale, dtype='float64') > 0, scale, 1.0)
+
+    def transform(self, values):
+        # float64 until after centring: epoch seconds do not fit float32 precision
+        values = np.asarray(values, dtype='float64').reshape(-1, len(self.features))
+        return ((values - self.mean) / self.scale).astype('float32')
+
+    def to_dict(self):
+        return {"features": self.features, "mean": self.mean.tolist(), "scale": self.scale.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["features"], data["mean"], data["scale"])
+
+
+def fit_feature_scalers(conn):
+    """
+    Compute the global mean and population standard deviation of every feature in one SQL pass.
+    """
+    columns = [name for features in FEATURES.values() for name in features]
+    aggregates = ", ".join(
+        f"AVG({FEATURE_EXPRESSIONS[name]}), STDDEV_POP({FEATURE_EXPRESSIONS[name]})" for name in columns
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT {aggregates} FROM retail_transactions")
+        row = cursor.fetchone()
+    stats = {name: (float(row[2 * i] or 0.0), float(row[2 * i + 1] or 0.0)) for i, name in enumerate(columns)}
+
+    scalers = {}
+    for index_type, features in FEATURES.items():
+        scalers[index_type] = FeatureScaler(
+            features, [stats[name][0] for name in features], [stats[name][1] for name in features]
+        )
+        print(f"Fitted {index_type} scaler: mean={scalers[index_type].mean.tolist()} scale={scalers[index_type].scale.tolist()}")
+    return scalers
+
+
+def save_feature_scalers(directory, scalers):
+    path = os.path.join(directory, FEATURE_SCALERS_FILE)
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump({index_type: scaler.to_dict() for index_type, scaler in scalers.items()}, f)
+    os.replace(tmp_file, path)
+
+
+def load_feature_scalers(directory):
+    path = os.path.join(directory, FEATURE_SCALERS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return {index_type: FeatureScaler.from_dict(data) for index_type, data in json.load(f).items()}
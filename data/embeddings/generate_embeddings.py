@@ -1,113 +1,563 @@
 import os
 import json
+import queue
+import resource
+import threading
+import faiss
 import psycopg2
 import numpy as np
-import gc
-from sentence_transformers import SentenceTransformer
-from sklearn.preprocessing import StandardScaler
+import time
+from collections import defaultdict, deque
 from vector_store import VectorStore
-from config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, VECTOR_STORE_DIR
+from feature_scaler import fit_feature_scalers, save_feature_scalers, load_feature_scalers
+from encoder_pool import EncoderPool
+from text_embedding_cache import TextEmbeddingCache, text_key
+from config import (
+    DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, VECTOR_STORE_DIR, INDEX_TRAIN_SAMPLE_SIZE, INDEX_CHECKPOINT_INTERVAL,
+    INGESTION_MODE, INGESTION_FETCH_SIZE, EMBEDDING_WORKERS, EMBEDDING_ENCODE_BATCH_SIZE, PIPELINE_QUEUE_SIZE,
+    INGESTION_ITERSIZE, EMBEDDING_CACHE_ENABLED, EMBEDDING_CACHE_MAX_ENTRIES, PRODUCT_EMBEDDING_SOURCE
+)
 from datetime import datetime
 
-# Load environment variables
-# VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR', './vector_store_data')
-PRODUCT_EMBEDDINGS_FILE = os.path.join(VECTOR_STORE_DIR, 'retail_transactions_product_embeddings.json')
-FINANCIAL_EMBEDDINGS_FILE = os.path.join(VECTOR_STORE_DIR, 'retail_transactions_financial_embeddings.json')
-TIME_EMBEDDINGS_FILE = os.path.join(VECTOR_STORE_DIR, 'retail_transactions_time_embeddings.json')
+# High-water mark of the last completed run, used by incremental mode
+WATERMARK_FILE = os.path.join(VECTOR_STORE_DIR, 'ingestion_watermark.json')
+# Progress of the run in flight, written at every index checkpoint so a crashed run can resume
+CHECKPOINT_FILE = os.path.join(VECTOR_STORE_DIR, 'ingestion_checkpoint.json')
+# Build generation and whether it finished; the API's index watcher only reloads complete builds
+BUILD_MARKER_FILE = os.path.join(VECTOR_STORE_DIR, 'index_build.json')
+# Product text embeddings reused across runs
+TEXT_EMBEDDING_CACHE_FILE = os.path.join(VECTOR_STORE_DIR, 'text_embedding_cache.npz')
 
-# Initialize the model for text embeddings
+# Model used for text embeddings (loaded in each encoder worker process)
 model_name = 'all-MiniLM-L6-v2'  # Lightweight model for embedding generation
-model = SentenceTransformer(model_name)
-
-# Connect to PostgreSQL
-conn = psycopg2.connect(
-    dbname=DB_NAME,
-    user=DB_USER,
-    password=DB_PASS,
-    host=DB_HOST,
-    port=DB_PORT
-)
-cursor = conn.cursor()
-
-# Generator function to fetch data in chunks
-def fetch_data_in_batches(batch_size=1000):
-    cursor.execute("""
-        SELECT product_category, product_description, quantity, unit_price, price, discount_applied, transaction_date 
-        FROM retail_transactions
-    """)
-    while True:
-        rows = cursor.fetchmany(batch_size)
-        if not rows:
-            break
-        yield rows
 
-# Generate and store embeddings for each batch
-def process_and_store_embeddings(batch_size=1000):
-    scaler = StandardScaler()
+# Connect to PostgreSQL. Done in main() rather than at import time, because the
+# spawned encoder workers re-import this module.
+def connect():
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASS,
+        host=DB_HOST,
+        port=DB_PORT
+    )
+
+# Generator function to fetch data in chunks; with a watermark only new or updated rows are read,
+# and resume_after skips the rows a crashed run already checkpointed
+def fetch_data_in_batches(conn, batch_size=1000, watermark=None, resume_after=None, itersize=INGESTION_ITERSIZE):
+    conditions, params = [], []
+    if watermark is not None:
+        conditions.append("(transaction_id > %s OR updated_at > %s)")
+        params += [watermark["last_transaction_id"], watermark["run_started_at"]]
+    if resume_after is not None:
+        conditions.append("transaction_id > %s")
+        params.append(resume_after)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # A named cursor lives on the server: rows are streamed itersize at a time
+    # instead of the whole result set being materialised in this process
+    with conn.cursor(name="ingestion_reader") as cursor:
+        cursor.itersize = itersize
+        cursor.execute(f"""
+            SELECT transaction_id, product_category, product_description, quantity, unit_price, price, discount_applied, transaction_date,
+                   product_id
+            FROM retail_transactions
+            {where}
+            ORDER BY transaction_id
+        """, params)
+        rows = []
+        for row in cursor:
+            rows.append(row)
+            if len(rows) == batch_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+def load_watermark():
+    if not os.path.exists(WATERMARK_FILE):
+        return None
+    with open(WATERMARK_FILE, 'r') as f:
+        return json.load(f)
+
+def save_watermark(last_transaction_id, run_started_at):
+    tmp_file = f"{WATERMARK_FILE}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump({"last_transaction_id": last_transaction_id, "run_started_at": run_started_at.isoformat()}, f)
+    os.replace(tmp_file, WATERMARK_FILE)
+    print(f"Watermark advanced to transaction_id {last_transaction_id}")
 
-    for batch_idx, rows in enumerate(fetch_data_in_batches(batch_size=batch_size)):
-        # Prepare product-related text data
-        product_texts = [f"{row[0]} {row[1]}" for row in rows]
+def write_build_marker(marker):
+    tmp_file = f"{BUILD_MARKER_FILE}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(marker, f)
+    os.replace(tmp_file, BUILD_MARKER_FILE)
 
-        # Generate product embeddings in batches
-        print(f"Generating product embeddings for batch {batch_idx}...")
-        product_embeddings = model.encode(product_texts, batch_size=32, convert_to_numpy=True)
-        print(f"Product embeddings for batch {batch_idx} generated.")
+# Written before the first change to the store, so a running API ignores files rewritten mid-build
+def start_build():
+    os.makedirs(VECTOR_STORE_DIR, exist_ok=True)
+    previous = None
+    if os.path.exists(BUILD_MARKER_FILE):
+        with open(BUILD_MARKER_FILE, 'r') as f:
+            previous = json.load(f)
+    generation = (previous or {}).get("generation", 0) + 1
+    write_build_marker({"generation": generation, "complete": False, "started_at": datetime.now().isoformat()})
+    return generation
 
-        # Process financial data and normalize
-        financial_data = np.array(
-            [[row[2], row[3], row[4], row[5]] for row in rows], dtype='float32'
+# Written last, once every index, side-store and metadata file of the build is saved
+def complete_build(generation, last_transaction_id):
+    write_build_marker({
+        "generation": generation,
+        "complete": True,
+        "completed_at": datetime.now().isoformat(),
+        "last_transaction_id": last_transaction_id,
+    })
+    print(f"Build generation {generation} complete")
+
+def load_checkpoint():
+    if not os.path.exists(CHECKPOINT_FILE):
+        return None
+    with open(CHECKPOINT_FILE, 'r') as f:
+        return json.load(f)
+
+def save_checkpoint(vector_store, last_transaction_id, run_started_at, watermark):
+    checkpoint = {
+        "last_transaction_id": last_transaction_id,
+        "run_started_at": run_started_at.isoformat(),
+        "watermark": watermark,
+        "counts": vector_store.counts(),
+    }
+    tmp_file = f"{CHECKPOINT_FILE}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_file, CHECKPOINT_FILE)
+    print(f"Checkpoint saved after transaction_id {last_transaction_id}")
+
+def clear_checkpoint():
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+# Indices saved after the checkpoint file was last written may hold rows past it; drop them before resuming
+def discard_uncheckpointed(vector_store, checkpoint):
+    if vector_store.counts() != checkpoint["counts"]:
+        vector_store.remove_ids(faiss.IDSelectorRange(checkpoint["last_transaction_id"] + 1, np.iinfo('int64').max))
+
+# Reopen the store of an interrupted run at its checkpoint, or None when it cannot resume:
+# rows saved after the checkpoint have to be dropped, which HNSW indices cannot do
+def reopen_for_resume(checkpoint, vector_store_dir=VECTOR_STORE_DIR):
+    vector_store = VectorStore(vector_store_dir, bulk=True)
+    if vector_store.counts() != checkpoint["counts"] and not vector_store.supports_removal():
+        vector_store.close()
+        return None
+    discard_uncheckpointed(vector_store, checkpoint)
+    return vector_store
+
+# Whether retail_transactions was truncated (reloaded, restarting its IDs) after the given run start;
+# databases created before init.sql logged truncations cannot tell and report False
+def reloaded_since(conn, run_started_at):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('retail_transactions_truncations') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return False
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM retail_transactions_truncations WHERE truncated_at > %s)", (run_started_at,)
         )
-        financial_embeddings = scaler.fit_transform(financial_data)
-        print(f"Financial embeddings for batch {batch_idx} generated and normalized.")
+        return cursor.fetchone()[0]
 
-        # Process time data and normalize
-        time_data = np.array(
-            [[datetime.timestamp(row[6])] for row in rows], dtype='float32'
+# IDs whose vectors are stale: rows updated or deleted since the last run
+def fetch_stale_ids(conn, watermark):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT transaction_id FROM retail_transactions WHERE transaction_id <= %s AND updated_at > %s",
+            (watermark["last_transaction_id"], watermark["run_started_at"])
+        )
+        updated = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT transaction_id FROM retail_transactions_deletions WHERE deleted_at > %s",
+            (watermark["run_started_at"],)
         )
-        time_embeddings = scaler.fit_transform(time_data)
-        print(f"Time embeddings for batch {batch_idx} generated and normalized.")
+        deleted = [row[0] for row in cursor.fetchall()]
+    print(f"{len(updated)} updated and {len(deleted)} deleted rows since the last run.")
+    return np.unique(np.array(updated + deleted, dtype='int64'))
+
+# Train an approximate (IVF/PQ) or quantised (sq8) product index on a random sample before any vectors are added
+def train_product_index(conn, vector_store, encoder_pool, sample_size=INDEX_TRAIN_SAMPLE_SIZE):
+    if not vector_store.needs_training("product"):
+        return
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT product_category, product_description FROM retail_transactions ORDER BY random() LIMIT %s",
+            (sample_size,)
+        )
+        sample_texts = [f"{row[0]} {row[1]}" for row in cursor.fetchall()]
+    print(f"Generating {len(sample_texts)} sample product embeddings for index training...")
+    sample_embeddings = encoder_pool.encode(sample_texts)
+    vector_store.train_index("product", sample_embeddings)
+
+# product_details text per product_id, for PRODUCT_EMBEDDING_SOURCE=product_details
+def fetch_catalog_texts(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT product_id, product_category, product_description FROM product_details")
+        return {row[0]: f"{row[1]} {row[2]}" for row in cursor.fetchall()}
+
+# Encode each distinct product_details text once up front, so every transaction of a product is a cache hit
+def encode_catalog(encoder_pool, text_cache, catalog_texts):
+    texts = {text_key(text): text for text in catalog_texts.values()}
+    missing = [key for key in texts if text_cache.get(key) is None]
+    start = time.perf_counter()
+    embeddings = encoder_pool.encode([texts[key] for key in missing])
+    for key, embedding in zip(missing, embeddings):
+        text_cache.put(key, embedding)
+    print(f"product_details: {len(catalog_texts)} products, {len(texts)} distinct texts, {len(missing)} encoded "
+          f"in {time.perf_counter() - start:.1f}s")
+
+# Split a fetched batch into the arrays each index needs
+def prepare_batch(batch_idx, rows, catalog_texts=None):
+    return {
+        "batch_idx": batch_idx,
+        # transaction_id is used as the vector ID in every index
+        "row_ids": np.array([row[0] for row in rows], dtype='int64'),
+        # Prepare product-related text data; with product_details texts each row takes its
+        # product's text, falling back to its own for products missing from product_details
+        "product_texts": [
+            catalog_texts.get(row[8], f"{row[1]} {row[2]}") if catalog_texts else f"{row[1]} {row[2]}" for row in rows
+        ],
+        # Raw numeric features, kept in float64 until they are standardised
+        "financial_data": np.array([[row[3], row[4], row[5], row[6]] for row in rows], dtype='float64'),
+        "time_data": np.array([[datetime.timestamp(row[7])] for row in rows], dtype='float64'),
+        # Filterable attributes for the metadata column store
+        "categories": [row[1] for row in rows],
+        "unit_prices": np.array([row[4] for row in rows], dtype='float32'),
+        "prices": np.array([row[5] for row in rows], dtype='float32'),
+    }
+
+# Bounded-queue helpers: block for backpressure, but give up once another stage has failed
+def _put(q, item, stop, stats):
+    start = time.perf_counter()
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            break
+        except queue.Full:
+            continue
+    stats["blocked"] += time.perf_counter() - start
+
+def _get(q, stop, stats):
+    start = time.perf_counter()
+    item = None
+    while not stop.is_set():
+        try:
+            item = q.get(timeout=0.1)
+            break
+        except queue.Empty:
+            continue
+    stats["starved"] += time.perf_counter() - start
+    return item
+
+def _run_stage(name, target, args, stop, errors):
+    def run():
+        try:
+            target(*args)
+        except BaseException as e:
+            print(f"Ingestion {name} stage failed: {e}")
+            errors.append(e)
+            stop.set()
+    thread = threading.Thread(target=run, name=f"ingestion-{name}", daemon=True)
+    thread.start()
+    return thread
+
+# Stage 1: read batches from PostgreSQL
+def read_stage(conn, batch_size, watermark, resume_after, catalog_texts, out_queue, stop, stats):
+    fetch_start = time.perf_counter()
+    batches = fetch_data_in_batches(conn, batch_size=batch_size, watermark=watermark, resume_after=resume_after)
+    for batch_idx, rows in enumerate(batches):
+        batch = prepare_batch(batch_idx, rows, catalog_texts)
+        stats["busy"] += time.perf_counter() - fetch_start
+        stats["rows"] += len(rows)
+        stats["max_id"] = max(stats["max_id"], int(batch["row_ids"][-1]))
+        _put(out_queue, batch, stop, stats)
+        if stop.is_set():
+            return
+        fetch_start = time.perf_counter()
+    _put(out_queue, None, stop, stats)
+
+# Stage 2: fan product texts out to the encoder processes, forwarding results in batch order.
+# With a text cache only texts not seen before are sent, once each, even across batches in flight.
+def encode_stage(encoder_pool, in_queue, out_queue, stop, stats, max_in_flight, text_cache=None):
+    in_flight = deque()
+    # Texts submitted by a batch still in flight; later batches wait for its result instead of re-encoding
+    pending = set()
+
+    def submit(batch):
+        texts = batch["product_texts"]
+        if text_cache is None:
+            return {"future": encoder_pool.submit(texts)}
+        keys = [text_key(text) for text in texts]
+        known, new = {}, {}
+        for key, text in zip(keys, texts):
+            if key in known or key in new or key in pending:
+                continue
+            vector = text_cache.get(key)
+            if vector is not None:
+                known[key] = vector
+            else:
+                new[key] = text
+        pending.update(new)
+        future = encoder_pool.submit(list(new.values())) if new else None
+        return {"future": future, "keys": keys, "known": known, "new": list(new)}
+
+    def resolve(batch, job):
+        if "keys" not in job:
+            embeddings, seconds = job["future"].result()
+            return embeddings, seconds, len(embeddings)
+
+        vectors, seconds, encoded = job["known"], 0.0, len(job["new"])
+        if job["future"] is not None:
+            fresh, seconds = job["future"].result()
+            for key, vector in zip(job["new"], fresh):
+                vector = vector.copy()
+                text_cache.put(key, vector)
+                vectors[key] = vector
+                pending.discard(key)
+        for key, text in zip(job["keys"], batch["product_texts"]):
+            if key in vectors:
+                continue
+            # Encoded by an earlier batch, which was forwarded (and cached its results) first
+            vector = text_cache.get(key)
+            if vector is None:
+                # Already evicted again: only possible with a cache smaller than the batches in flight
+                (vector,), extra_seconds = encoder_pool.submit([text]).result()
+                text_cache.put(key, vector)
+                seconds += extra_seconds
+                encoded += 1
+            vectors[key] = vector
+        return np.stack([vectors[key] for key in job["keys"]]), seconds, encoded
+
+    def forward_oldest():
+        batch, job = in_flight.popleft()
+        embeddings, seconds, encoded = resolve(batch, job)
+        stats["busy"] += seconds
+        stats["rows"] += len(embeddings)
+        stats["encoded_texts"] += encoded
+        print(f"Product embeddings for batch {batch['batch_idx']} generated ({encoded} of {len(embeddings)} texts encoded).")
+        _put(out_queue, (batch, embeddings), stop, stats)
+
+    while True:
+        batch = _get(in_queue, stop, stats)
+        if batch is None:
+            break
+        in_flight.append((batch, submit(batch)))
+        while in_flight and (len(in_flight) >= max_in_flight or _job_done(in_flight[0][1])):
+            forward_oldest()
+    while in_flight and not stop.is_set():
+        forward_oldest()
+    _put(out_queue, None, stop, stats)
+
+def _job_done(job):
+    return job["future"] is None or job["future"].done()
+
+# Stage 3: normalise the numeric features and add everything to the in-memory indices
+def write_stage(vector_store, scalers, in_queue, stop, stats, checkpoint_interval, on_checkpoint):
+    while True:
+        item = _get(in_queue, stop, stats)
+        if item is None:
+            break
+        batch, product_embeddings = item
+        stage_start = time.perf_counter()
+        batch_idx = batch["batch_idx"]
+
+        # Normalize financial and time data with the global statistics, identically for every batch
+        financial_embeddings = scalers["financial"].transform(batch["financial_data"])
+        time_embeddings = scalers["time"].transform(batch["time_data"])
 
         # Save and store the embeddings for this batch
-        save_embeddings(batch_idx, product_texts, product_embeddings, financial_embeddings, time_embeddings)
+        save_embeddings(vector_store, batch_idx, batch["row_ids"], batch["product_texts"],
+                        product_embeddings, financial_embeddings, time_embeddings)
+        vector_store.add_metadata(batch["row_ids"], batch["categories"], batch["time_data"][:, 0],
+                                  batch["unit_prices"], batch["prices"])
         print(f"Embeddings for batch {batch_idx} saved.")
 
-        # Perform garbage collection to free memory
-        del product_embeddings, financial_embeddings, time_embeddings, product_texts
-        gc.collect()
+        # Periodically persist the in-memory indices so a crash does not lose the whole build
+        if checkpoint_interval and (batch_idx + 1) % checkpoint_interval == 0:
+            vector_store.save()
+            if on_checkpoint is not None:
+                on_checkpoint(int(batch["row_ids"][-1]))
+        stats["busy"] += time.perf_counter() - stage_start
+        stats["rows"] += len(batch["row_ids"])
+
+# Generate and store embeddings with the reader, encoder pool and writer running concurrently
+def process_and_store_embeddings(conn, vector_store, encoder_pool, scalers, batch_size=INGESTION_FETCH_SIZE,
+                                 checkpoint_interval=INDEX_CHECKPOINT_INTERVAL, watermark=None,
+                                 queue_size=PIPELINE_QUEUE_SIZE, resume_after=None, on_checkpoint=None,
+                                 text_cache=None, catalog_texts=None):
+    stats = {stage: defaultdict(float) for stage in ("read", "encode", "write")}
+    encode_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    run_start = time.perf_counter()
+
+    threads = [
+        _run_stage("read", read_stage, (conn, batch_size, watermark, resume_after, catalog_texts, encode_queue, stop, stats["read"]), stop, errors),
+        _run_stage("write", write_stage, (vector_store, scalers, write_queue, stop, stats["write"], checkpoint_interval, on_checkpoint), stop, errors),
+    ]
+    try:
+        # Enough batches in flight to keep every worker busy while the writer catches up
+        encode_stage(encoder_pool, encode_queue, write_queue, stop, stats["encode"], encoder_pool.workers + queue_size, text_cache)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+    # Final atomic write of the completed indices
+    stage_start = time.perf_counter()
+    vector_store.save()
+    final_save = time.perf_counter() - stage_start
+
+    report_timings(stats, encoder_pool.workers, final_save, time.perf_counter() - run_start)
+    report_dedup(stats["encode"], encoder_pool.workers)
+    last_transaction_id = max(watermark["last_transaction_id"] if watermark else 0, resume_after or 0)
+    return max(last_transaction_id, int(stats["read"]["max_id"]))
 
-# Save embeddings to JSON and add to vector store
-def save_embeddings(batch_idx, product_texts, product_embeddings, financial_embeddings, time_embeddings):
-    # Create vector store instance
-    vector_store = VectorStore(VECTOR_STORE_DIR)
+# Print per-stage throughput; the stage with the lowest rows/sec bounds the pipeline
+def report_timings(stats, workers, final_save, total_seconds):
+    total_rows = int(stats["write"]["rows"])
+    print(f"Processed {total_rows} rows in {total_seconds:.1f}s ({total_rows / max(total_seconds, 1e-9):.0f} rows/sec)")
+    print(f"  {'stage':<8}{'busy s':>10}{'rows/sec':>12}{'blocked s':>11}{'starved s':>11}")
+    for stage, stage_stats in stats.items():
+        # Encoder busy time is summed over the workers, so divide it back to wall-clock capacity
+        busy = stage_stats["busy"] / workers if stage == "encode" else stage_stats["busy"]
+        print(f"  {stage:<8}{busy:>10.1f}{stage_stats['rows'] / max(busy, 1e-9):>12.0f}"
+              f"{stage_stats['blocked']:>11.1f}{stage_stats['starved']:>11.1f}")
+    print(f"  final save {final_save:.1f}s")
 
+# Rows per encoded text, and the encoder time the reused embeddings would otherwise have cost
+def report_dedup(encode_stats, workers):
+    rows, encoded = int(encode_stats["rows"]), int(encode_stats["encoded_texts"])
+    if not rows:
+        return
+    if not encoded:
+        print(f"Product texts: {rows} rows, all served from the embedding cache")
+        return
+    seconds_per_text = encode_stats["busy"] / encoded
+    saved = (rows - encoded) * seconds_per_text
+    print(f"Product texts: {rows} rows, {encoded} encoded, dedup ratio {rows / max(encoded, 1):.1f}x; "
+          f"saved ~{saved:.1f} encoder-seconds (~{saved / workers:.1f}s wall with {workers} workers)")
+
+# ru_maxrss is in KiB on Linux; RUSAGE_CHILDREN reports the largest encoder worker once the pool has exited
+def report_peak_rss():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"Peak RSS: {own:.0f} MB ingestion process, {workers:.0f} MB largest encoder worker")
+
+# Add embeddings to the vector store (indices plus binary side-stores)
+def save_embeddings(vector_store, batch_idx, row_ids, product_texts, product_embeddings, financial_embeddings, time_embeddings):
     # Store product-related embeddings in the product index
-    vector_store.add_embeddings("product", product_texts, product_embeddings)
+    vector_store.add_embeddings("product", product_texts, product_embeddings, row_ids)
     print(f"Product embeddings for batch {batch_idx} added to vector store.")
 
     # Store financial embeddings in the financial index
-    vector_store.add_embeddings("financial", ["financial_vector"] * len(financial_embeddings), financial_embeddings)
+    vector_store.add_embeddings("financial", None, financial_embeddings, row_ids)
     print(f"Financial embeddings for batch {batch_idx} added to vector store.")
 
     # Store time-based embeddings in the time index
-    vector_store.add_embeddings("time", ["time_vector"] * len(time_embeddings), time_embeddings)
+    vector_store.add_embeddings("time", None, time_embeddings, row_ids)
     print(f"Time embeddings for batch {batch_idx} added to vector store.")
 
-    # Save embeddings to JSON files for reference
-    with open(PRODUCT_EMBEDDINGS_FILE.replace('.json', f'_{batch_idx}.json'), 'w') as f:
-        json.dump({"product_texts": product_texts, "embeddings": product_embeddings.tolist()}, f)
-    with open(FINANCIAL_EMBEDDINGS_FILE.replace('.json', f'_{batch_idx}.json'), 'w') as f:
-        json.dump({"financial_data": financial_embeddings.tolist()}, f)
-    with open(TIME_EMBEDDINGS_FILE.replace('.json', f'_{batch_idx}.json'), 'w') as f:
-        json.dump({"time_data": time_embeddings.tolist()}, f)
-
 
 # Main function to process all data in batches
 def main():
-    process_and_store_embeddings(batch_size=1000)
-    cursor.close()
+    if PRODUCT_EMBEDDING_SOURCE not in ("transactions", "product_details"):
+        raise ValueError(
+            f"PRODUCT_EMBEDDING_SOURCE must be 'transactions' or 'product_details', got {PRODUCT_EMBEDDING_SOURCE!r}"
+        )
+    conn = connect()
+    checkpoint = load_checkpoint()
+    generation = start_build()
+
+    full_rebuild = INGESTION_MODE != "incremental"
+    if checkpoint is not None and reloaded_since(conn, checkpoint["run_started_at"]):
+        print("retail_transactions was reloaded since the interrupted run; running a full rebuild instead.")
+        clear_checkpoint()
+        checkpoint = None
+        full_rebuild = True
+    vector_store = reopen_for_resume(checkpoint) if checkpoint is not None else None
+    if checkpoint is not None and vector_store is None:
+        print("The index cannot drop rows saved after the checkpoint (HNSW); running a full rebuild instead.")
+        clear_checkpoint()
+        checkpoint = None
+        full_rebuild = True
+
+    if checkpoint is not None:
+        # Pick up an interrupted run where its last index checkpoint left off
+        print(f"Resuming interrupted run after transaction_id {checkpoint['last_transaction_id']}")
+        run_started_at = datetime.fromisoformat(checkpoint["run_started_at"])
+        watermark = checkpoint["watermark"]
+        resume_after = checkpoint["last_transaction_id"]
+        scalers = load_feature_scalers(VECTOR_STORE_DIR)
+    else:
+        # Rows changed after this instant are picked up by the next incremental run
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT now()")
+            run_started_at = cursor.fetchone()[0]
+
+        watermark = load_watermark() if not full_rebuild else None
+        if not full_rebuild and watermark is None:
+            print("No watermark found; running a full build.")
+        elif watermark is not None and reloaded_since(conn, watermark["run_started_at"]):
+            # Its transaction IDs now name different rows, and the old rows left no deletion records
+            print("retail_transactions was reloaded since the last run; running a full build.")
+            watermark = None
+        resume_after = None
+
+        # A single bulk-mode store keeps the indices in memory for the whole run;
+        # a full build starts from empty indices instead of appending to old ones
+        vector_store = VectorStore(VECTOR_STORE_DIR, bulk=True, reset=watermark is None)
+        if watermark is not None:
+            vector_store.remove_ids(fetch_stale_ids(conn, watermark))
+
+        # Incremental runs keep the statistics the existing vectors were normalised with
+        scalers = load_feature_scalers(VECTOR_STORE_DIR) if watermark is not None else None
+
+    if scalers is None:
+        if watermark is not None:
+            print("No feature scalers found; fitting new ones (older financial/time vectors need a full rebuild).")
+        scalers = fit_feature_scalers(conn)
+        # Written before the indices, so the API never pairs new indices with old statistics
+        save_feature_scalers(VECTOR_STORE_DIR, scalers)
+
+    def on_checkpoint(last_transaction_id):
+        save_checkpoint(vector_store, last_transaction_id, run_started_at, watermark)
+
+    # product_details texts are joined through the cache, so they get an in-memory one even when persistence is off
+    catalog_texts = fetch_catalog_texts(conn) if PRODUCT_EMBEDDING_SOURCE == "product_details" else None
+    text_cache = None
+    if EMBEDDING_CACHE_ENABLED or catalog_texts is not None:
+        cache_file = TEXT_EMBEDDING_CACHE_FILE if EMBEDDING_CACHE_ENABLED else None
+        text_cache = TextEmbeddingCache(model_name, EMBEDDING_CACHE_MAX_ENTRIES, cache_file).load()
+
+    with EncoderPool(model_name, workers=EMBEDDING_WORKERS, batch_size=EMBEDDING_ENCODE_BATCH_SIZE) as encoder_pool:
+        train_product_index(conn, vector_store, encoder_pool)
+        if catalog_texts is not None:
+            encode_catalog(encoder_pool, text_cache, catalog_texts)
+        last_transaction_id = process_and_store_embeddings(
+            conn, vector_store, encoder_pool, scalers, watermark=watermark, resume_after=resume_after,
+            on_checkpoint=on_checkpoint, text_cache=text_cache, catalog_texts=catalog_texts
+        )
+    report_peak_rss()
+    if text_cache is not None:
+        text_cache.save()
+    vector_store.close()
+    save_watermark(last_transaction_id, run_started_at)
+    clear_checkpoint()
+    complete_build(generation, last_transaction_id)
     conn.close()
     print("All embeddings generated and stored successfully.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,102 @@
+import json
+import os
+
+import numpy as np
+
+# Columnar side-store of the row attributes search filters need, aligned with the vector IDs:
+#   metadata_ids.i64                int64 row ID (transaction_id) per row
+#   metadata_category.i16           int16 code into the "categories" list in metadata.json
+#   metadata_transaction_date.i64   int64 epoch seconds
+#   metadata_unit_price.f32         float32
+#   metadata_price.f32              float32 (line total after discount)
+#   metadata.json                   committed row count and the category dictionary
+COLUMNS = {
+    "ids": "int64",
+    "category": "int16",
+    "transaction_date": "int64",
+    "unit_price": "float32",
+    "price": "float32",
+}
+META_FILE = 'metadata.json'
+
+
+def column_path(directory, column):
+    suffix = {"int64": "i64", "int16": "i16", "float32": "f32"}[COLUMNS[column]]
+    return os.path.join(directory, f"metadata_{column}.{suffix}")
+
+
+class MetadataStoreWriter:
+    """
+    Append-only column store written next to the indices. Like the embedding
+    side-stores, rows become visible only on commit(); an updated row is
+    appended again and its latest entry wins when the store is read. A store
+    started from scratch writes new column files that commit() swaps in, so
+    readers of the live columns never see them emptied mid-build.
+    """
+
+    def __init__(self, directory, reset=False):
+        self.directory = directory
+        meta_path = os.path.join(directory, META_FILE)
+        meta = None
+        if not reset and os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        self.count = meta["count"] if meta else 0
+        self.categories = meta["categories"] if meta else []
+        self._codes = {name: code for code, name in enumerate(self.categories)}
+
+        # Final path -> new file written in its place, swapped in by the next commit()
+        self._replacements = {}
+        self._files = {}
+        for column, dtype in COLUMNS.items():
+            path = column_path(directory, column)
+            if meta is None:
+                self._replacements[path] = f"{path}.new"
+                self._files[column] = open(f"{path}.new", 'wb')
+                continue
+            f = open(path, 'ab')
+            # Drop uncommitted tails so every column lines up with the committed count
+            f.truncate(self.count * np.dtype(dtype).itemsize)
+            self._files[column] = f
+
+    def _category_codes(self, categories):
+        codes = np.empty(len(categories), dtype='int16')
+        for i, name in enumerate(categories):
+            code = self._codes.get(name)
+            if code is None:
+                code = self._codes[name] = len(self.categories)
+                self.categories.append(name)
+            codes[i] = code
+        return codes
+
+    def append(self, ids, categories, transaction_dates, unit_prices, prices):
+        columns = {
+            "ids": ids,
+            "category": self._category_codes(categories),
+            "transaction_date": transaction_dates,
+            "unit_price": unit_prices,
+            "price": prices,
+        }
+        if len({len(values) for values in columns.values()}) != 1:
+            raise ValueError("Metadata columns must all have one value per row")
+        for column, values in columns.items():
+            self._files[column].write(np.ascontiguousarray(values, dtype=COLUMNS[column]).tobytes())
+        self.count += len(ids)
+
+    def commit(self):
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        for path, new_path in self._replacements.items():
+            os.replace(new_path, path)
+        self._replacements = {}
+        meta_path = os.path.join(self.directory, META_FILE)
+        tmp_file = f"{meta_path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({"count": self.count, "categories": self.categories}, f)
+        os.replace(tmp_file, meta_path)
+
+    def close(self):
+        self.commit()
+        for f in self._files.values():
+            f.close()
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# The ingestion modules import each other as top-level modules (python generate_embeddings.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# generate_embeddings derives its state file paths from VECTOR_STORE_DIR at import; tests pass their own directories
+os.environ.setdefault("VECTOR_STORE_DIR", tempfile.mkdtemp(prefix="vector-store-tests-"))
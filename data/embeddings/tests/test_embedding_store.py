@@ -0,0 +1,50 @@
+import numpy as np
+
+from embedding_store import EmbeddingStoreReader, EmbeddingStoreWriter
+
+
+def write_store(directory, ids, vectors, reset=False):
+    writer = EmbeddingStoreWriter(directory, "product", vectors.shape[1], with_texts=True, reset=reset)
+    writer.append(ids, vectors, [f"text {i}" for i in ids])
+    writer.close()
+
+
+def test_reset_does_not_truncate_mapped_files(tmp_path):
+    rng = np.random.default_rng(0)
+    old_vectors = rng.standard_normal((1000, 16), dtype='float32')
+    write_store(tmp_path, np.arange(1000), old_vectors)
+    reader = EmbeddingStoreReader(tmp_path, "product")
+
+    # A full rebuild starts over while the reader still has the files mapped
+    writer = EmbeddingStoreWriter(tmp_path, "product", 16, with_texts=True, reset=True)
+    new_vectors = rng.standard_normal((10, 16), dtype='float32')
+    writer.append(np.arange(10), new_vectors, [f"new {i}" for i in range(10)])
+
+    np.testing.assert_array_equal(reader.vectors[-1], old_vectors[-1])
+    assert reader.text(999) == "text 999"
+
+    writer.close()
+    np.testing.assert_array_equal(reader.vectors[-1], old_vectors[-1])
+    rebuilt = EmbeddingStoreReader(tmp_path, "product")
+    assert len(rebuilt) == 10
+    np.testing.assert_array_equal(rebuilt.vectors, new_vectors)
+    assert rebuilt.text(9) == "new 9"
+
+
+def test_reopen_drops_uncommitted_rows(tmp_path):
+    vectors = np.ones((5, 4), dtype='float32')
+    write_store(tmp_path, np.arange(5), vectors)
+
+    writer = EmbeddingStoreWriter(tmp_path, "product", 4, with_texts=True)
+    writer.append(np.arange(5, 8), vectors[:3], ["a", "b", "c"])
+    # Crash before commit: the rows reach the files but not the metadata
+    for f in (writer._vectors, writer._ids, writer._texts, writer._offsets):
+        f.close()
+    writer = EmbeddingStoreWriter(tmp_path, "product", 4, with_texts=True)
+    writer.append(np.arange(5, 7), 2 * vectors[:2], ["x", "y"])
+    writer.close()
+
+    reader = EmbeddingStoreReader(tmp_path, "product")
+    assert reader.ids.tolist() == [0, 1, 2, 3, 4, 5, 6]
+    assert reader.text(6) == "y"
+    np.testing.assert_array_equal(reader.vectors[5:], 2 * vectors[:2])
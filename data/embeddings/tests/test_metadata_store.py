@@ -0,0 +1,59 @@
+import json
+import os
+
+import numpy as np
+
+from metadata_store import COLUMNS, META_FILE, MetadataStoreWriter, column_path
+
+
+def read_columns(directory):
+    with open(os.path.join(directory, META_FILE)) as f:
+        meta = json.load(f)
+    return {
+        column: np.fromfile(column_path(directory, column), dtype=dtype, count=meta["count"])
+        for column, dtype in COLUMNS.items()
+    }, meta["categories"]
+
+
+def write_rows(writer, ids, category):
+    n = len(ids)
+    writer.append(ids, [category] * n, np.full(n, 1700000000), np.full(n, 9.5), np.full(n, 19.0))
+
+
+def test_reset_keeps_live_columns_until_commit(tmp_path):
+    writer = MetadataStoreWriter(tmp_path)
+    write_rows(writer, np.arange(100), "Electronics")
+    writer.close()
+
+    # A full rebuild starts over; readers must keep seeing the committed rows until it commits
+    writer = MetadataStoreWriter(tmp_path, reset=True)
+    write_rows(writer, np.arange(1000, 1005), "Sports")
+    columns, categories = read_columns(tmp_path)
+    assert columns["ids"].tolist() == list(range(100))
+    assert categories == ["Electronics"]
+
+    writer.close()
+    columns, categories = read_columns(tmp_path)
+    assert columns["ids"].tolist() == list(range(1000, 1005))
+    assert columns["category"].tolist() == [0] * 5
+    assert categories == ["Sports"]
+    assert not any(name.endswith(".new") for name in os.listdir(tmp_path))
+
+
+def test_reopen_drops_uncommitted_rows(tmp_path):
+    writer = MetadataStoreWriter(tmp_path)
+    write_rows(writer, np.arange(3), "Clothing")
+    writer.commit()
+    write_rows(writer, np.arange(3, 6), "Clothing")
+    # Crash before commit: the rows reach the files but not metadata.json
+    for f in writer._files.values():
+        f.close()
+
+    writer = MetadataStoreWriter(tmp_path)
+    write_rows(writer, np.arange(10, 12), "Groceries")
+    writer.close()
+
+    columns, categories = read_columns(tmp_path)
+    assert columns["ids"].tolist() == [0, 1, 2, 10, 11]
+    assert columns["category"].tolist() == [0, 0, 0, 1, 1]
+    assert categories == ["Clothing", "Groceries"]
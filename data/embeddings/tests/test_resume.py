@@ -0,0 +1,51 @@
+import numpy as np
+
+import generate_embeddings
+from vector_store import VectorStore
+
+
+def build_interrupted_store(directory, product_index_type):
+    """
+    A bulk store checkpointed after rows 1-10 and saved again after rows 11-15,
+    as left behind by a run killed between two checkpoints.
+    """
+    rng = np.random.default_rng(0)
+    store = VectorStore(str(directory), product_index_type=product_index_type, bulk=True, reset=True)
+
+    def add(ids):
+        store.add_embeddings("product", [f"text {i}" for i in ids], rng.standard_normal((len(ids), 384)), ids)
+        store.add_embeddings("financial", None, rng.standard_normal((len(ids), 4)), ids)
+        store.add_embeddings("time", None, rng.standard_normal((len(ids), 1)), ids)
+        store.save()
+
+    add(np.arange(1, 11))
+    checkpoint = {"last_transaction_id": 10, "counts": store.counts()}
+    add(np.arange(11, 16))
+    store.close()
+    return checkpoint
+
+
+def test_resume_drops_rows_after_checkpoint(tmp_path):
+    checkpoint = build_interrupted_store(tmp_path, "flat")
+
+    store = generate_embeddings.reopen_for_resume(checkpoint, str(tmp_path))
+    assert store is not None
+    assert store.counts() == checkpoint["counts"]
+    store.close()
+
+
+def test_resume_with_hnsw_falls_back_to_rebuild(tmp_path):
+    checkpoint = build_interrupted_store(tmp_path, "hnsw")
+
+    # HNSW cannot remove rows 11-15, so the run must not resume from this store
+    assert generate_embeddings.reopen_for_resume(checkpoint, str(tmp_path)) is None
+
+
+def test_resume_with_hnsw_at_checkpoint(tmp_path):
+    checkpoint = build_interrupted_store(tmp_path, "hnsw")
+    checkpoint["counts"] = {name: 15 for name in checkpoint["counts"]}
+
+    # Nothing to drop: the HNSW store resumes as is
+    store = generate_embeddings.reopen_for_resume(checkpoint, str(tmp_path))
+    assert store is not None
+    store.close()
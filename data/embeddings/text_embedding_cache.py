@@ -0,0 +1,82 @@
+import hashlib
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_text(text):
+    # Unicode-normalised and single-spaced; case is kept, since not every model is uncased
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def text_key(text):
+    """
+    16-byte BLAKE2 digest of the normalised text.
+    """
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16).digest()
+
+
+class TextEmbeddingCache:
+    """
+    Bounded LRU map from text hash to embedding, so each distinct text is
+    encoded once per run and, through save()/load, once across runs. The file
+    records the model name; a cache written by another model is ignored.
+    """
+
+    def __init__(self, model_name, max_entries, path=None):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self.loaded = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return self
+        with np.load(self.path, allow_pickle=False) as data:
+            if str(data["model_name"]) != self.model_name:
+                print(f"Ignoring embedding cache {self.path}: built with {data['model_name']}, not {self.model_name}")
+                return self
+            keys, vectors = data["keys"], data["vectors"]
+        # Most recently used entries were written last
+        for key, vector in zip(keys[-self.max_entries:], vectors[-self.max_entries:]):
+            self._entries[key.tobytes()] = vector
+        self.loaded = len(self._entries)
+        print(f"Loaded {self.loaded} cached text embeddings from {self.path}")
+        return self
+
+    def save(self):
+        if self.path is None:
+            return
+        keys = np.frombuffer(b"".join(self._entries), dtype='uint8').reshape(-1, 16)
+        vectors = np.array(list(self._entries.values()), dtype='float32')
+        # np.savez appends .npz to names without it, so keep the suffix on the temporary file
+        tmp_file = f"{self.path}.tmp.npz"
+        np.savez(tmp_file, keys=keys, vectors=vectors, model_name=np.array(self.model_name))
+        os.replace(tmp_file, self.path)
+        print(f"Saved {len(self._entries)} text embeddings to {self.path}")
+
+    def get(self, key):
+        vector = self._entries.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, key, vector):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
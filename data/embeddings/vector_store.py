@@ -2,10 +2,64 @@ import os
 import json
 import faiss
 import numpy as np
+from embedding_store import EmbeddingStoreWriter
+from metadata_store import MetadataStoreWriter
+from config import PRODUCT_INDEX_TYPE, IVF_NLIST, PQ_M, PQ_NBITS, HNSW_M, HNSW_EF_CONSTRUCTION
+
+INDEX_TYPES = ("flat", "sq8", "fp16", "ivf_flat", "ivf_pq", "hnsw")
+
+
+def create_index(index_type, dimension):
+    """
+    Create an empty ID-mapped FAISS index of the given type.
+    IVF and sq8 indices must be trained before vectors can be added.
+    sq8 / fp16 keep every vector scalar-quantised to 1 / 2 bytes per dimension
+    (vs. 4 for flat) and still scan exhaustively.
+    """
+    if index_type == "flat":
+        description = "IDMap2,Flat"
+    elif index_type == "sq8":
+        description = "IDMap2,SQ8"
+    elif index_type == "fp16":
+        description = "IDMap2,SQfp16"
+    elif index_type == "ivf_flat":
+        description = f"IDMap2,IVF{IVF_NLIST},Flat"
+    elif index_type == "ivf_pq":
+        description = f"IDMap2,IVF{IVF_NLIST},PQ{PQ_M}x{PQ_NBITS}"
+    elif index_type == "hnsw":
+        description = f"IDMap2,HNSW{HNSW_M}"
+    else:
+        raise ValueError(f"Invalid index type: {index_type} (expected one of {', '.join(INDEX_TYPES)})")
+
+    index = faiss.index_factory(dimension, description, faiss.METRIC_L2)
+    if index_type == "hnsw":
+        faiss.downcast_index(index.index).hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    return index
+
+
+def search_parameters(index, nprobe=None, ef_search=None):
+    """
+    Per-query search parameters for the index behind an ID map, or None for defaults.
+    """
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexIVF) and nprobe is not None:
+        return faiss.SearchParametersIVF(nprobe=nprobe)
+    if isinstance(inner, faiss.IndexHNSW) and ef_search is not None:
+        return faiss.SearchParametersHNSW(efSearch=ef_search)
+    return None
+
 
 class VectorStore:
-    def __init__(self, vector_store_dir='./vector_store_data'):
+    def __init__(self, vector_store_dir='./vector_store_data', product_index_type=PRODUCT_INDEX_TYPE, bulk=False, reset=False):
+        """
+        In bulk mode indices are kept in memory across add_embeddings calls and
+        only written by save(); otherwise every add is persisted immediately.
+        With reset, existing index files are ignored and new empty indices are built.
+        """
         self.vector_store_dir = vector_store_dir
+        self.product_index_type = product_index_type
+        self.bulk = bulk
+        self.reset = reset
         self.product_index_file = os.path.join(self.vector_store_dir, 'faiss_product_index.bin')
         self.financial_index_file = os.path.join(self.vector_store_dir, 'faiss_financial_index.bin')
         self.time_index_file = os.path.join(self.vector_store_dir, 'faiss_time_index.bin')
@@ -15,81 +69,186 @@ class VectorStore:
 
         os.makedirs(self.vector_store_dir, exist_ok=True)
         self._load_indices()
+        self._open_embedding_stores()
 
     def _load_indices(self):
-        self.product_index = self._load_index(self.product_index_file, 384, "product")
+        self.product_index = self._load_index(self.product_index_file, 384, "product", self.product_index_type)
         self.financial_index = self._load_index(self.financial_index_file, 4, "financial")
         self.time_index = self._load_index(self.time_index_file, 1, "time")
 
-    def _load_index(self, index_file, dimension, index_type):
-        if os.path.exists(index_file):
+    def _open_embedding_stores(self):
+        # Binary side-stores holding the raw vectors (and product texts) behind each index;
+        # a store whose index is brand new starts empty as well
+        self.embedding_stores = {
+            index_type: EmbeddingStoreWriter(
+                self.vector_store_dir, index_type, index.d,
+                with_texts=(index_type == "product"), reset=(index.ntotal == 0)
+            )
+            for index_type, index in (
+                ("product", self.product_index), ("financial", self.financial_index), ("time", self.time_index)
+            )
+        }
+        # Filterable row attributes (category, date, prices), aligned with the vector IDs
+        self.metadata_store = MetadataStoreWriter(self.vector_store_dir, reset=(self.product_index.ntotal == 0))
+
+    def _load_index(self, index_file, dimension, index_type, structure="flat"):
+        if os.path.exists(index_file) and not self.reset:
             print(f"Loading existing {index_type} FAISS index...")
             index = faiss.read_index(index_file)
+            if not isinstance(index, faiss.IndexIDMap2):
+                raise ValueError(
+                    f"{index_type.capitalize()} FAISS index at {index_file} has no ID map; delete it and rebuild the vector store"
+                )
             print(f"{index_type.capitalize()} FAISS index loaded.")
         else:
-            print(f"Creating new {index_type} FAISS index with dimension {dimension}...")
-            index = faiss.IndexFlatL2(dimension)
+            print(f"Creating new {structure} {index_type} FAISS index with dimension {dimension}...")
+            # Vectors are keyed by retail_transactions.transaction_id rather than by insertion position
+            index = create_index(structure, dimension)
             print(f"{index_type.capitalize()} FAISS index created.")
         return index
 
-    def add_embeddings(self, index_type, texts, embeddings):
+    def _get_index(self, index_type):
+        if index_type == "product":
+            return self.product_index, self.product_index_file
+        elif index_type == "financial":
+            return self.financial_index, self.financial_index_file
+        elif index_type == "time":
+            return self.time_index, self.time_index_file
+        raise ValueError(f"Invalid index type: {index_type}")
+
+    def needs_training(self, index_type):
+        index, _ = self._get_index(index_type)
+        return not index.is_trained
+
+    def train_index(self, index_type, sample_embeddings):
+        """
+        Train an IVF/PQ/SQ index on a representative sample before any vectors are added.
+        """
+        index, index_file = self._get_index(index_type)
+        if index.is_trained:
+            return
+
+        sample_embeddings = np.ascontiguousarray(sample_embeddings, dtype='float32')
+        print(f"Training {index_type} FAISS index on {len(sample_embeddings)} sample vectors...")
+        index.train(sample_embeddings)
+        print(f"{index_type.capitalize()} FAISS index trained.")
+        self.save_index(index, index_file)
+
+    def add_embeddings(self, index_type, texts, embeddings, ids):
         """
-        Add new embeddings to the vector store.
+        Add new embeddings to the vector store under the given row IDs.
         """
         if len(embeddings) == 0:
             return
 
         # Ensure that embeddings have the correct dimension
         embeddings = np.array(embeddings).astype('float32')
-        if index_type == "product":
-            self.index = self.product_index
-            self.index_file = self.product_index_file
-        elif index_type == "financial":
-            self.index = self.financial_index
-            self.index_file = self.financial_index_file
-        elif index_type == "time":
-            self.index = self.time_index
-            self.index_file = self.time_index_file
-        else:
-            raise ValueError(f"Invalid index type: {index_type}")
-        
+        ids = np.asarray(ids, dtype='int64')
+        if len(ids) != len(embeddings):
+            raise ValueError(f"Got {len(ids)} ids for {len(embeddings)} {index_type} embeddings")
+        self.index, self.index_file = self._get_index(index_type)
+        if not self.index.is_trained:
+            raise ValueError(f"{index_type.capitalize()} FAISS index must be trained before adding embeddings")
+
         if embeddings.shape[1] != self.index.d:
             raise ValueError(
                 f"Embedding dimension {embeddings.shape[1]} does not match FAISS index dimension {self.index.d} for {index_type}"
             )
 
         # Add embeddings to the index
-        self.index.add(embeddings)
+        self.index.add_with_ids(embeddings, ids)
         print(f"Added {len(embeddings)} {index_type} embeddings to the index.")
-        self.save_index(self.index, self.index_file)
 
-        # Save texts for reference (if applicable)
-        if texts:
-            with open(self.index_file.replace('.bin', '_texts.json'), 'a') as f:
-                json.dump(texts, f)
+        # Keep the raw vectors (and texts, for products) for re-indexing and inspection
+        store = self.embedding_stores[index_type]
+        store.append(ids, embeddings, texts if store.with_texts else None)
+
+        if not self.bulk:
+            store.commit()
+            self.save_index(self.index, self.index_file)
+
+    def add_metadata(self, ids, categories, transaction_dates, unit_prices, prices):
+        """
+        Record the filterable attributes of the given rows (committed together with the indices).
+        """
+        self.metadata_store.append(ids, categories, transaction_dates, unit_prices, prices)
+        if not self.bulk:
+            self.metadata_store.commit()
+
+    def remove_ids(self, ids):
+        """
+        Remove the vectors of deleted or updated rows from all three indices;
+        ids is an array of row IDs or a faiss.IDSelector (e.g. an IDSelectorRange).
+        The side-stores are append-only: re-added rows shadow their old entries.
+        """
+        if not isinstance(ids, faiss.IDSelector):
+            ids = np.asarray(ids, dtype='int64')
+            if len(ids) == 0:
+                return 0
+
+        removed = 0
+        for index_type in ("product", "financial", "time"):
+            index, index_file = self._get_index(index_type)
+            try:
+                removed = index.remove_ids(ids)
+            except RuntimeError as e:
+                raise ValueError(
+                    f"{index_type.capitalize()} FAISS index does not support removing vectors; run a full rebuild"
+                ) from e
+            print(f"Removed {removed} {index_type} embeddings from the index.")
+            if not self.bulk:
+                self.save_index(index, index_file)
+        return removed
+
+    def supports_removal(self):
+        """
+        Whether all three indices can drop vectors; HNSW graphs cannot.
+        """
+        return not any(
+            isinstance(faiss.downcast_index(index.index), faiss.IndexHNSW)
+            for index in (self.product_index, self.financial_index, self.time_index)
+        )
+
+    def counts(self):
+        """
+        Number of vectors currently held by each index.
+        """
+        return {index_type: self._get_index(index_type)[0].ntotal for index_type in ("product", "financial", "time")}
+
+    def save(self):
+        """
+        Write all three indices, their side-stores and the metadata columns to disk (used to checkpoint and finish a bulk build).
+        """
+        for store in self.embedding_stores.values():
+            store.commit()
+        self.metadata_store.commit()
+        self.save_index(self.product_index, self.product_index_file)
+        self.save_index(self.financial_index, self.financial_index_file)
+        self.save_index(self.time_index, self.time_index_file)
+
+    def close(self):
+        for store in self.embedding_stores.values():
+            store.close()
+        self.metadata_store.close()
 
     def save_index(self, index, index_file):
         """
-        Save the FAISS index to disk.
+        Save the FAISS index to disk atomically: readers see either the old or the new file, never a partial one.
         """
-        faiss.write_index(index, index_file)
+        tmp_file = f"{index_file}.tmp"
+        faiss.write_index(index, tmp_file)
+        os.replace(tmp_file, index_file)
         print(f"FAISS index saved to {index_file}")
 
-    def search(self, index_type, query_embedding, k=5):
+    def search(self, index_type, query_embedding, k=5, nprobe=None, ef_search=None):
         """
-        Search for the top-k similar embeddings.
+        Search for the top-k similar embeddings; returns distances and row IDs (-1 for empty slots).
+        nprobe (IVF) and ef_search (HNSW) trade recall for latency on approximate indices.
         """
         query_embedding = np.array([query_embedding]).astype('float32')
-        if index_type == "product":
-            index = self.product_index
-        elif index_type == "financial":
-            index = self.financial_index
-        elif index_type == "time":
-            index = self.time_index
-        else:
-            raise ValueError(f"Invalid index type: {index_type}")
+        index, _ = self._get_index(index_type)
 
-        distances, indices = index.search(query_embedding, k)
+        distances, indices = index.search(query_embedding, k, params=search_parameters(index, nprobe, ef_search))
         return distances[0], indices[0]
 
     def load_prompts(self):
@@ -11,10 +11,23 @@ DB_HOST = os.getenv('DB_HOST')
 DB_PORT = os.getenv('DB_PORT')
 DB_NAME = os.getenv('DB_NAME')
 
-# Paths for data generation
-GENERATED_DATA_DIR = os.getenv('GENERATED_DATA_DIR')
-CUSTOMER_CSV = os.path.join(GENERATED_DATA_DIR, 'customer_details.csv')
-PRODUCT_CSV = os.path.join(GENERATED_DATA_DIR, 'product_details.csv')
-STORE_CSV = os.path.join(GENERATED_DATA_DIR, 'store_details.csv')
-TRANSACTION_CSV = os.path.join(GENERATED_DATA_DIR, 'retail_transactions.csv')
-REVIEW_CSV = os.path.join(GENERATED_DATA_DIR, 'customer_reviews.csv')
+# Synthetic dataset size and reproducibility
+GEN_SEED = int(os.getenv('GEN_SEED', '42'))
+GEN_NUM_CUSTOMERS = int(os.getenv('GEN_NUM_CUSTOMERS', '10000'))
+GEN_NUM_PRODUCTS = int(os.getenv('GEN_NUM_PRODUCTS', '500'))
+GEN_NUM_STORES = int(os.getenv('GEN_NUM_STORES', '100'))
+GEN_NUM_TRANSACTIONS = int(os.getenv('GEN_NUM_TRANSACTIONS', '1000000'))
+GEN_NUM_REVIEWS = int(os.getenv('GEN_NUM_REVIEWS', '100000'))
+
+# Generation throughput: worker processes, rows per COPY shard, rows generated per streamed chunk,
+# and distinct Faker values pre-sampled per text column
+GEN_WORKERS = int(os.getenv('GEN_WORKERS', str(os.cpu_count() or 1)))
+GEN_SHARD_SIZE = int(os.getenv('GEN_SHARD_SIZE', '250000'))
+GEN_CHUNK_SIZE = int(os.getenv('GEN_CHUNK_SIZE', '50000'))
+GEN_FAKER_POOL_SIZE = int(os.getenv('GEN_FAKER_POOL_SIZE', '5000'))
+
+# Post-load schema: optionally range-partition retail_transactions by month, and how many
+# sampled lookups time the API's hydration queries before and after the indexes are built.
+# Off by default: the "before" timings are sequential scans, which take minutes at 10M+ rows
+GEN_PARTITION_BY_MONTH = os.getenv('GEN_PARTITION_BY_MONTH', 'false').lower() == 'true'
+GEN_HYDRATION_SAMPLES = int(os.getenv('GEN_HYDRATION_SAMPLES', '0'))
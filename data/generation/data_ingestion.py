@@ -1,160 +1,327 @@
-import os
-import psycopg2
+import argparse
 import csv
+import io
+import multiprocessing
+import time
+import psycopg2
+import numpy as np
 from faker import Faker
-import random
-from datetime import datetime, timedelta
-from config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, CUSTOMER_CSV, PRODUCT_CSV, STORE_CSV, TRANSACTION_CSV, REVIEW_CSV
+from datetime import datetime
+from config import (
+    DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, GEN_SEED, GEN_NUM_CUSTOMERS, GEN_NUM_PRODUCTS, GEN_NUM_STORES,
+    GEN_NUM_TRANSACTIONS, GEN_NUM_REVIEWS, GEN_WORKERS, GEN_SHARD_SIZE, GEN_CHUNK_SIZE, GEN_FAKER_POOL_SIZE,
+    GEN_PARTITION_BY_MONTH, GEN_HYDRATION_SAMPLES
+)
+from schema import (
+    POST_LOAD_DDL, drop_post_load_ddl, create_post_load_ddl, partition_transactions_by_month,
+    sample_hydration_inputs, time_hydration_queries
+)
+
+CATEGORIES = np.array(["Electronics", "Clothing", "Groceries", "Home & Kitchen", "Sports"])
+PAYMENT_METHODS = np.array(["cash", "credit card", "paypal", "debit card"])
+CARD_TYPES = np.array(["visa", "master card", "amex"])
+
+# Columns written by each generator, in COPY order; omitted columns (e.g. transaction_id) take their defaults
+TABLE_COLUMNS = {
+    "customer_details": [
+        'customer_id', 'customer_name', 'email', 'phone', 'address', 'country', 'state', 'city', 'created_at'
+    ],
+    "product_details": [
+        'product_id', 'product_name', 'product_category', 'product_description', 'unit_price', 'created_at'
+    ],
+    "store_details": [
+        'store_id', 'store_name', 'store_address', 'store_country', 'store_state', 'store_city', 'created_at'
+    ],
+    "retail_transactions": [
+        'invoice_id', 'customer_id', 'product_id', 'quantity', 'unit_price', 'price', 'discount_applied',
+        'transaction_date', 'payment_method', 'card_type', 'store_address', 'store_country', 'store_state',
+        'store_city', 'product_category', 'product_description', 'product_total_amount', 'transaction_total_amount'
+    ],
+    "customer_reviews": [
+        'review_id', 'customer_id', 'product_id', 'rating', 'review_text', 'review_date'
+    ],
+}
 
 # Establish a connection to the PostgreSQL database
-conn = psycopg2.connect(
-    dbname=DB_NAME,
-    user=DB_USER,
-    password=DB_PASS,
-    host=DB_HOST,
-    port=DB_PORT
-)
-cursor = conn.cursor()
-
-# Initialize Faker for realistic data generation
-fake = Faker()
-
-# Function to write data to a CSV file incrementally
-def write_to_csv(file_path, num_rows, generator_func, header):
-    with open(file_path, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(header)
-        for row in generator_func(num_rows):
-            writer.writerow(row)
-    print(f"Data written to {file_path}")
-
-# Data generator functions
-def generate_customers(num_customers=10000):
-    for customer_id in range(1, num_customers + 1):
-        yield (
-            customer_id,
-            fake.name(),
-            fake.email(),
-            fake.phone_number(),
-            fake.address(),
-            fake.country(),
-            fake.state(),
-            fake.city(),
-            fake.date_time_this_decade()
-        )
-
-def generate_products(num_products=500):
-    for product_id in range(1, num_products + 1):
-        category = fake.random_element(elements=("Electronics", "Clothing", "Groceries", "Home & Kitchen", "Sports"))
-        yield (
-            product_id,
-            fake.word().capitalize() + " " + category,
-            category,
-            fake.sentence(nb_words=12),
-            round(random.uniform(5, 500), 2),
-            fake.date_time_this_decade()
-        )
-
-def generate_stores(num_stores=100):
-    for store_id in range(1, num_stores + 1):
-        yield (
-            store_id,
-            "Store " + str(store_id),
-            fake.street_address(),
-            fake.country(),
-            fake.state(),
-            fake.city(),
-            fake.date_time_this_decade()
-        )
-
-def generate_transactions(num_transactions=1000000, num_customers=10000, num_products=500):
-    for _ in range(num_transactions):
-        invoice_id = random.randint(100000, 999999)
-        customer_id = random.randint(1, num_customers)
-        product_id = random.randint(1, num_products)
-        quantity = random.randint(1, 10)
-        unit_price = round(random.uniform(5, 500), 2)
-        discount = round(random.uniform(0, 0.3), 2)
-        price = unit_price * quantity * (1 - discount)
-        transaction_date = datetime.utcnow() - timedelta(days=random.randint(0, 365))
-        payment_method = random.choice(["cash", "credit card", "paypal", "debit card"])
-        card_type = random.choice(["visa", "master card", "amex"]) if payment_method == "credit card" else None
-        yield (
-            invoice_id, customer_id, product_id, quantity, unit_price, price, discount * 100,
-            transaction_date, payment_method, card_type,
-            fake.street_address(), fake.country(), fake.state(), fake.city(),
-            fake.random_element(elements=("Electronics", "Clothing", "Groceries", "Home & Kitchen", "Sports")),
-            fake.sentence(nb_words=8), round(price, 2), round(price * quantity, 2)
-        )
-
-def generate_reviews(num_reviews=100000, num_customers=10000, num_products=500):
-    for review_id in range(1, num_reviews+1):
-        customer_id = random.randint(1, num_customers)
-        product_id = random.randint(1, num_products)
-        rating = random.randint(1, 5)  # Ensure rating is an integer between 1 and 5
-        review_text = fake.sentence(nb_words=15)  # Generate a textual review
-        review_date = datetime.utcnow() - timedelta(days=random.randint(0, 365))
-        yield (
-            review_id,
-            customer_id,
-            product_id,
-            rating,
-            review_text,
-            review_date
-        )
-
-# Function to load data from CSV into PostgreSQL using COPY
-def load_csv_to_postgresql(file_path, table_name):
-    with open(file_path, 'r') as f:
-        next(f)  # Skip the header row
-        # Clear existing data from the table
+def connect():
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASS,
+        host=DB_HOST,
+        port=DB_PORT
+    )
+
+# Faker is far too slow to call per row at 10M+ rows, so each text column draws from a pre-sampled pool
+def build_faker_pools(seed, pool_size):
+    Faker.seed(seed)
+    fake = Faker()
+    generators = {
+        "name": fake.name,
+        "email": fake.email,
+        "phone": fake.phone_number,
+        "address": fake.address,
+        "street_address": fake.street_address,
+        "country": fake.country,
+        "state": fake.state,
+        "city": fake.city,
+        "word": lambda: fake.word().capitalize(),
+        "sentence_8": lambda: fake.sentence(nb_words=8),
+        "sentence_12": lambda: fake.sentence(nb_words=12),
+        "sentence_15": lambda: fake.sentence(nb_words=15),
+    }
+    return {name: np.array([generate() for _ in range(pool_size)], dtype=object) for name, generate in generators.items()}
+
+def _pick(rng, pool, count):
+    return pool[rng.integers(0, len(pool), size=count)]
+
+def _random_timestamps(rng, count, start, end):
+    seconds = rng.uniform(start.timestamp(), end.timestamp(), size=count)
+    return np.datetime_as_string(seconds.astype('datetime64[s]'), unit='s')
+
+def _days_ago(rng, count, now, max_days=365):
+    # Matches the original "now minus a whole number of days" transaction/review dates
+    days = rng.integers(0, max_days + 1, size=count)
+    return np.datetime_as_string(np.datetime64(now, 'us') - days.astype('timedelta64[D]'), unit='us')
+
+def _this_decade(now):
+    return datetime(now.year - now.year % 10, 1, 1), now
+
+# Vectorised data generators: each returns the columns for rows [start, start + count)
+def generate_customers(rng, start, count, pools, now, **_):
+    ids = np.arange(start + 1, start + count + 1)
+    return [
+        ids,
+        _pick(rng, pools["name"], count),
+        _pick(rng, pools["email"], count),
+        _pick(rng, pools["phone"], count),
+        _pick(rng, pools["address"], count),
+        _pick(rng, pools["country"], count),
+        _pick(rng, pools["state"], count),
+        _pick(rng, pools["city"], count),
+        _random_timestamps(rng, count, *_this_decade(now)),
+    ]
+
+def generate_products(rng, start, count, pools, now, **_):
+    ids = np.arange(start + 1, start + count + 1)
+    categories = _pick(rng, CATEGORIES, count)
+    return [
+        ids,
+        _pick(rng, pools["word"], count) + " " + categories.astype(object),
+        categories,
+        _pick(rng, pools["sentence_12"], count),
+        np.round(rng.uniform(5, 500, size=count), 2),
+        _random_timestamps(rng, count, *_this_decade(now)),
+    ]
+
+def generate_stores(rng, start, count, pools, now, **_):
+    ids = np.arange(start + 1, start + count + 1)
+    return [
+        ids,
+        np.array([f"Store {store_id}" for store_id in ids], dtype=object),
+        _pick(rng, pools["street_address"], count),
+        _pick(rng, pools["country"], count),
+        _pick(rng, pools["state"], count),
+        _pick(rng, pools["city"], count),
+        _random_timestamps(rng, count, *_this_decade(now)),
+    ]
+
+def generate_transactions(rng, start, count, pools, now, num_customers, num_products, **_):
+    quantity = rng.integers(1, 11, size=count)
+    unit_price = np.round(rng.uniform(5, 500, size=count), 2)
+    discount = np.round(rng.uniform(0, 0.3, size=count), 2)
+    price = unit_price * quantity * (1 - discount)
+    payment_method = _pick(rng, PAYMENT_METHODS, count)
+    # card_type is NULL unless paid by credit card
+    card_type = np.where(payment_method == "credit card", _pick(rng, CARD_TYPES, count), None)
+    return [
+        rng.integers(100000, 1000000, size=count),
+        rng.integers(1, num_customers + 1, size=count),
+        rng.integers(1, num_products + 1, size=count),
+        quantity,
+        unit_price,
+        price,
+        discount * 100,
+        _days_ago(rng, count, now),
+        payment_method,
+        card_type,
+        _pick(rng, pools["street_address"], count),
+        _pick(rng, pools["country"], count),
+        _pick(rng, pools["state"], count),
+        _pick(rng, pools["city"], count),
+        _pick(rng, CATEGORIES, count),
+        _pick(rng, pools["sentence_8"], count),
+        np.round(price, 2),
+        np.round(price * quantity, 2),
+    ]
+
+def generate_reviews(rng, start, count, pools, now, num_customers, num_products, **_):
+    return [
+        np.arange(start + 1, start + count + 1),
+        rng.integers(1, num_customers + 1, size=count),
+        rng.integers(1, num_products + 1, size=count),
+        rng.integers(1, 6, size=count),  # Ensure rating is an integer between 1 and 5
+        _pick(rng, pools["sentence_15"], count),
+        _days_ago(rng, count, now),
+    ]
+
+GENERATORS = {
+    "customer_details": generate_customers,
+    "product_details": generate_products,
+    "store_details": generate_stores,
+    "retail_transactions": generate_transactions,
+    "customer_reviews": generate_reviews,
+}
+
+def to_csv(columns):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(zip(*[column.tolist() for column in columns]))
+    return buffer.getvalue()
+
+class CsvStream:
+    """
+    Read-only file object over generated CSV chunks, so COPY FROM STDIN pulls
+    rows as they are produced instead of from an intermediate file.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = ""
+        self._pos = 0
+
+    def read(self, size=-1):
+        while self._pos >= len(self._chunk):
+            self._chunk = next(self._chunks, None)
+            self._pos = 0
+            if self._chunk is None:
+                self._chunk = ""
+                return ""
+        end = len(self._chunk) if size is None or size < 0 else self._pos + size
+        data = self._chunk[self._pos:end]
+        self._pos += len(data)
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+# One connection per worker process, reused for all of its shards
+_worker_conn = None
+_worker_pools = None
+
+def _init_worker(pools):
+    global _worker_conn, _worker_pools
+    _worker_conn = connect()
+    _worker_pools = pools
+
+def copy_shard(task):
+    """
+    Generate rows [start, start + count) of a table and stream them into COPY FROM STDIN.
+    """
+    table_name, start, count, seed, chunk_size, params = task
+    # Seeding by (seed, table, shard) makes the data independent of the worker count
+    rng = np.random.default_rng([seed, list(GENERATORS).index(table_name), start])
+    generator = GENERATORS[table_name]
+
+    def chunks():
+        for chunk_start in range(start, start + count, chunk_size):
+            chunk_count = min(chunk_size, start + count - chunk_start)
+            yield to_csv(generator(rng, chunk_start, chunk_count, _worker_pools, **params))
+
+    column_list = ', '.join(TABLE_COLUMNS[table_name])
+    with _worker_conn.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table_name} ({column_list}) FROM STDIN WITH CSV", CsvStream(chunks()), size=1 << 20)
+    _worker_conn.commit()
+    return count
+
+# Generate a table in shards across the worker processes, each shard streamed over its own COPY
+def load_table(table_name, num_rows, pools, seed, workers, shard_size, chunk_size, **params):
+    start_time = time.perf_counter()
+    conn = connect()
+    with conn.cursor() as cursor:
+        # Clear existing data from the table. Restarting retail_transactions' IDs invalidates the
+        # embedding watermark; the truncation is logged (init.sql) so the next ingestion run rebuilds
         cursor.execute(f"TRUNCATE TABLE {table_name} RESTART IDENTITY CASCADE;")
-        cursor.copy_expert(f"COPY {table_name} FROM STDIN WITH CSV", f)
     conn.commit()
-    print(f"Data loaded into table '{table_name}' successfully.")
-
-# Paths for CSV files
-csv_files = {
-    "customer_details": "customer_details.csv",
-    "product_details": "product_details.csv",
-    "store_details": "store_details.csv",
-    "retail_transactions": "retail_transactions.csv",
-    "customer_reviews": "customer_reviews.csv"
-}
+    conn.close()
+    tasks = [
+        (table_name, start, min(shard_size, num_rows - start), seed, chunk_size, params)
+        for start in range(0, num_rows, shard_size)
+    ]
+
+    loaded = 0
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(pools,)) as pool:
+            for count in pool.imap_unordered(copy_shard, tasks):
+                loaded += count
+    else:
+        _init_worker(pools)
+        for task in tasks:
+            loaded += copy_shard(task)
+        _worker_conn.close()
+
+    seconds = time.perf_counter() - start_time
+    print(f"Data loaded into table '{table_name}': {loaded} rows in {seconds:.1f}s ({loaded / max(seconds, 1e-9):.0f} rows/sec)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic retail data straight into PostgreSQL.")
+    parser.add_argument("--customers", type=int, default=GEN_NUM_CUSTOMERS)
+    parser.add_argument("--products", type=int, default=GEN_NUM_PRODUCTS)
+    parser.add_argument("--stores", type=int, default=GEN_NUM_STORES)
+    parser.add_argument("--transactions", type=int, default=GEN_NUM_TRANSACTIONS)
+    parser.add_argument("--reviews", type=int, default=GEN_NUM_REVIEWS)
+    parser.add_argument("--seed", type=int, default=GEN_SEED)
+    parser.add_argument("--workers", type=int, default=GEN_WORKERS)
+    parser.add_argument("--shard-size", type=int, default=GEN_SHARD_SIZE, help="rows per COPY")
+    parser.add_argument("--chunk-size", type=int, default=GEN_CHUNK_SIZE, help="rows generated at a time within a shard")
+    parser.add_argument("--pool-size", type=int, default=GEN_FAKER_POOL_SIZE, help="distinct Faker values per text column")
+    parser.add_argument("--partition-by-month", action=argparse.BooleanOptionalAction, default=GEN_PARTITION_BY_MONTH,
+                        help="range-partition retail_transactions by transaction_date month")
+    parser.add_argument("--hydration-samples", type=int, default=GEN_HYDRATION_SAMPLES,
+                        help="lookups per API hydration query timed before/after indexing; the unindexed "
+                             "runs scan the whole table (default 0 = skip)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    run_start = time.perf_counter()
+    pools = build_faker_pools(args.seed, args.pool_size)
+    print(f"Sampled {len(pools)} Faker pools of {args.pool_size} values in {time.perf_counter() - run_start:.1f}s")
+
+    # Every worker and shard dates rows relative to the same instant
+    now = datetime.utcnow()
+    common = dict(
+        pools=pools, seed=args.seed, workers=args.workers, shard_size=args.shard_size, chunk_size=args.chunk_size,
+        now=now, num_customers=args.customers, num_products=args.products
+    )
+
+    # Indexes and constraints are rebuilt after the COPY instead of being maintained during it
+    conn = connect()
+    for table_name in POST_LOAD_DDL:
+        drop_post_load_ddl(conn, table_name)
+    if args.partition_by_month:
+        partition_transactions_by_month(conn, now)
+
+    load_table("customer_details", args.customers, **common)
+    load_table("product_details", args.products, **common)
+    load_table("store_details", args.stores, **common)
+    load_table("retail_transactions", args.transactions, **common)
+    load_table("customer_reviews", args.reviews, **common)
+    print(f"All data generated and loaded in {time.perf_counter() - run_start:.1f}s")
+
+    samples = sample_hydration_inputs(conn, args.hydration_samples, args.seed) if args.hydration_samples else []
+    before = time_hydration_queries(conn, samples) if samples else {}
+
+    for table_name in TABLE_COLUMNS:
+        for statement, seconds in create_post_load_ddl(conn, table_name).items():
+            print(f"  {statement:<45}{seconds:>8.1f}s")
+
+    if samples:
+        after = time_hydration_queries(conn, samples)
+        print(f"Hydration query p50 over {len(samples)} lookups (ms):")
+        print(f"  {'query':<30}{'before':>10}{'after':>10}")
+        for name in after:
+            print(f"  {name:<30}{before[name]:>10.2f}{after[name]:>10.2f}")
+    conn.close()
 
-# Write data to CSV files and load into PostgreSQL
-write_to_csv(csv_files["customer_details"], 10000, generate_customers, [
-    'customer_id', 'customer_name', 'email', 'phone', 'address', 'country', 'state', 'city', 'created_at'
-])
-load_csv_to_postgresql(csv_files["customer_details"], 'customer_details')
-
-write_to_csv(csv_files["product_details"], 500, generate_products, [
-    'product_id', 'product_name', 'product_category', 'product_description', 'unit_price', 'created_at'
-])
-load_csv_to_postgresql(csv_files["product_details"], 'product_details')
-
-write_to_csv(csv_files["store_details"], 100, generate_stores, [
-    'store_id', 'store_name', 'store_address', 'store_country', 'store_state', 'store_city', 'created_at'
-])
-load_csv_to_postgresql(csv_files["store_details"], 'store_details')
-
-write_to_csv(csv_files["retail_transactions"], 1000000, generate_transactions, [
-    'invoice_id', 'customer_id', 'product_id', 'quantity', 'unit_price', 'price', 'discount_applied',
-    'transaction_date', 'payment_method', 'card_type', 'store_address', 'store_country', 'store_state',
-    'store_city', 'product_category', 'product_description', 'product_total_amount', 'transaction_total_amount'
-])
-load_csv_to_postgresql(csv_files["retail_transactions"], 'retail_transactions')
-
-write_to_csv(csv_files["customer_reviews"], 100000, generate_reviews, [
-    'customer_id', 'product_id', 'rating', 'review_text', 'review_date'
-])
-load_csv_to_postgresql(csv_files["customer_reviews"], 'customer_reviews')
-
-# Clean up CSV files
-for file in csv_files.values():
-    os.remove(file)
-    print(f"Removed {file}")
-
-# Close the connection
-cursor.close()
-conn.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Indexes and constraints built after the bulk COPY: one sort per index at the end is much
+# cheaper than maintaining every index row by row during the load. Each entry: (name, drop, create).
+POST_LOAD_DDL = {
+    "retail_transactions": [
+        # Point lookups by the API's FAISS hydration query; partitioned tables must include the partition key
+        ("retail_transactions_pkey",
+         "ALTER TABLE retail_transactions DROP CONSTRAINT IF EXISTS retail_transactions_pkey",
+         "ALTER TABLE retail_transactions ADD CONSTRAINT retail_transactions_pkey PRIMARY KEY ({primary_key})"),
+        ("retail_transactions_invoice_id_idx",
+         "DROP INDEX IF EXISTS retail_transactions_invoice_id_idx",
+         "CREATE INDEX retail_transactions_invoice_id_idx ON retail_transactions (invoice_id)"),
+        ("retail_transactions_product_id_idx",
+         "DROP INDEX IF EXISTS retail_transactions_product_id_idx",
+         "CREATE INDEX retail_transactions_product_id_idx ON retail_transactions (product_id)"),
+        ("retail_transactions_customer_id_idx",
+         "DROP INDEX IF EXISTS retail_transactions_customer_id_idx",
+         "CREATE INDEX retail_transactions_customer_id_idx ON retail_transactions (customer_id)"),
+        ("retail_transactions_transaction_date_idx",
+         "DROP INDEX IF EXISTS retail_transactions_transaction_date_idx",
+         "CREATE INDEX retail_transactions_transaction_date_idx ON retail_transactions (transaction_date)"),
+        # Incremental embedding ingestion scans for rows updated since its watermark
+        ("retail_transactions_updated_at_idx",
+         "DROP INDEX IF EXISTS retail_transactions_updated_at_idx",
+         "CREATE INDEX retail_transactions_updated_at_idx ON retail_transactions (updated_at)"),
+    ],
+    "customer_reviews": [
+        ("customer_reviews_customer_id_fkey",
+         "ALTER TABLE customer_reviews DROP CONSTRAINT IF EXISTS customer_reviews_customer_id_fkey",
+         "ALTER TABLE customer_reviews ADD CONSTRAINT customer_reviews_customer_id_fkey "
+         "FOREIGN KEY (customer_id) REFERENCES customer_details(customer_id)"),
+        ("customer_reviews_product_id_fkey",
+         "ALTER TABLE customer_reviews DROP CONSTRAINT IF EXISTS customer_reviews_product_id_fkey",
+         "ALTER TABLE customer_reviews ADD CONSTRAINT customer_reviews_product_id_fkey "
+         "FOREIGN KEY (product_id) REFERENCES product_details(product_id)"),
+    ],
+}
+
+# Triggers from init.sql; LIKE does not copy them to a partitioned replacement table
+TRANSACTION_TRIGGERS = [
+    "CREATE TRIGGER retail_transactions_touch_updated_at BEFORE UPDATE ON retail_transactions "
+    "FOR EACH ROW EXECUTE FUNCTION touch_updated_at()",
+    "CREATE TRIGGER retail_transactions_log_deletion AFTER DELETE ON retail_transactions "
+    "FOR EACH ROW EXECUTE FUNCTION log_transaction_deletion()",
+    "CREATE TRIGGER retail_transactions_log_truncation AFTER TRUNCATE ON retail_transactions "
+    "FOR EACH STATEMENT EXECUTE FUNCTION log_transaction_truncation()",
+]
+
+# The API's lookups against retail_transactions, timed before and after the indexes exist
+HYDRATION_QUERIES = {
+    "transaction_id = ANY (k=5)": (
+        "SELECT transaction_id, product_category, product_description, quantity, unit_price, price, discount_applied "
+        "FROM retail_transactions WHERE transaction_id = ANY(%s)",
+        lambda sample: (sample["transaction_ids"],),
+    ),
+    "invoice_id": ("SELECT * FROM retail_transactions WHERE invoice_id = %s", lambda sample: (sample["invoice_id"],)),
+    "customer_id": ("SELECT * FROM retail_transactions WHERE customer_id = %s", lambda sample: (sample["customer_id"],)),
+    "product_id": ("SELECT * FROM retail_transactions WHERE product_id = %s", lambda sample: (sample["product_id"],)),
+    "transaction_date (1 day)": (
+        "SELECT * FROM retail_transactions WHERE transaction_date >= %s AND transaction_date < %s + interval '1 day'",
+        lambda sample: (sample["day"], sample["day"]),
+    ),
+}
+
+
+def is_partitioned(conn, table_name="retail_transactions"):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", (table_name,))
+        return cursor.fetchone() is not None
+
+
+def drop_post_load_ddl(conn, table_name):
+    """
+    Drop a table's secondary indexes and constraints ahead of a bulk COPY.
+    """
+    with conn.cursor() as cursor:
+        for _, drop_sql, _ in POST_LOAD_DDL.get(table_name, []):
+            cursor.execute(drop_sql)
+    conn.commit()
+
+
+def create_post_load_ddl(conn, table_name):
+    """
+    Recreate a table's indexes and constraints, then ANALYZE it; returns seconds per statement.
+    """
+    primary_key = "transaction_id, transaction_date" if is_partitioned(conn) else "transaction_id"
+    timings = {}
+    with conn.cursor() as cursor:
+        for name, _, create_sql in POST_LOAD_DDL.get(table_name, []):
+            start = time.perf_counter()
+            cursor.execute(create_sql.format(primary_key=primary_key))
+            timings[name] = time.perf_counter() - start
+            conn.commit()
+        start = time.perf_counter()
+        cursor.execute(f"ANALYZE {table_name}")
+        timings[f"ANALYZE {table_name}"] = time.perf_counter() - start
+    conn.commit()
+    return timings
+
+
+def partition_transactions_by_month(conn, now, months_back=13):
+    """
+    Replace the (empty) retail_transactions table with one range-partitioned by
+    transaction_date, one partition per month over the generated date range plus a
+    default partition. Keeps the transaction_id sequence, defaults and triggers.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE TABLE retail_transactions_partitioned (LIKE retail_transactions INCLUDING DEFAULTS) "
+                       "PARTITION BY RANGE (transaction_date)")
+        # The sequence would otherwise be dropped together with the old table
+        cursor.execute("ALTER SEQUENCE retail_transactions_transaction_id_seq OWNED BY NONE")
+        cursor.execute("DROP TABLE retail_transactions")
+        cursor.execute("ALTER TABLE retail_transactions_partitioned RENAME TO retail_transactions")
+        cursor.execute("ALTER SEQUENCE retail_transactions_transaction_id_seq OWNED BY retail_transactions.transaction_id")
+
+        month = datetime(now.year, now.month, 1)
+        for _ in range(months_back):
+            month = (month - timedelta(days=1)).replace(day=1)
+        end = datetime(now.year + (now.month == 12), now.month % 12 + 1, 1)
+        while month < end:
+            next_month = datetime(month.year + (month.month == 12), month.month % 12 + 1, 1)
+            cursor.execute(
+                f"CREATE TABLE retail_transactions_{month:%Y_%m} PARTITION OF retail_transactions "
+                "FOR VALUES FROM (%s) TO (%s)", (month, next_month)
+            )
+            month = next_month
+        cursor.execute("CREATE TABLE retail_transactions_default PARTITION OF retail_transactions DEFAULT")
+
+        for trigger_sql in TRANSACTION_TRIGGERS:
+            cursor.execute(trigger_sql)
+    conn.commit()
+    print(f"retail_transactions partitioned by month ({months_back + 1} monthly partitions plus default)")
+
+
+def sample_hydration_inputs(conn, samples, seed):
+    """
+    Random lookup inputs taken from existing rows: 5 transaction IDs per FAISS-style
+    hydration, plus an invoice, customer, product and day.
+    """
+    rng = np.random.default_rng(seed)
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT max(transaction_id) FROM retail_transactions")
+        max_id = cursor.fetchone()[0] or 1
+        transaction_ids = rng.integers(1, max_id + 1, size=(samples, 5)).tolist()
+        cursor.execute(
+            "SELECT transaction_id, invoice_id, customer_id, product_id, date_trunc('day', transaction_date) "
+            "FROM retail_transactions WHERE transaction_id = ANY(%s)", ([ids[0] for ids in transaction_ids],)
+        )
+        # Keyed by ID: rows come back in no particular order, and gaps or repeated IDs change their count
+        rows = {row[0]: row[1:] for row in cursor.fetchall()}
+    conn.rollback()
+    return [
+        {"transaction_ids": ids, "invoice_id": row[0], "customer_id": row[1], "product_id": row[2], "day": row[3]}
+        for ids, row in ((ids, rows.get(ids[0])) for ids in transaction_ids) if row is not None
+    ]
+
+
+def time_hydration_queries(conn, samples):
+    """
+    Median latency in ms of each API lookup over the sampled inputs.
+    """
+    results = {}
+    with conn.cursor() as cursor:
+        for name, (sql, make_params) in HYDRATION_QUERIES.items():
+            latencies = []
+            for sample in samples:
+                start = time.perf_counter()
+                cursor.execute(sql, make_params(sample))
+                cursor.fetchall()
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            results[name] = latencies[len(latencies) // 2] * 1000.0 if latencies else None
+    conn.rollback()
+    return results
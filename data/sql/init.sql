@@ -1,5 +1,6 @@
 DROP TABLE IF EXISTS retail_transactions;
 CREATE TABLE retail_transactions (
+    transaction_id BIGSERIAL PRIMARY KEY,  -- stable row ID used as the FAISS vector ID
     invoice_id INT,
     customer_id INT,
     product_id INT,
@@ -17,8 +18,60 @@ CREATE TABLE retail_transactions (
     product_category VARCHAR(50),
     product_description TEXT,
     product_total_amount FLOAT,
-    transaction_total_amount FLOAT
+    transaction_total_amount FLOAT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()  -- change watermark for incremental embedding refresh
 );
+-- Secondary indexes (invoice_id, product_id, customer_id, transaction_date, updated_at) are built by
+-- data/generation after the bulk COPY; see POST_LOAD_DDL in data/generation/schema.py
+
+-- Keep updated_at current so incremental ingestion can re-embed modified rows
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER retail_transactions_touch_updated_at
+    BEFORE UPDATE ON retail_transactions
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- Deleted transaction IDs, so incremental ingestion can remove their vectors
+DROP TABLE IF EXISTS retail_transactions_deletions;
+CREATE TABLE retail_transactions_deletions (
+    transaction_id BIGINT NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX retail_transactions_deletions_deleted_at_idx ON retail_transactions_deletions (deleted_at);
+
+CREATE OR REPLACE FUNCTION log_transaction_deletion() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO retail_transactions_deletions (transaction_id) VALUES (OLD.transaction_id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER retail_transactions_log_deletion
+    AFTER DELETE ON retail_transactions
+    FOR EACH ROW EXECUTE FUNCTION log_transaction_deletion();
+
+-- When retail_transactions was last emptied (a data/generation reload): TRUNCATE logs no deletions and
+-- restarts transaction_id, so incremental ingestion has to rebuild from scratch after one
+DROP TABLE IF EXISTS retail_transactions_truncations;
+CREATE TABLE retail_transactions_truncations (
+    truncated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION log_transaction_truncation() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO retail_transactions_truncations DEFAULT VALUES;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER retail_transactions_log_truncation
+    AFTER TRUNCATE ON retail_transactions
+    FOR EACH STATEMENT EXECUTE FUNCTION log_transaction_truncation();
 
 DROP TABLE IF EXISTS customer_details;
 CREATE TABLE customer_details (